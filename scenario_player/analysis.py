@@ -0,0 +1,415 @@
+"""Indexed analysis of the node logs of a scenario run.
+
+:func:`build_index` parses the JSON logs ``run-XXX.log`` (or
+``run-XXX.log.gz``) of all nodes of a run in parallel processes and stores
+their entries in a columnar index in ``<scenario dir>/analysis/run-XXX/``.
+
+Every column is a file of fixed size values, one per log entry, in the
+order of the logs of the nodes. The columns are memory mapped, so queries
+only read the values they use. ``index.json`` holds the event names of every
+node, the number of entries and errors per node and interval (for the error
+rates), and the size and mtime of the parsed logs, which outdates the index
+when a log changes. ``payment_keys.bin`` and ``payment_rows.bin`` map the
+sorted payment identifiers to the entries mentioning them, so a payment is
+traced across all nodes with a binary search.
+"""
+import bisect
+import json
+import mmap
+import re
+import shutil
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import repeat
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import structlog
+
+from scenario_player.utils.allocation import file_lock, lock_file_for, write_file_atomic
+from scenario_player.utils.identifiers import parse_payment_identifier
+from scenario_player.utils.node_logs import COMPRESSED_SUFFIX, open_log_segment
+
+log = structlog.get_logger(__name__)
+
+ANALYSIS_DIRNAME = "analysis"
+INDEX_FILENAME = "index.json"
+INDEX_VERSION = 1
+# Seconds per interval of the error counts stored in the index
+ERROR_RATE_INTERVAL = 10
+
+COLUMNS = {
+    "timestamp": "d",
+    "node": "H",
+    "level": "B",
+    "event": "I",
+    "payment": "Q",
+    "channel": "Q",
+    "offset": "Q",
+}
+PAYMENT_INDEX_COLUMNS = {"payment_keys": "Q", "payment_rows": "Q"}
+
+# Level 0 is used for entries without a known level
+LEVELS = ("", "debug", "info", "warning", "error", "critical")
+LEVEL_CODES = {level: code for code, level in enumerate(LEVELS)}
+ERROR_LEVEL_CODES = frozenset((LEVEL_CODES["error"], LEVEL_CODES["critical"]))
+
+# The identifiers are also found in nested objects and in the repr of state
+# changes, e.g. `"payment_identifier": 1` or `payment_identifier=1`.
+PAYMENT_IDENTIFIER_RE = re.compile(rb"\bpayment_identifier\W{1,8}(\d+)")
+CHANNEL_IDENTIFIER_RE = re.compile(rb"\bchannel_identifier\W{1,8}(\d+)")
+MAX_UINT64 = 2**64 - 1
+
+NODE_DIR_RE = re.compile(r"^node_(?:(\d+)_)?(\d+)$")
+
+
+@dataclass
+class LogEntry:
+    row: int
+    timestamp: float
+    node: int
+    level: str
+    event: str
+    payment_identifier: Optional[int]
+    channel_identifier: Optional[int]
+
+    @property
+    def is_error(self) -> bool:
+        return LEVEL_CODES.get(self.level) in ERROR_LEVEL_CODES
+
+
+def index_dir_for(scenario_dir: Path, run_number: int) -> Path:
+    return scenario_dir.joinpath(ANALYSIS_DIRNAME, f"run-{run_number:03d}")
+
+
+def find_run_logs(scenario_dir: Path, run_number: int) -> Dict[int, Path]:
+    """Return the JSON logs of the nodes of run `run_number`, by node index."""
+    log_name = f"run-{run_number:03d}.log"
+    logs = {}
+    for datadir in scenario_dir.glob("node_*"):
+        match = NODE_DIR_RE.match(datadir.name)
+        if match is None or (match.group(1) is not None and int(match.group(1)) != run_number):
+            continue
+        for path in (
+            datadir.joinpath(f"{log_name}{COMPRESSED_SUFFIX}"),
+            datadir.joinpath(log_name),
+        ):
+            if path.exists():
+                logs[int(match.group(2))] = path
+                break
+    if not logs:
+        raise FileNotFoundError(f"No node logs of run {run_number} in {scenario_dir}")
+    return logs
+
+
+def parse_timestamp(timestamp: str) -> float:
+    """Return the UNIX time of a timestamp of the node logs, which are in UTC."""
+    return datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc).timestamp()
+
+
+def _matched_identifier(pattern: "re.Pattern", line: bytes) -> int:
+    match = pattern.search(line)
+    if match is None:
+        return 0
+    identifier = int(match.group(1))
+    return identifier if identifier <= MAX_UINT64 else 0
+
+
+def _part_path(parts_dir: Path, node: int, column: str) -> Path:
+    return parts_dir.joinpath(f"node-{node:03d}.{column}.bin")
+
+
+def parse_node_log(log_file: Path, node: int, parts_dir: Path) -> Dict[str, Any]:
+    """Parse the log of `node` into column files in `parts_dir`, return its metadata.
+
+    Runs in a worker process of :func:`build_index`.
+    """
+    columns = {column: array(typecode) for column, typecode in COLUMNS.items()}
+    events: Dict[str, int] = {}
+    error_counts: Dict[int, List[int]] = {}
+    invalid_lines = 0
+    timestamp = 0.0
+    offset = 0
+
+    with open_log_segment(log_file) as log_stream:
+        for line in log_stream:
+            line_offset = offset
+            offset += len(line)
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                invalid_lines += 1
+                continue
+            if not isinstance(entry, dict):
+                invalid_lines += 1
+                continue
+
+            try:
+                timestamp = parse_timestamp(entry["timestamp"])
+            except (KeyError, TypeError, ValueError):
+                # Keep the entries in order with the timestamp of the previous entry
+                pass
+            level = LEVEL_CODES.get(entry.get("level"), 0)
+            event = str(entry.get("event", ""))
+
+            columns["timestamp"].append(timestamp)
+            columns["level"].append(level)
+            columns["event"].append(events.setdefault(event, len(events)))
+            columns["payment"].append(_matched_identifier(PAYMENT_IDENTIFIER_RE, line))
+            columns["channel"].append(_matched_identifier(CHANNEL_IDENTIFIER_RE, line))
+            columns["offset"].append(line_offset)
+
+            counts = error_counts.setdefault(
+                int(timestamp // ERROR_RATE_INTERVAL) * ERROR_RATE_INTERVAL, [0, 0]
+            )
+            counts[0] += 1
+            if level in ERROR_LEVEL_CODES:
+                counts[1] += 1
+
+    row_count = len(columns["timestamp"])
+    columns["node"] = array(COLUMNS["node"], [node]) * row_count
+    for column, values in columns.items():
+        with _part_path(parts_dir, node, column).open("wb") as part:
+            values.tofile(part)
+
+    return {
+        "node": node,
+        "log": str(log_file),
+        "row_count": row_count,
+        "invalid_lines": invalid_lines,
+        "events": list(events),
+        "first_timestamp": columns["timestamp"][0] if row_count else None,
+        "last_timestamp": columns["timestamp"][-1] if row_count else None,
+        "error_counts": {str(start): counts for start, counts in sorted(error_counts.items())},
+    }
+
+
+def _log_sources(logs: Dict[int, Path]) -> Dict[str, Dict[str, Any]]:
+    sources = {}
+    for node, path in logs.items():
+        stat = path.stat()
+        sources[str(node)] = {"path": str(path), "size": stat.st_size, "mtime": stat.st_mtime}
+    return sources
+
+
+def build_index(logs: Dict[int, Path], index_dir: Path, parallel: int = 1) -> "RunIndex":
+    """Parse the node `logs` with `parallel` processes into a new index in `index_dir`."""
+    parts_dir = index_dir.joinpath("parts")
+    shutil.rmtree(parts_dir, ignore_errors=True)
+    parts_dir.mkdir(parents=True)
+    index_dir.joinpath(INDEX_FILENAME).unlink(missing_ok=True)
+
+    nodes = sorted(logs)
+    log_files = [logs[node] for node in nodes]
+    log.info("Indexing node logs", nodes=len(nodes), parallel=parallel, index=index_dir)
+    if parallel > 1 and len(nodes) > 1:
+        with ProcessPoolExecutor(min(parallel, len(nodes))) as executor:
+            node_metas = list(executor.map(parse_node_log, log_files, nodes, repeat(parts_dir)))
+    else:
+        node_metas = list(map(parse_node_log, log_files, nodes, repeat(parts_dir)))
+
+    row_count = 0
+    for node_meta in node_metas:
+        node_meta["rows"] = [row_count, row_count + node_meta.pop("row_count")]
+        row_count = node_meta["rows"][1]
+
+    for column in COLUMNS:
+        with index_dir.joinpath(f"{column}.bin").open("wb") as column_file:
+            for node in nodes:
+                with _part_path(parts_dir, node, column).open("rb") as part:
+                    shutil.copyfileobj(part, column_file)
+
+    payment_rows: List[Tuple[int, int]] = []
+    for node_meta in node_metas:
+        payments = array(COLUMNS["payment"])
+        payments.frombytes(_part_path(parts_dir, node_meta["node"], "payment").read_bytes())
+        first_row = node_meta["rows"][0]
+        payment_rows.extend(
+            (payment, first_row + row) for row, payment in enumerate(payments) if payment
+        )
+    payment_rows.sort()
+    for column, values in (
+        ("payment_keys", (payment for payment, _ in payment_rows)),
+        ("payment_rows", (row for _, row in payment_rows)),
+    ):
+        with index_dir.joinpath(f"{column}.bin").open("wb") as column_file:
+            array(PAYMENT_INDEX_COLUMNS[column], values).tofile(column_file)
+
+    shutil.rmtree(parts_dir)
+    meta = {
+        "version": INDEX_VERSION,
+        "row_count": row_count,
+        "error_rate_interval": ERROR_RATE_INTERVAL,
+        "sources": _log_sources(logs),
+        "nodes": node_metas,
+    }
+    # The index is complete once its metadata exists
+    write_file_atomic(index_dir.joinpath(INDEX_FILENAME), json.dumps(meta))
+    log.info("Node logs indexed", entries=row_count)
+    return RunIndex(index_dir)
+
+
+def index_is_current(index_dir: Path, logs: Dict[int, Path]) -> bool:
+    try:
+        meta = json.loads(index_dir.joinpath(INDEX_FILENAME).read_text())
+    except (OSError, ValueError):
+        return False
+    return meta.get("version") == INDEX_VERSION and meta.get("sources") == _log_sources(logs)
+
+
+def open_run_index(
+    scenario_dir: Path, run_number: int, parallel: int = 1, rebuild: bool = False
+) -> "RunIndex":
+    """Return the index of the node logs of a run, (re-)building it if it is outdated."""
+    logs = find_run_logs(scenario_dir, run_number)
+    index_dir = index_dir_for(scenario_dir, run_number)
+    with file_lock(lock_file_for(index_dir)):
+        if rebuild or not index_is_current(index_dir, logs):
+            return build_index(logs, index_dir, parallel)
+    return RunIndex(index_dir)
+
+
+def _map_column(path: Path, typecode: str) -> Sequence:
+    if path.stat().st_size == 0:
+        return array(typecode)
+    with path.open("rb") as column_file:
+        mapped = mmap.mmap(column_file.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mapped).cast(typecode)
+
+
+class RunIndex:
+    """Queries of the indexed node logs of a run."""
+
+    def __init__(self, index_dir: Path) -> None:
+        self.index_dir = index_dir
+        self.meta = json.loads(index_dir.joinpath(INDEX_FILENAME).read_text())
+        self.nodes = {node_meta["node"]: node_meta for node_meta in self.meta["nodes"]}
+        self._columns: Dict[str, Sequence] = {}
+
+    def __len__(self) -> int:
+        return self.meta["row_count"]
+
+    def column(self, name: str) -> Sequence:
+        if name not in self._columns:
+            typecode = {**COLUMNS, **PAYMENT_INDEX_COLUMNS}[name]
+            self._columns[name] = _map_column(self.index_dir.joinpath(f"{name}.bin"), typecode)
+        return self._columns[name]
+
+    def entry(self, row: int) -> LogEntry:
+        node = self.column("node")[row]
+        payment = self.column("payment")[row]
+        channel = self.column("channel")[row]
+        return LogEntry(
+            row=row,
+            timestamp=self.column("timestamp")[row],
+            node=node,
+            level=LEVELS[self.column("level")[row]],
+            event=self.nodes[node]["events"][self.column("event")[row]],
+            payment_identifier=payment or None,
+            channel_identifier=channel or None,
+        )
+
+    def payment_rows(self, identifier: int) -> List[int]:
+        keys = self.column("payment_keys")
+        rows = self.column("payment_rows")
+        return list(
+            rows[bisect.bisect_left(keys, identifier) : bisect.bisect_right(keys, identifier)]
+        )
+
+    def trace_payment(self, identifier: int) -> List[LogEntry]:
+        """Return the entries of all nodes about payment `identifier`, ordered by time."""
+        entries = [self.entry(row) for row in self.payment_rows(identifier)]
+        return sorted(entries, key=lambda entry: (entry.timestamp, entry.node, entry.row))
+
+    def error_rates(self, interval: int = ERROR_RATE_INTERVAL) -> Dict[int, List[List[int]]]:
+        """Return `[start, entries, errors]` of every interval with entries, by node.
+
+        `interval` is rounded up to a multiple of the interval of the index.
+        """
+        index_interval = self.meta["error_rate_interval"]
+        interval = max(1, -(-interval // index_interval)) * index_interval
+        rates = {}
+        for node, node_meta in sorted(self.nodes.items()):
+            merged: Dict[int, List[int]] = {}
+            for start, (entries, errors) in node_meta["error_counts"].items():
+                counts = merged.setdefault(int(start) // interval * interval, [0, 0])
+                counts[0] += entries
+                counts[1] += errors
+            rates[node] = [[start, *counts] for start, counts in sorted(merged.items())]
+        return rates
+
+    def raw_entries(self, rows: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Return the complete log entries of `rows`, read from the node logs."""
+        rows_by_node: Dict[int, List[int]] = {}
+        for row in rows:
+            rows_by_node.setdefault(self.column("node")[row], []).append(row)
+
+        entries = {}
+        offsets = self.column("offset")
+        for node, node_rows in rows_by_node.items():
+            with open_log_segment(Path(self.nodes[node]["log"])) as log_stream:
+                # Seek forwards only, which is cheap in compressed logs, too
+                for row in sorted(node_rows, key=offsets.__getitem__):
+                    log_stream.seek(offsets[row])
+                    entries[row] = json.loads(log_stream.readline())
+        return entries
+
+
+def _format_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def format_summary(index: RunIndex) -> str:
+    lines = []
+    for node, node_meta in sorted(index.nodes.items()):
+        start, end = node_meta["rows"]
+        errors = sum(errors for _, errors in node_meta["error_counts"].values())
+        time_range = (
+            f"{_format_time(node_meta['first_timestamp'])} - "
+            f"{_format_time(node_meta['last_timestamp'])}"
+            if end > start
+            else "-"
+        )
+        lines.append(f"node {node:3d}: {end - start:8d} entries, {errors:5d} errors, {time_range}")
+    lines.append(f"{len(index)} entries of {len(index.nodes)} nodes")
+    return "\n".join(lines)
+
+
+def format_payment_trace(
+    identifier: int,
+    entries: List[LogEntry],
+    raw_entries: Optional[Dict[int, Dict[str, Any]]] = None,
+) -> str:
+    generated = parse_payment_identifier(identifier)
+    lines = [
+        f"Payment {identifier}"
+        + (
+            f" (run {generated.run_number}, transfer {generated.transfer_count})"
+            if generated
+            else ""
+        )
+        + f": {len(entries)} entries on nodes {sorted({entry.node for entry in entries})}"
+    ]
+    for entry in entries:
+        channel = f" channel={entry.channel_identifier}" if entry.channel_identifier else ""
+        lines.append(
+            f"{_format_time(entry.timestamp)} node {entry.node:3d} "
+            f"{entry.level or '-':8s} {entry.event}{channel}"
+        )
+        if raw_entries is not None:
+            lines.append(f"    {json.dumps(raw_entries[entry.row])}")
+    return "\n".join(lines)
+
+
+def format_error_rates(rates: Dict[int, List[List[int]]]) -> str:
+    lines = []
+    for node, intervals in rates.items():
+        lines.append(f"node {node}:")
+        for start, entries, errors in intervals:
+            lines.append(
+                f"  {_format_time(start)[:19]} {entries:8d} entries {errors:5d} errors "
+                f"{errors / entries:7.2%}"
+            )
+    return "\n".join(lines)
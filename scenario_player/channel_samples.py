@@ -0,0 +1,223 @@
+"""Time series of the channels of all nodes, enabled with ``settings.channel_sampling_interval``.
+
+:class:`ChannelSampler` runs in a greenlet of the scenario runner and
+fetches the channels and pending transfers of all nodes every interval,
+concurrently and with the session of the runner. A sample which isn't done
+at the next interval delays the next one instead of piling up requests, and
+failed requests are logged and skipped, so the sampler never fails a task.
+
+The samples are stored in ``<scenario dir>/channels/run-XXX/``, one row per
+channel and sample. Like the log index of :mod:`scenario_player.analysis`,
+every column is a file of fixed size values, to which the rows of every
+sample are appended. Token amounts are stored exactly, up to 2**128 - 1, as
+two columns of their high and low 64 bits. ``samples.json`` holds the
+addresses of the nodes, by which the partners are numbered, and the interval.
+:class:`ChannelSamples` queries the columns and :func:`sparkline` plots a
+series in the terminal.
+"""
+import json
+import time
+from array import array
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+import gevent
+import structlog
+from gevent.pool import Pool
+from raiden_common.utils.formatting import to_checksum_address
+from requests import RequestException  # type: ignore
+
+from scenario_player.utils.allocation import write_file_atomic
+
+if TYPE_CHECKING:
+    from scenario_player.runner import ScenarioRunner
+
+log = structlog.get_logger(__name__)
+
+CHANNELS_DIRNAME = "channels"
+SAMPLES_FILENAME = "samples.json"
+SAMPLE_CONCURRENCY = 32
+SAMPLE_REQUEST_TIMEOUT = 30
+
+AMOUNT_COLUMNS = ("balance", "total_deposit", "total_withdraw", "locked_amount")
+AMOUNT_MAX = 2**128 - 1
+COLUMNS = {
+    "timestamp": "d",
+    "node": "H",
+    "partner": "H",
+    "channel": "Q",
+    "state": "B",
+    **{f"{column}_{half}": "Q" for column in AMOUNT_COLUMNS for half in ("high", "low")},
+    "pending_transfers": "I",
+}
+# Partner number of the channels with nodes not in the scenario
+EXTERNAL_PARTNER = 2**16 - 1
+# State 0 is used for unknown states, new states are appended to keep the codes stable
+STATES = ("", "opened", "closed", "settled", "removed", "closing", "settling", "unusable")
+STATE_CODES = {state: code for code, state in enumerate(STATES)}
+
+SPARKLINE_BARS = "▁▂▃▄▅▆▇█"
+
+
+def samples_dir_for(scenario_dir: Path, run_number: int) -> Path:
+    return scenario_dir.joinpath(CHANNELS_DIRNAME, f"run-{run_number:03d}")
+
+
+def _amount(value: Any) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _append_amount(columns: Dict[str, array], column: str, amount: int) -> None:
+    amount = min(max(amount, 0), AMOUNT_MAX)
+    columns[f"{column}_high"].append(amount >> 64)
+    columns[f"{column}_low"].append(amount & (2**64 - 1))
+
+
+class ChannelSampler:
+    """Sample the channels of all nodes every `interval` seconds into `directory`."""
+
+    def __init__(self, runner: "ScenarioRunner", interval: float, directory: Path) -> None:
+        self._runner = runner
+        self.interval = interval
+        self.directory = directory
+        self.sample_count = 0
+        self._partners: Dict[str, int] = {}
+        self._greenlet: Optional[gevent.Greenlet] = None
+
+    def start(self) -> None:
+        """Start sampling, the samples of a previous run in `directory` are replaced."""
+        addresses = [
+            self._runner.get_node_address(node)
+            for node in range(len(self._runner.node_controller))
+        ]
+        self._partners = {address: node for node, address in enumerate(addresses)}
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for column in COLUMNS:
+            self.directory.joinpath(f"{column}.bin").write_bytes(b"")
+        meta = {"interval": self.interval, "addresses": addresses, "states": STATES}
+        write_file_atomic(self.directory.joinpath(SAMPLES_FILENAME), json.dumps(meta))
+        self._greenlet = gevent.spawn(self._sample_forever)
+        log.info("Channel sampling started", interval=self.interval, directory=self.directory)
+
+    def stop(self) -> None:
+        if self._greenlet is not None:
+            self._greenlet.kill()
+            self._greenlet = None
+            log.info("Channel sampling stopped", samples=self.sample_count)
+
+    def _sample_forever(self) -> None:
+        next_sample = time.monotonic()
+        while True:
+            self.sample()
+            next_sample = max(next_sample + self.interval, time.monotonic())
+            gevent.sleep(next_sample - time.monotonic())
+
+    def _get(self, node: int, path: str) -> Optional[List[Dict[str, Any]]]:
+        url = f"{self._runner.protocol}://{self._runner.get_node_baseurl(node)}/api/v1/{path}"
+        try:
+            response = self._runner.session.get(url, timeout=SAMPLE_REQUEST_TIMEOUT)
+            response.raise_for_status()
+            return response.json()
+        except (RequestException, ValueError) as ex:
+            log.debug("Sampling request failed", url=url, ex=str(ex))
+            return None
+
+    def _fetch_node(self, node: int) -> Tuple[int, Optional[list], Optional[list]]:
+        token_address = to_checksum_address(self._runner.token.address)
+        channels = self._get(node, f"channels/{token_address}")
+        pending_transfers = self._get(node, f"pending_transfers/{token_address}")
+        return node, channels, pending_transfers
+
+    def sample(self) -> None:
+        """Fetch the channels of all nodes and append them to the columns."""
+        timestamp = time.time()
+        columns = {column: array(typecode) for column, typecode in COLUMNS.items()}
+        pool = Pool(SAMPLE_CONCURRENCY)
+        nodes = range(len(self._runner.node_controller))
+        for node, channels, pending_transfers in pool.imap(self._fetch_node, nodes):
+            if channels is None:
+                continue
+            locks: Dict[int, List[int]] = {}
+            for transfer in pending_transfers or []:
+                lock = locks.setdefault(int(transfer.get("channel_identifier", 0)), [0, 0])
+                lock[0] += _amount(transfer.get("locked_amount"))
+                lock[1] += 1
+            for channel in channels:
+                channel_identifier = int(channel.get("channel_identifier", 0))
+                locked_amount, transfer_count = locks.get(channel_identifier, (0, 0))
+                columns["timestamp"].append(timestamp)
+                columns["node"].append(node)
+                columns["partner"].append(
+                    self._partners.get(channel.get("partner_address"), EXTERNAL_PARTNER)
+                )
+                columns["channel"].append(channel_identifier)
+                columns["state"].append(STATE_CODES.get(channel.get("state"), 0))
+                for column in ("balance", "total_deposit", "total_withdraw"):
+                    _append_amount(columns, column, _amount(channel.get(column)))
+                _append_amount(columns, "locked_amount", locked_amount)
+                columns["pending_transfers"].append(int(transfer_count))
+
+        for column, values in columns.items():
+            with self.directory.joinpath(f"{column}.bin").open("ab") as column_file:
+                values.tofile(column_file)
+        self.sample_count += 1
+
+
+class ChannelSamples:
+    """Queries of the channel samples of a run."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.meta = json.loads(directory.joinpath(SAMPLES_FILENAME).read_text())
+        self._columns: Dict[str, Sequence] = {}
+        for column, typecode in COLUMNS.items():
+            values = array(typecode)
+            data = directory.joinpath(f"{column}.bin").read_bytes()
+            values.frombytes(data[: len(data) - len(data) % values.itemsize])
+            self._columns[column] = values
+        # The sample being appended while the samples are read is skipped
+        self._row_count = min(len(values) for values in self._columns.values())
+
+    def __len__(self) -> int:
+        return self._row_count
+
+    def column(self, name: str) -> Sequence:
+        """Return the values of column `name`, token amounts as exact integers."""
+        if name in AMOUNT_COLUMNS:
+            return [
+                high << 64 | low
+                for high, low in zip(self.column(f"{name}_high"), self.column(f"{name}_low"))
+            ]
+        return self._columns[name][: self._row_count]
+
+    def series(self, node: int, partner: int, field: str) -> List[Tuple[float, float]]:
+        """Return the `(timestamp, value)` samples of `field` of the channel of `node`."""
+        return [
+            (timestamp, value)
+            for timestamp, row_node, row_partner, value in zip(
+                self.column("timestamp"),
+                self.column("node"),
+                self.column("partner"),
+                self.column(field),
+            )
+            if row_node == node and row_partner == partner
+        ]
+
+    def totals(self, field: str) -> List[Tuple[float, float]]:
+        """Return the `(timestamp, sum)` of `field` over all channels per sample."""
+        totals: Dict[float, float] = {}
+        for timestamp, value in zip(self.column("timestamp"), self.column(field)):
+            totals[timestamp] = totals.get(timestamp, 0) + value
+        return list(totals.items())
+
+
+def sparkline(values: Sequence[float]) -> str:
+    """Return a one line plot of `values`, e.g. ``▁▃▅█▅``."""
+    if not values:
+        return ""
+    low, high = min(values), max(values)
+    scale = (len(SPARKLINE_BARS) - 1) / (high - low) if high > low else 0
+    return "".join(SPARKLINE_BARS[round((value - low) * scale)] for value in values)
@@ -1,17 +1,104 @@
+import hashlib
+import json
+import os
 import pathlib
 from dataclasses import asdict
+from typing import Any, Dict
 
 import jinja2
 import structlog
 import yaml
 
+from scenario_player import __version__
+from scenario_player.utils.configuration.generators import TopologyConfig, TrafficConfig
 from scenario_player.utils.configuration.nodes import NodesConfig
 from scenario_player.utils.configuration.scenario import ScenarioConfig
 from scenario_player.utils.configuration.settings import EnvironmentConfig, SettingsConfig
 from scenario_player.utils.configuration.token import TokenConfig
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader  # type: ignore
+
 log = structlog.get_logger(__name__)
 
+DEFINITION_CACHE_FILE_NAME = "definition.cache.json"
+# JSON objects only have string keys, other mappings are cached as lists of items
+CACHE_ITEMS_KEY = "__items__"
+
+
+def _cache_key(yaml_template: str, environment: EnvironmentConfig) -> str:
+    """Hash of the scenario template and the environment values it is rendered with."""
+    environment_values = asdict(environment)
+    environment_values.pop("eth_rpc_endpoint_iterator")
+    key = hashlib.sha256(__version__.encode())
+    key.update(yaml_template.encode())
+    key.update(json.dumps(environment_values, sort_keys=True, default=str).encode())
+    return key.hexdigest()
+
+
+def _encode_cache_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value):
+            return {key: _encode_cache_value(item) for key, item in value.items()}
+        return {CACHE_ITEMS_KEY: [[key, _encode_cache_value(item)] for key, item in value.items()]}
+    if isinstance(value, list):
+        return [_encode_cache_value(item) for item in value]
+    return value
+
+
+def _decode_cache_object(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1 and CACHE_ITEMS_KEY in obj:
+        return dict(obj[CACHE_ITEMS_KEY])
+    return obj
+
+
+def load_scenario_yaml(
+    yaml_path: pathlib.Path, environment: EnvironmentConfig, cache_file: pathlib.Path
+) -> Any:
+    """Render the scenario file as jinja template and parse the resulting yaml.
+
+    The parsed scenario is cached as JSON in `cache_file`, rendering and
+    parsing is skipped if neither the scenario file, the environment nor the
+    scenario player version changed since. Scenarios with values, which JSON
+    can't represent exactly, e.g. dates, are not cached.
+    """
+    yaml_template = yaml_path.read_text()
+    key = _cache_key(yaml_template, environment)
+
+    try:
+        cached = json.loads(cache_file.read_text(), object_hook=_decode_cache_object)
+    except FileNotFoundError:
+        pass
+    except (OSError, TypeError, ValueError) as ex:
+        log.warning("Ignoring unreadable scenario cache", cache_file=cache_file, ex=str(ex))
+    else:
+        if isinstance(cached, dict) and cached.get("key") == key and "scenario" in cached:
+            log.debug("Using cached scenario", cache_file=cache_file)
+            return cached["scenario"]
+
+    template = jinja2.Template(yaml_template, undefined=jinja2.StrictUndefined)
+    loaded = yaml.load(template.render(**asdict(environment)), Loader=SafeLoader)
+
+    try:
+        encoded = json.dumps({"key": key, "scenario": _encode_cache_value(loaded)})
+        cacheable = json.loads(encoded, object_hook=_decode_cache_object)["scenario"] == loaded
+    except (TypeError, ValueError):
+        cacheable = False
+    if not cacheable:
+        log.debug("Scenario can't be cached as JSON", cache_file=cache_file)
+        return loaded
+
+    # Write to a temporary file first, so that concurrent runs of the same
+    # scenario never read a partially written cache.
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+    tmp_file.write_text(encoded)
+    tmp_file.replace(cache_file)
+
+    return loaded
+
 
 class ScenarioDefinition:
     """Interface for a Scenario `.yaml` file.
@@ -29,10 +116,11 @@ class ScenarioDefinition:
         self._scenario_dir = None
         self.path = yaml_path
         # Use the scenario file as jinja template and only parse the yaml, afterwards.
-        with yaml_path.open() as f:
-            yaml_template = jinja2.Template(f.read(), undefined=jinja2.StrictUndefined)
-            rendered_yaml = yaml_template.render(**asdict(environment))
-            self._loaded = yaml.safe_load(rendered_yaml)
+        self._loaded = load_scenario_yaml(
+            yaml_path,
+            environment,
+            data_path.joinpath("scenarios", self.name, DEFINITION_CACHE_FILE_NAME),
+        )
 
         self.settings = SettingsConfig(self._loaded, environment)
         self.settings.sp_root_dir = data_path
@@ -43,6 +131,8 @@ class ScenarioDefinition:
             "development-environment"
         ] = environment.development_environment.value
         self.scenario = ScenarioConfig(self._loaded)
+        self.topology = TopologyConfig(self._loaded, self.nodes.count)
+        self.traffic = TrafficConfig(self._loaded, self.nodes.count)
 
         # If the environment sets a list of matrix servers, the nodes must not
         # choose other servers, so let's set the first server from the list as
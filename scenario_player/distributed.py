@@ -0,0 +1,308 @@
+"""Run the scenarios of a suite on several hosts.
+
+The coordinator holds the queue of scenarios and hands them out to the
+workers, longest processing time first. It allocates the run numbers, so
+that the node keys of scenario runs on different workers never collide.
+Workers run the scenarios they claimed and report the result of every
+scenario back as soon as it finished.
+
+The runners of a worker share one client, which serializes the nonces of the
+orchestration account. Workers on different hosts can't do that, so every
+worker sends its orchestration address with its claims and the coordinator
+binds every address to the first worker claiming with it. The claims of
+other workers with the same address are rejected, every worker needs its
+own account.
+
+The protocol is JSON over HTTP:
+
+    ``POST /claim`` ``{"worker": "ci-1", "account": "0x...", "max_nodes": 20, "running": 1}``
+        Returns ``{"assignment": {...}, "pending": 3}``, the assignment is
+        ``null`` if no pending scenario fits into ``max_nodes``. The worker
+        stops claiming once ``pending`` is ``0``. Returns ``409 Conflict``
+        with ``{"error": "..."}`` if the account is used by another worker.
+    ``POST /result`` ``{"id": "...", "result": {...}}``
+        Stores the result of an assignment.
+    ``GET /status``
+        Returns the number of pending, running and finished scenarios.
+"""
+import itertools
+import json
+import os
+import socket
+from dataclasses import asdict
+from http import HTTPStatus
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import gevent
+import requests
+import structlog
+from gevent.event import Event
+from gevent.lock import Semaphore
+from gevent.pywsgi import WSGIServer
+
+from scenario_player.exceptions import AccountInUse
+from scenario_player.suite import SuiteEntry, SuiteResult, run_suite_entry, scheduling_priority
+
+log = structlog.get_logger(__name__)
+
+# Seconds a worker waits before claiming again, if no pending scenario fits
+WORKER_RETRY_INTERVAL = 5.0
+WORKER_REQUEST_TIMEOUT = 30.0
+
+
+def scenario_file_for_transfer(scenario_file: Path) -> str:
+    """Return `scenario_file` relative to the working directory, if it is inside of it.
+
+    The workers resolve it against their own working directory, usually a
+    checkout of the same repository.
+    """
+    try:
+        return str(scenario_file.relative_to(Path.cwd()))
+    except ValueError:
+        return str(scenario_file)
+
+
+class SuiteCoordinator:
+    """Queue of the scenarios of a distributed suite."""
+
+    def __init__(
+        self, entries: Iterable[SuiteEntry], allocate_run_number: Callable[[str], int]
+    ) -> None:
+        self.pending = sorted(entries, key=scheduling_priority, reverse=True)
+        self.assignments: Dict[str, Tuple[str, SuiteEntry]] = {}
+        self.results: List[SuiteResult] = []
+        # The worker using each orchestration account, by lower case address
+        self.accounts: Dict[str, str] = {}
+        self.finished = Event()
+        self._allocate_run_number = allocate_run_number
+        self._assignment_ids = itertools.count()
+        if not self.pending:
+            self.finished.set()
+
+    def claim(
+        self,
+        worker: str,
+        max_nodes: Optional[int] = None,
+        running: int = 0,
+        account: Optional[str] = None,
+    ) -> dict:
+        """Assign the longest pending scenario with at most `max_nodes` nodes to `worker`.
+
+        A worker without running scenarios gets the longest one, regardless
+        of its node count. Raises :class:`AccountInUse` if the orchestration
+        `account` is used by another worker.
+        """
+        if account is not None:
+            owner = self.accounts.setdefault(account.lower(), worker)
+            if owner != worker:
+                raise AccountInUse(
+                    f"The orchestration account {account} is used by the worker {owner}, "
+                    f"every worker needs its own account"
+                )
+
+        for entry in self.pending:
+            if max_nodes is None or running == 0 or entry.node_count <= max_nodes:
+                break
+        else:
+            return {"assignment": None, "pending": len(self.pending)}
+
+        self.pending.remove(entry)
+        assignment_id = str(next(self._assignment_ids))
+        self.assignments[assignment_id] = (worker, entry)
+        run_number = self._allocate_run_number(entry.name)
+        log.info("Scenario assigned", scenario=entry.name, worker=worker, run_number=run_number)
+        return {
+            "assignment": {
+                "id": assignment_id,
+                "scenario_file": scenario_file_for_transfer(entry.scenario_file),
+                "node_count": entry.node_count,
+                "expected_duration": entry.expected_duration,
+                "run_number": run_number,
+            },
+            "pending": len(self.pending),
+        }
+
+    def report(self, assignment_id: str, result: dict) -> None:
+        worker, entry = self.assignments.pop(assignment_id)
+        suite_result = SuiteResult(**result)
+        log.info(
+            "Scenario result received",
+            scenario=entry.name,
+            worker=worker,
+            exit_code=suite_result.exit_code,
+        )
+        self.results.append(suite_result)
+        if not self.pending and not self.assignments:
+            self.finished.set()
+
+    def abandon(self) -> None:
+        """Record the assigned and pending scenarios without a result as failed."""
+        lost = [entry for _, entry in self.assignments.values()]
+        for entry in lost + self.pending:
+            self.results.append(
+                SuiteResult(
+                    name=entry.name,
+                    scenario_file=str(entry.scenario_file),
+                    exit_code=10,
+                    duration=0.0,
+                    message="No result received from the workers",
+                )
+            )
+        self.assignments.clear()
+        self.pending.clear()
+        self.finished.set()
+
+    def status(self) -> dict:
+        return {
+            "pending": len(self.pending),
+            "running": {
+                assignment_id: {"worker": worker, "scenario": entry.name}
+                for assignment_id, (worker, entry) in self.assignments.items()
+            },
+            "finished": len(self.results),
+        }
+
+    def wsgi_app(self, environ, start_response):
+        """WSGI application of the coordinator protocol."""
+        method, path = environ["REQUEST_METHOD"], environ["PATH_INFO"]
+        try:
+            if method == "GET" and path == "/status":
+                response = self.status()
+            elif method == "POST" and path in ("/claim", "/result"):
+                length = int(environ.get("CONTENT_LENGTH") or 0)
+                body = json.loads(environ["wsgi.input"].read(length) or b"{}")
+                if path == "/claim":
+                    response = self.claim(
+                        body["worker"],
+                        body.get("max_nodes"),
+                        body.get("running", 0),
+                        body.get("account"),
+                    )
+                else:
+                    self.report(body["id"], body["result"])
+                    response = {}
+            else:
+                start_response(f"{HTTPStatus.NOT_FOUND.value} Not Found", [])
+                return [b""]
+        except AccountInUse as ex:
+            log.warning("Claim rejected", error=str(ex))
+            return self._json_response(
+                start_response, f"{HTTPStatus.CONFLICT.value} Conflict", {"error": str(ex)}
+            )
+        except (KeyError, TypeError, ValueError) as ex:
+            log.warning("Invalid request", path=path, error=repr(ex))
+            start_response(f"{HTTPStatus.BAD_REQUEST.value} Bad Request", [])
+            return [b""]
+
+        return self._json_response(start_response, f"{HTTPStatus.OK.value} OK", response)
+
+    @staticmethod
+    def _json_response(start_response, status: str, response: dict) -> List[bytes]:
+        data = json.dumps(response).encode()
+        start_response(
+            status, [("Content-Type", "application/json"), ("Content-Length", str(len(data)))]
+        )
+        return [data]
+
+    def serve(self, listen: Tuple[str, int]) -> WSGIServer:
+        """Start serving the coordinator protocol, returns the started server."""
+        server = WSGIServer(listen, self.wsgi_app, log=None)
+        server.start()
+        log.info("Coordinator listening", address=server.address)
+        return server
+
+
+class SuiteWorker:
+    """Claim scenarios from a coordinator, run them and report their results.
+
+    Up to `parallel` scenarios run at the same time, with at most
+    `max_nodes` nodes in total if it is given. `account` is the address of
+    the orchestration account, see :class:`SuiteCoordinator` for why it is sent.
+    """
+
+    def __init__(
+        self,
+        coordinator_url: str,
+        run_scenario: Callable[[SuiteEntry], None],
+        parallel: int = 1,
+        max_nodes: Optional[int] = None,
+        name: Optional[str] = None,
+        account: Optional[str] = None,
+        session: Optional[requests.Session] = None,
+        retry_interval: float = WORKER_RETRY_INTERVAL,
+    ) -> None:
+        self.coordinator_url = coordinator_url.rstrip("/")
+        self.run_scenario = run_scenario
+        self.parallel = parallel
+        self.max_nodes = max_nodes
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.account = account
+        self.session = session or requests.Session()
+        self.retry_interval = retry_interval
+        self.results: List[SuiteResult] = []
+        self.running: List[SuiteEntry] = []
+        self._claim_lock = Semaphore()
+
+    def _post(self, path: str, body: dict) -> dict:
+        response = self.session.post(
+            f"{self.coordinator_url}{path}", json=body, timeout=WORKER_REQUEST_TIMEOUT
+        )
+        if response.status_code == HTTPStatus.CONFLICT:
+            raise AccountInUse(response.json()["error"])
+        response.raise_for_status()
+        return response.json()
+
+    def _claim(self) -> Tuple[Optional[str], Optional[SuiteEntry], int]:
+        """Claim a scenario, returns the assignment id, its entry and the pending count.
+
+        The entry is added to the running scenarios before the next slot claims.
+        """
+        with self._claim_lock:
+            max_nodes = None
+            if self.max_nodes is not None:
+                max_nodes = self.max_nodes - sum(entry.node_count for entry in self.running)
+            response = self._post(
+                "/claim",
+                {
+                    "worker": self.name,
+                    "account": self.account,
+                    "max_nodes": max_nodes,
+                    "running": len(self.running),
+                },
+            )
+            assignment = response["assignment"]
+            if assignment is None:
+                return None, None, response["pending"]
+
+            entry = SuiteEntry(
+                scenario_file=Path(assignment["scenario_file"]).absolute(),
+                node_count=assignment["node_count"],
+                expected_duration=assignment["expected_duration"],
+                run_number=assignment["run_number"],
+            )
+            self.running.append(entry)
+            return assignment["id"], entry, response["pending"]
+
+    def _run_slot(self) -> None:
+        while True:
+            assignment_id, entry, pending = self._claim()
+            if entry is None:
+                if pending == 0:
+                    return
+                gevent.sleep(self.retry_interval)
+                continue
+
+            try:
+                result = run_suite_entry(self.run_scenario, entry)
+            finally:
+                self.running.remove(entry)
+            self.results.append(result)
+            self._post("/result", {"id": assignment_id, "result": asdict(result)})
+
+    def run(self) -> List[SuiteResult]:
+        """Work until the coordinator has no pending scenarios left."""
+        log.info("Worker started", worker=self.name, coordinator=self.coordinator_url)
+        slots = [gevent.spawn(self._run_slot) for _ in range(self.parallel)]
+        gevent.joinall(slots, raise_error=True)
+        return self.results
@@ -36,5 +36,15 @@ class UnknownTaskTypeError(ScenarioError):
     exit_code = 27
 
 
+class SynchronizationTimeout(ScenarioError):
+    exit_code = 28
+
+
+class AccountInUse(ScenarioError):
+    """Raised if a suite worker claims with an orchestration account used by another worker."""
+
+    exit_code = 11
+
+
 class ScenarioAssertionError(ScenarioError):
     exit_code = 30
@@ -32,3 +32,7 @@ class TokenFileMissing(TokenFileError):
 
 class ServiceConfigurationError(ConfigurationError):
     """There was a problem validating the services configuration setting."""
+
+
+class GeneratorConfigurationError(ConfigurationError):
+    """An error occurred while validating the topology or traffic setting of a scenario file."""
@@ -0,0 +1,228 @@
+"""Gas costs of the transactions of a scenario run, enabled with ``run --profile-gas``.
+
+At the end of a run, :class:`GasProfiler` scans the blocks mined since the
+setup started for the transactions of the orchestration account and of the
+nodes, see :mod:`scenario_player.utils.chain_scan`. The transactions are
+grouped by action, i.e. the contract function they call, and by account:
+
+  - ``gas_used``: total, mean and maximum gas used,
+  - ``gas_price_gwei``: mean effective gas price,
+  - ``cost_eth``: total cost,
+  - ``latency``: seconds from submitting the transaction until the timestamp
+    of its block.
+
+The submit times of the player's transactions are recorded when they are
+sent. The nodes send their transactions themselves, they are timed by when
+the transactions appeared in the pending transactions of the Ethereum node,
+if it supports a pending transaction filter. Only the pending transactions of
+the profiled accounts are recorded, not the whole mempool. :meth:`GasProfiler.write`
+writes the report to the ``gas`` directory of the scenario.
+"""
+import json
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Collection, Dict, List, Optional, Set
+
+import gevent
+import structlog
+from eth_typing import ChecksumAddress
+from eth_utils import encode_hex, function_abi_to_4byte_selector, to_checksum_address
+from raiden_contracts.contract_manager import ContractManager
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+
+from scenario_player.utils.chain_scan import ChainScanner, ScannedTransaction, hash_hex
+
+log = structlog.get_logger(__name__)
+
+GAS_DIRNAME = "gas"
+PENDING_POLL_INTERVAL = 1.0
+ACTION_DEPLOY = "deploy"
+ACTION_ETH_TRANSFER = "eth_transfer"
+
+GWEI = 10**9
+ETH = 10**18
+
+
+def function_selectors(contract_manager: ContractManager) -> Dict[bytes, str]:
+    """Return the names of the state changing functions of all contracts by selector."""
+    selectors = {}
+    for contract in contract_manager.contracts.values():
+        for abi in contract["abi"]:
+            if abi.get("type") != "function" or abi.get("stateMutability") in ("view", "pure"):
+                continue
+            selectors.setdefault(function_abi_to_4byte_selector(abi), abi["name"])
+    return selectors
+
+
+def action_of(transaction: ScannedTransaction, selectors: Dict[bytes, str]) -> str:
+    if transaction.to is None:
+        return ACTION_DEPLOY
+    if transaction.selector is None:
+        return ACTION_ETH_TRANSFER
+    return selectors.get(transaction.selector, encode_hex(transaction.selector))
+
+
+def _percentile(values: List[float], percent: int) -> float:
+    values = sorted(values)
+    return values[max(-(-percent * len(values) // 100), 1) - 1]
+
+
+def summarize(
+    transactions: List[ScannedTransaction], submitted: Dict[str, float]
+) -> Dict[str, Any]:
+    """Return the gas used, gas price, cost and latency of `transactions`."""
+    latencies = [
+        max(transaction.block_timestamp - submitted[transaction.hash], 0.0)
+        for transaction in transactions
+        if transaction.hash in submitted
+    ]
+    gas_used = [transaction.gas_used for transaction in transactions]
+    summary: Dict[str, Any] = {
+        "count": len(transactions),
+        "failed": sum(not transaction.success for transaction in transactions),
+        "gas_used": {
+            "total": sum(gas_used),
+            "mean": round(sum(gas_used) / len(gas_used)),
+            "max": max(gas_used),
+        },
+        "gas_price_gwei": round(
+            sum(transaction.effective_gas_price for transaction in transactions)
+            / len(transactions)
+            / GWEI,
+            3,
+        ),
+        "cost_eth": sum(transaction.cost for transaction in transactions) / ETH,
+    }
+    if latencies:
+        summary["latency"] = {
+            "timed": len(latencies),
+            "p50": round(_percentile(latencies, 50), 3),
+            "p90": round(_percentile(latencies, 90), 3),
+            "max": round(max(latencies), 3),
+        }
+    return summary
+
+
+class GasProfiler:
+    """Record the submit times of transactions and report the gas costs of a run."""
+
+    def __init__(self, web3: Web3, pending_poll_interval: float = PENDING_POLL_INTERVAL) -> None:
+        self.web3 = web3
+        self.scanner = ChainScanner(web3)
+        self.pending_poll_interval = pending_poll_interval
+        # Unix time at which each transaction was first seen, by hash
+        self.submitted: Dict[str, float] = {}
+        self.from_block: Optional[int] = None
+        self._accounts: Set[ChecksumAddress] = set()
+        self._selectors: Dict[bytes, str] = {}
+        self._poller: Optional[gevent.Greenlet] = None
+
+    def middleware(self, make_request: Callable, web3: Web3) -> Callable:
+        """Web3 middleware recording when the transactions of the player are sent."""
+        # pylint: disable=unused-argument
+
+        def record_sent_transactions(method, params):
+            response = make_request(method, params)
+            if method == "eth_sendRawTransaction" and "result" in response:
+                self.submitted.setdefault(hash_hex(response["result"]), time.time())
+            return response
+
+        return record_sent_transactions
+
+    def start(
+        self,
+        from_block: int,
+        contract_manager: ContractManager,
+        accounts: Collection[ChecksumAddress] = (),
+    ) -> None:
+        """Profile the transactions mined from `from_block` on.
+
+        The pending transactions of `accounts` are timed, see :meth:`_poll_pending`.
+        """
+        self.from_block = from_block
+        self._accounts = {to_checksum_address(address) for address in accounts}
+        self._selectors = function_selectors(contract_manager)
+        self.web3.middleware_onion.add(self.middleware, name="gas_profiler")
+        try:
+            pending_filter = self.web3.eth.filter("pending")
+        except Exception as ex:  # pylint: disable=broad-except
+            # Not supported by every Ethereum client
+            log.info("No pending transaction filter, nodes' transactions are not timed", ex=ex)
+        else:
+            self._poller = gevent.spawn(self._poll_pending, pending_filter)
+
+    def _poll_pending(self, pending_filter: Any) -> None:
+        while True:
+            try:
+                self._record_pending(pending_filter.get_new_entries())
+            except Exception as ex:  # pylint: disable=broad-except
+                log.debug("Polling pending transactions failed", ex=str(ex))
+            gevent.sleep(self.pending_poll_interval)
+
+    def _record_pending(self, tx_hashes: List[Any]) -> None:
+        """Record the time the pending transactions of the profiled accounts were seen.
+
+        The filter returns the hashes of every pending transaction, the others
+        are looked up once and not recorded.
+        """
+        seen = time.time()
+        for tx_hash in tx_hashes:
+            tx_hash = hash_hex(tx_hash)
+            if tx_hash in self.submitted:
+                continue
+            try:
+                transaction = self.web3.eth.get_transaction(tx_hash)
+            except TransactionNotFound:
+                continue
+            if to_checksum_address(transaction["from"]) in self._accounts:
+                self.submitted[tx_hash] = seen
+
+    def stop(self) -> None:
+        if self._poller is not None:
+            self._poller.kill()
+            self._poller = None
+        if self.from_block is not None:
+            self.web3.middleware_onion.remove("gas_profiler")
+
+    def report(self, accounts: Dict[ChecksumAddress, str]) -> Dict[str, Any]:
+        """Return the gas costs of the transactions of `accounts`, by action and by account.
+
+        `accounts` maps the addresses to the names of the accounts in the report.
+        """
+        assert self.from_block is not None, "Profiler not started"
+        accounts = {to_checksum_address(address): name for address, name in accounts.items()}
+        to_block = self.web3.eth.block_number
+        transactions = self.scanner.transactions(self.from_block, to_block, accounts)
+        by_action: Dict[str, List[ScannedTransaction]] = defaultdict(list)
+        by_account: Dict[str, List[ScannedTransaction]] = defaultdict(list)
+        for transaction in transactions:
+            by_action[action_of(transaction, self._selectors)].append(transaction)
+            by_account[accounts[transaction.sender]].append(transaction)
+        return {
+            "blocks": [self.from_block, to_block],
+            "total": summarize(transactions, self.submitted) if transactions else {"count": 0},
+            "actions": {
+                action: summarize(action_transactions, self.submitted)
+                for action, action_transactions in sorted(by_action.items())
+            },
+            "accounts": {
+                account: summarize(account_transactions, self.submitted)
+                for account, account_transactions in sorted(by_account.items())
+            },
+        }
+
+    def write(self, directory: Path, prefix: str, accounts: Dict[ChecksumAddress, str]) -> Path:
+        """Write the report to `directory`, the file name starts with `prefix`."""
+        report = self.report(accounts)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory.joinpath(f"{prefix}.gas.json")
+        path.write_text(json.dumps(report, indent=2))
+        log.info(
+            "Gas report written",
+            file=str(path),
+            transactions=report["total"]["count"],
+            gas_used=report["total"].get("gas_used", {}).get("total", 0),
+        )
+        return path
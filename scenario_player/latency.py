@@ -0,0 +1,284 @@
+"""End-to-end latency of the payments of a scenario, enabled with ``run --trace-payments``.
+
+The duration of a ``transfer`` task is the duration of the initiator's
+payment request. The tracer measures when the nodes registered the payment:
+:class:`TransferTask` registers every payment it starts, and the tracer
+polls the payment events of the initiators and targets with a cursor, only
+fetching the events since its last poll. Payments are matched by their
+identifier, so only payments with unique identifiers are traced, which the
+generated identifiers are.
+
+The latencies are collected in histograms:
+
+  - ``target``: from the payment request until the target received the payment,
+  - ``initiator``: from the payment request until the initiator's payment succeeded,
+  - ``mean_hop_estimate``: the ``target`` latency divided by the hops of the
+    payment's route, an estimate, not a measured latency of the hops.
+
+The ``log_time`` of the events has a resolution of whole seconds, so the
+events are timed by when a poll first saw them instead. An event seen by a
+poll happened after the previous poll of the node was sent, the report
+records the largest such gap as ``max_error_ms``: every latency is at most
+that much too long. It is the poll interval plus the duration of a poll,
+the histograms have no buckets below the poll interval.
+
+The REST API lists only the payment events of initiators and targets, so
+the hops of a mediated payment aren't timed one by one. :meth:`PaymentTracer.write`
+writes the report to the ``latency`` directory of the scenario.
+"""
+import bisect
+import json
+import math
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import gevent
+import structlog
+from gevent.pool import Pool
+from raiden_common.utils.formatting import to_checksum_address
+from requests import RequestException  # type: ignore
+
+if TYPE_CHECKING:
+    from scenario_player.runner import ScenarioRunner
+
+log = structlog.get_logger(__name__)
+
+LATENCY_DIRNAME = "latency"
+POLL_INTERVAL = 0.5
+POLL_CONCURRENCY = 32
+POLL_REQUEST_TIMEOUT = 30
+# Events fetched per request, the cursor advances by the events received
+EVENTS_PAGE_SIZE = 500
+# Seconds to wait for the pending payments after the scenario
+FINISH_TIMEOUT = 30
+# Upper bounds of the histogram buckets in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1_000, 2_500, 5_000, 10_000, 30_000, 60_000)
+PERCENTILES = (50, 90, 99)
+
+EVENT_SENT_SUCCESS = "EventPaymentSentSuccess"
+EVENT_SENT_FAILED = "EventPaymentSentFailed"
+EVENT_RECEIVED_SUCCESS = "EventPaymentReceivedSuccess"
+
+
+class Histogram:
+    """Latencies in seconds, counted in buckets with exact percentiles."""
+
+    def __init__(self, buckets_ms: Sequence[int] = LATENCY_BUCKETS_MS) -> None:
+        self.buckets_ms = tuple(buckets_ms)
+        self.counts = [0] * (len(self.buckets_ms) + 1)
+        self._values: List[float] = []
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def record(self, latency: float) -> None:
+        latency = max(latency, 0.0)
+        self.counts[bisect.bisect_left(self.buckets_ms, latency * 1000)] += 1
+        bisect.insort(self._values, latency)
+
+    def percentile(self, percent: float) -> float:
+        """Return the latency below which `percent` of the latencies are (nearest rank)."""
+        if not self._values:
+            return 0.0
+        rank = max(math.ceil(percent / 100 * len(self._values)), 1)
+        return self._values[rank - 1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the summary and the bucket counts, in milliseconds."""
+        if not self._values:
+            return {"count": 0}
+        bucket_labels = [f"<={bound}ms" for bound in self.buckets_ms] + ["+inf"]
+        return {
+            "count": len(self._values),
+            "min_ms": round(self._values[0] * 1000, 1),
+            "mean_ms": round(sum(self._values) / len(self._values) * 1000, 1),
+            **{
+                f"p{percent}_ms": round(self.percentile(percent) * 1000, 1)
+                for percent in PERCENTILES
+            },
+            "max_ms": round(self._values[-1] * 1000, 1),
+            "buckets": dict(zip(bucket_labels, self.counts)),
+        }
+
+
+@dataclass
+class TracedPayment:
+    """A payment started by a ``transfer`` task, `started` is a unix timestamp."""
+
+    initiator: int
+    target: int
+    started: float
+    initiator_done: bool = False
+    target_done: bool = False
+    hops: Optional[int] = None
+    target_latency: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.initiator_done and self.target_done
+
+
+class PaymentTracer:
+    """Poll the payment events of the nodes and collect the latencies of the traced payments."""
+
+    def __init__(
+        self,
+        runner: "ScenarioRunner",
+        poll_interval: float = POLL_INTERVAL,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._runner = runner
+        self.poll_interval = poll_interval
+        self._clock = clock
+        self.pending: Dict[int, TracedPayment] = {}
+        # Latencies below the poll interval can't be told apart
+        buckets_ms = [bound for bound in LATENCY_BUCKETS_MS if bound >= poll_interval * 1000]
+        self.histograms = {
+            name: Histogram(buckets_ms) for name in ("target", "initiator", "mean_hop_estimate")
+        }
+        self.failed = 0
+        self.untraced = 0
+        # Largest time between an event and the poll which saw it
+        self.max_error = 0.0
+        # Events of every node already seen
+        self._cursors: Dict[int, int] = {}
+        # When the last complete fetch of the events of every node was sent
+        self._fetched: Dict[int, float] = {}
+        self._traced: Set[int] = set()
+        self._poller: Optional[gevent.Greenlet] = None
+
+    def expect(self, identifier: int, initiator: int, target: int) -> None:
+        """Trace the payment `identifier`, which is being requested now."""
+        if identifier in self._traced:
+            # Identifiers given in the scenario may be reused
+            self.untraced += 1
+            return
+        self._traced.add(identifier)
+        self.pending[identifier] = TracedPayment(initiator, target, started=self._clock())
+        if self._poller is None:
+            self._poller = gevent.spawn(self._poll_forever)
+
+    def _poll_forever(self) -> None:
+        while True:
+            gevent.sleep(self.poll_interval)
+            try:
+                self.poll()
+            except Exception as ex:  # pylint: disable=broad-except
+                # Tracing must go on after e.g. a restart of a node
+                log.debug("Polling payment events failed", ex=str(ex))
+
+    def poll(self) -> None:
+        """Fetch the new payment events of the nodes with pending payments."""
+        nodes = sorted(
+            {payment.initiator for payment in self.pending.values() if not payment.initiator_done}
+            | {payment.target for payment in self.pending.values() if not payment.target_done}
+        )
+        pool = Pool(POLL_CONCURRENCY)
+        for node, (events, seen, after) in zip(nodes, pool.map(self._fetch_events, nodes)):
+            for event in events:
+                self._process_event(node, event, seen, after)
+
+    def _fetch_events(self, node: int) -> Tuple[List[Dict[str, Any]], float, float]:
+        """Return the new events of `node`, when they were seen and after when they happened."""
+        sent = self._clock()
+        after = self._fetched.get(node, 0.0)
+        token_address = to_checksum_address(self._runner.token.address)
+        url = (
+            f"{self._runner.protocol}://{self._runner.get_node_baseurl(node)}"
+            f"/api/v1/payments/{token_address}"
+        )
+        events: List[Dict[str, Any]] = []
+        while True:
+            params = {"offset": self._cursors.get(node, 0), "limit": EVENTS_PAGE_SIZE}
+            try:
+                response = self._runner.session.get(
+                    url, params=params, timeout=POLL_REQUEST_TIMEOUT
+                )
+                response.raise_for_status()
+                page = response.json()
+            except (RequestException, ValueError) as ex:
+                log.debug("Fetching payment events failed", node=node, ex=str(ex))
+                return events, self._clock(), after
+            events.extend(page)
+            self._cursors[node] = params["offset"] + len(page)
+            if len(page) < EVENTS_PAGE_SIZE:
+                # The events not fetched yet happened after this fetch was sent
+                self._fetched[node] = sent
+                return events, self._clock(), after
+
+    def _record(self, name: str, payment: TracedPayment, seen: float, after: float) -> float:
+        latency = seen - payment.started
+        self.max_error = max(self.max_error, seen - max(after, payment.started))
+        self.histograms[name].record(latency)
+        return latency
+
+    def _process_event(self, node: int, event: Dict[str, Any], seen: float, after: float) -> None:
+        try:
+            payment = self.pending.get(int(event.get("identifier", -1)))
+        except ValueError:
+            return
+        if payment is None:
+            return
+        identifier = int(event["identifier"])
+        kind = event.get("event")
+        if kind == EVENT_SENT_FAILED and node == payment.initiator:
+            self.failed += 1
+            del self.pending[identifier]
+            return
+        if kind == EVENT_RECEIVED_SUCCESS and node == payment.target:
+            payment.target_done = True
+            payment.target_latency = self._record("target", payment, seen, after)
+        elif kind == EVENT_SENT_SUCCESS and node == payment.initiator:
+            payment.initiator_done = True
+            if event.get("route"):
+                payment.hops = len(event["route"]) - 1
+            self._record("initiator", payment, seen, after)
+        if payment.done:
+            if payment.hops and payment.target_latency is not None:
+                self.histograms["mean_hop_estimate"].record(payment.target_latency / payment.hops)
+            del self.pending[identifier]
+
+    def finish(self, timeout: float = FINISH_TIMEOUT) -> None:
+        """Wait up to `timeout` seconds for the pending payments, then stop polling."""
+        if self._poller is None:
+            return
+        deadline = time.monotonic() + timeout
+        while self.pending and time.monotonic() < deadline:
+            gevent.sleep(self.poll_interval)
+        self.poll()
+        self.stop()
+        log.info("Payment latencies", pending=len(self.pending), **self.summary())
+
+    def stop(self) -> None:
+        if self._poller is not None:
+            self._poller.kill()
+            self._poller = None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            f"{name}_p{percent}_ms": round(histogram.percentile(percent) * 1000, 1)
+            for name, histogram in self.histograms.items()
+            if histogram
+            for percent in PERCENTILES
+        }
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "traced": len(self._traced),
+            "failed": self.failed,
+            "pending": len(self.pending),
+            "untraced": self.untraced,
+            "poll_interval_ms": round(self.poll_interval * 1000, 1),
+            "max_error_ms": round(self.max_error * 1000, 1),
+            "histograms": {name: hist.to_dict() for name, hist in self.histograms.items()},
+        }
+
+    def write(self, directory: Path, prefix: str) -> Path:
+        """Write the report to `directory`, the file name starts with `prefix`."""
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory.joinpath(f"{prefix}.latency.json")
+        path.write_text(json.dumps(self.report(), indent=2))
+        log.info("Payment latency report written", file=str(path))
+        return path
@@ -3,6 +3,7 @@ import json
 import os
 import sys
 import tempfile
+import time
 import traceback
 from contextlib import AbstractContextManager, contextmanager, nullcontext
 from datetime import datetime
@@ -10,61 +11,37 @@ from io import StringIO
 from itertools import cycle, islice
 from pathlib import Path
 from tempfile import mkdtemp
-from typing import IO, List, Sequence
+from typing import IO, TYPE_CHECKING, Any, AnyStr, Callable, Dict, List, Optional, Sequence
 
 import click
 import gevent
 import structlog
-import yaml
 from click.utils import LazyFile
-from eth_typing import URI, HexStr
-from eth_utils import to_canonical_address, to_checksum_address
 from gevent.event import Event
-from raiden_common.accounts import Account
-from raiden_common.constants import Environment, EthClient
-from raiden_common.log_config import _FIRST_PARTY_PACKAGES, configure_logging
-from raiden_common.network.rpc.client import make_sane_poa_middleware
-from raiden_common.network.rpc.middleware import faster_gas_price_strategy
-from raiden_common.settings import DEFAULT_MATRIX_KNOWN_SERVERS, RAIDEN_CONTRACT_VERSION
-from raiden_common.utils.cli import AddressType, EnumChoiceType, get_matrix_servers, option
-from raiden_common.utils.typing import (
-    TYPE_CHECKING,
-    Address,
-    Any,
-    AnyStr,
-    BlockTimeout,
-    Dict,
-    FeeAmount,
-    Optional,
-    TokenAddress,
-    TokenAmount,
-)
-from raiden_contracts.constants import CHAINNAME_TO_ID
-from raiden_contracts.contract_manager import (
-    ContractManager,
-    DeployedContract,
-    DeployedContracts,
-    contracts_precompiled_path,
-)
-from urwid import ExitMainLoop
-from web3 import HTTPProvider, Web3
-from web3.middleware import simple_cache_middleware
 
-import scenario_player.utils
-from scenario_player import __version__, tasks
+from scenario_player import __version__
 from scenario_player.exceptions import ScenarioAssertionError, ScenarioError
 from scenario_player.exceptions.cli import WrongPassword
-from scenario_player.runner import ScenarioRunner
-from scenario_player.tasks.base import collect_tasks
-from scenario_player.ui import ScenarioUI, attach_urwid_logbuffer
-from scenario_player.utils import DummyStream
-from scenario_player.utils.configuration.settings import EnvironmentConfig
-from scenario_player.utils.legacy import MutuallyExclusiveOption
-from scenario_player.utils.reclaim import ReclamationCandidate, get_reclamation_candidates
-from scenario_player.utils.version import get_complete_spec
+from scenario_player.suite import DEFAULT_SUITE_PARALLELISM
+from scenario_player.utils.cli import AddressType, DummyStream, MutuallyExclusiveOption
+from scenario_player.utils.log_config import (
+    LOG_MODE_DEBUG,
+    LOG_MODE_LEAN,
+    LOG_MODES,
+    enable_lean_logging,
+)
 
+# Only the modules needed by the invoked subcommand are imported, which keeps
+# `--help`, `version` and usage errors fast. Check with `python -X importtime`
+# before adding module level imports, see `tests/unittests/cli/test_imports.py`.
 if TYPE_CHECKING:
+    from raiden_common.accounts import Account
     from raiden_common.tests.utils.smoketest import RaidenTestSetup
+    from raiden_common.utils.typing import TokenAddress
+    from raiden_contracts.contract_manager import DeployedContracts
+
+    from scenario_player.suite import SuiteEntry, SuiteResult
+    from scenario_player.utils.configuration.settings import EnvironmentConfig
 
 log = structlog.get_logger(__name__)
 DEFAULT_ENV_FILE = Path(__file__).parent / "environment" / "development.json"
@@ -83,7 +60,9 @@ def construct_log_file_name(sub_command, data_path, scenario_fpath: Path = None)
     return str(directory.joinpath(file_name))
 
 
-def configure_logging_for_subcommand(log_file_name):
+def configure_logging_for_subcommand(log_file_name, log_mode=LOG_MODE_DEBUG):
+    from raiden_common.log_config import _FIRST_PARTY_PACKAGES, configure_logging
+
     Path(log_file_name).parent.mkdir(exist_ok=True, parents=True)
     click.secho(f"Writing log to {log_file_name}", fg="yellow")
     configure_logging(
@@ -92,9 +71,14 @@ def configure_logging_for_subcommand(log_file_name):
         _first_party_packages=_FIRST_PARTY_PACKAGES | frozenset(["scenario_player"]),
         _debug_log_file_additional_level_filters={"scenario_player": "DEBUG"},
     )
+    if log_mode == LOG_MODE_LEAN:
+        enable_lean_logging(log_file_name)
 
 
 def load_account_obj(keystore_file, password):
+    from eth_utils import to_checksum_address
+    from raiden_common.accounts import Account
+
     with open(keystore_file, "r") as keystore:
         account = Account(json.load(keystore), password, keystore_file)
         assert account.address
@@ -118,6 +102,24 @@ def get_account(keystore_file, password):
     return account
 
 
+def log_mode_option(func):
+    """Decorator for adding '--log-mode' to the subcommands running scenarios."""
+
+    @click.option(
+        "--log-mode",
+        default=LOG_MODE_DEBUG,
+        show_default=True,
+        type=click.Choice(LOG_MODES),
+        help="`lean` samples repetitive events, truncates large payloads and writes the "
+        "log file in the background, for scenarios with many transfers.",
+    )
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
 def key_password_options(func):
     """Decorator for adding '--keystore-file', '--password/--password-file' to subcommands."""
 
@@ -200,6 +202,20 @@ def main():
     default=sys.stdout.isatty(),
     help="En-/disable console UI. [default: auto-detect]",
 )
+@click.option(
+    "--ui-log-lines",
+    "log_buffer_lines",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Number of log lines kept in the console UI, all lines are written to the log file.",
+)
+@click.option(
+    "--progress-stream",
+    default=None,
+    metavar="PATH|FD",
+    help="Write task progress as JSON lines to the given file, file descriptor number or "
+    "`-` for stdout.",
+)
 @click.option(
     "--delete-snapshots",
     is_flag=True,
@@ -210,6 +226,25 @@ def main():
     default=None,
     help="The client executable to use [default set by `env` file]",
 )
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Profile the scenario player and record the stalls of its event loop, the "
+    "flamegraph input is written to the `profile` directory of the scenario.",
+)
+@click.option(
+    "--trace-payments",
+    is_flag=True,
+    help="Measure the latencies of the payments until their targets received them, the "
+    "histograms are written to the `latency` directory of the scenario.",
+)
+@click.option(
+    "--profile-gas",
+    is_flag=True,
+    help="Report the gas used, gas prices and confirmation latencies of the transactions "
+    "of the player and the nodes to the `gas` directory of the scenario.",
+)
+@log_mode_option
 @environment_option
 @key_password_options
 @data_path_option
@@ -220,10 +255,16 @@ def run(
     keystore_file: str,
     scenario_file: LazyFile,
     enable_ui: bool,
+    log_buffer_lines: Optional[int],
+    progress_stream: Optional[str],
     password_file: str,
-    environment: EnvironmentConfig,
+    environment: "EnvironmentConfig",
     delete_snapshots: bool,
     raiden_client: Optional[str],
+    log_mode: str,
+    profile: bool,
+    trace_payments: bool,
+    profile_gas: bool,
 ):
     """Execute a scenario as defined in scenario definition file.
     click entrypoint, this dispatches to `run_`.
@@ -231,7 +272,7 @@ def run(
     data_path_path = Path(data_path)
     scenario_file_path = Path(scenario_file.name).absolute()
     log_file_name = construct_log_file_name("run", data_path_path, scenario_file_path)
-    configure_logging_for_subcommand(log_file_name)
+    configure_logging_for_subcommand(log_file_name, log_mode)
     run_(
         data_path=data_path_path,
         auth=auth,
@@ -239,20 +280,32 @@ def run(
         keystore_file=keystore_file,
         scenario_file=scenario_file_path,
         enable_ui=enable_ui,
+        log_buffer_lines=log_buffer_lines,
+        progress_stream=progress_stream,
         password_file=password_file,
         log_file_name=log_file_name,
         environment=environment,
         delete_snapshots=delete_snapshots,
         raiden_client=raiden_client,
+        profile=profile,
+        trace_payments=trace_payments,
+        profile_gas=profile_gas,
     )
 
 
-def _load_environment(environment_file: IO) -> EnvironmentConfig:
+def _load_environment(environment_file: IO) -> "EnvironmentConfig":
     """Load the environment JSON file and process matrix server list
 
     Nodes can be assigned to fixed matrix servers. To allow this, we must
     download the list of matrix severs.
     """
+    from eth_typing import URI
+    from raiden_common.constants import Environment
+    from raiden_common.settings import DEFAULT_MATRIX_KNOWN_SERVERS
+    from raiden_common.utils.cli import get_matrix_servers
+
+    from scenario_player.utils.configuration.settings import EnvironmentConfig
+
     environment = json.load(environment_file)
     assert isinstance(environment, dict)
 
@@ -280,10 +333,15 @@ def run_(
     enable_ui: bool,
     password_file: str,
     log_file_name: str,
-    environment: EnvironmentConfig,
+    environment: "EnvironmentConfig",
     delete_snapshots: bool,
     raiden_client: Optional[str],
     smoketest_deployment_data=None,
+    log_buffer_lines: Optional[int] = None,
+    progress_stream: Optional[str] = None,
+    profile: bool = False,
+    trace_payments: bool = False,
+    profile_gas: bool = False,
 ) -> None:
     """Execute a scenario as defined in scenario definition file.
     (Shared code for `run` and `smoketest` command).
@@ -303,22 +361,51 @@ def run_(
         There was an assertion error while executing the scenario. This points
         to an error in a `raiden` component (the client, services or contracts).
     """
+    from scenario_player import tasks
+    from scenario_player.profiler import PROFILE_DIRNAME, Profiler
+    from scenario_player.progress import ProgressStream
+    from scenario_player.runner import ScenarioRunner
+    from scenario_player.tasks.base import collect_tasks
+    from scenario_player.ui import DEFAULT_LOG_BUFFER_LINES, attach_urwid_logbuffer
+    from scenario_player.utils.version import get_complete_spec
+
     log.info("Scenario Player version:", version_info=get_complete_spec())
 
-    password = get_password(password, password_file)
-    account = get_account(keystore_file, password)
+    profiler: Optional[Profiler] = None
+    if profile:
+        # Started first to include the key derivation and the scenario parsing
+        profiler = Profiler()
+        profiler.start()
+    profile_prefix = "startup"
+
+    def write_profile() -> None:
+        if profiler is not None:
+            profiler.stop()
+            profiler.write(
+                data_path.joinpath("scenarios", scenario_file.stem, PROFILE_DIRNAME),
+                profile_prefix,
+            )
+
+    try:
+        password = get_password(password, password_file)
+        account = get_account(keystore_file, password)
 
-    log_buffer = None
-    if enable_ui:
-        log_buffer = attach_urwid_logbuffer()
+        log_buffer = None
+        if enable_ui:
+            log_buffer = attach_urwid_logbuffer(log_buffer_lines or DEFAULT_LOG_BUFFER_LINES)
 
-    # Dynamically import valid Task classes from scenario_player.tasks package.
-    collect_tasks(tasks)
+        # Dynamically import valid Task classes from scenario_player.tasks package.
+        collect_tasks(tasks)
+    except BaseException:
+        # The run's `finally` below isn't reached, keep the profile of the failed startup
+        write_profile()
+        raise
 
     # Start our Services
     report: Dict[str, str] = {}
     success = Event()
     success.clear()
+    progress: Optional["ProgressStream"] = None
     try:
         # We need to fix the log stream early in case the UI is active
         scenario_runner = ScenarioRunner(
@@ -331,7 +418,13 @@ def run_(
             smoketest_deployment_data=smoketest_deployment_data,
             delete_snapshots=delete_snapshots,
             raiden_client=raiden_client,
+            trace_payments=trace_payments,
+            profile_gas=profile_gas,
         )
+        profile_prefix = f"run-{scenario_runner.run_number:03d}"
+        if progress_stream is not None:
+            progress = ProgressStream.open(progress_stream)
+            scenario_runner.task_state_callbacks.append(progress.task_state_changed)
         if enable_ui:
             ui: AbstractContextManager = ScenarioUIManager(
                 scenario_runner, log_buffer, log_file_name, success
@@ -381,10 +474,16 @@ def run_(
         report.update(dict(subject=f"Scenario successful {scenario_file.name}", message="Success"))
         log.info("Scenario player unwind complete")
         exit(exit_code)
+    finally:
+        if progress is not None:
+            progress.close()
+        write_profile()
 
 
 class ScenarioUIManager(AbstractContextManager):
     def __init__(self, runner, log_buffer, log_file_name, success):
+        from scenario_player.ui import ScenarioUI
+
         self.ui = ScenarioUI(runner, log_buffer, log_file_name)
         self.success = success
 
@@ -393,6 +492,8 @@ class ScenarioUIManager(AbstractContextManager):
         return self.success
 
     def __exit__(self, exc_type, value, traceback):
+        from urwid import ExitMainLoop
+
         if exc_type is not None:
             # This will cause some exceptions to be in the log twice, but
             # that's better than not seeing the exception in the UI at all.
@@ -408,6 +509,393 @@ class ScenarioUIManager(AbstractContextManager):
                 self.ui_greenlet.join()
 
 
+def suite_options(func):
+    """Decorator for adding the options shared by the suite subcommands."""
+
+    @click.option("--auth", default="")
+    @click.option(
+        "--parallel",
+        default=DEFAULT_SUITE_PARALLELISM,
+        show_default=True,
+        type=click.IntRange(min=1),
+        help="Maximum number of scenarios running at the same time.",
+    )
+    @click.option(
+        "--max-nodes",
+        default=None,
+        type=click.IntRange(min=1),
+        help="Maximum number of nodes of the scenarios running at the same time.",
+    )
+    @click.option(
+        "--raiden-client",
+        default=None,
+        help="The client executable to use [default set by `env` file]",
+    )
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def report_option(func):
+    """Decorator for adding '--report' to the suite subcommands."""
+
+    @click.option(
+        "--report",
+        "report_file",
+        default=None,
+        type=click.Path(dir_okay=False, writable=True),
+        help="Write the results of the suite as JSON to the given file.",
+    )
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def _load_suite_entries(
+    scenarios: Sequence[str], data_path: Path, environment: "EnvironmentConfig"
+) -> List["SuiteEntry"]:
+    from scenario_player.definition import ScenarioDefinition
+    from scenario_player.suite import (
+        SUITE_DURATIONS_FILENAME,
+        SuiteEntry,
+        collect_scenario_files,
+        load_durations,
+    )
+
+    try:
+        scenario_files = collect_scenario_files(scenarios)
+    except FileNotFoundError as ex:
+        raise click.BadParameter(str(ex), param_hint="SCENARIOS")
+
+    durations = load_durations(data_path.joinpath(SUITE_DURATIONS_FILENAME))
+    entries = []
+    for scenario_file in scenario_files:
+        definition = ScenarioDefinition(scenario_file, data_path, environment)
+        entries.append(
+            SuiteEntry(scenario_file, definition.nodes.count, durations.get(definition.name))
+        )
+    return entries
+
+
+def _make_suite_scenario_runner(
+    account: "Account",
+    auth: str,
+    data_path: Path,
+    environment: "EnvironmentConfig",
+    raiden_client: Optional[str],
+) -> Callable[["SuiteEntry"], None]:
+    """Return a function running the scenario of a suite entry, raising if it failed."""
+    from requests import Session
+    from web3 import HTTPProvider, Web3
+
+    from scenario_player import tasks
+    from scenario_player.runner import ScenarioRunner, make_orchestration_client
+    from scenario_player.tasks.base import collect_tasks
+
+    collect_tasks(tasks)
+
+    # All runners send their transactions with this client, it serializes
+    # the nonces of the orchestration account.
+    session = Session()
+    if auth:
+        session.auth = tuple(auth.split(":"))
+    web3 = Web3(HTTPProvider(environment.eth_rpc_endpoints[0], session=session))
+    client = make_orchestration_client(account, web3)
+
+    def run_scenario(entry: "SuiteEntry") -> None:
+        scenario_runner = ScenarioRunner(
+            account=account,
+            auth=auth,
+            data_path=data_path,
+            scenario_file=entry.scenario_file,
+            environment=environment,
+            success=Event(),
+            raiden_client=raiden_client,
+            client=client,
+            run_number=entry.run_number,
+        )
+        scenario_runner.run_scenario()
+
+    return run_scenario
+
+
+def _finish_suite(
+    results: List["SuiteResult"], duration: float, data_path: Path, report_file: Optional[str]
+) -> None:
+    """Store the durations of the scenarios, report the results and exit."""
+    from scenario_player.suite import (
+        SUITE_DURATIONS_FILENAME,
+        format_suite_report,
+        save_durations,
+        suite_exit_code,
+        write_suite_report,
+    )
+
+    save_durations(data_path.joinpath(SUITE_DURATIONS_FILENAME), results)
+    if report_file:
+        write_suite_report(Path(report_file), results, duration)
+    exit_code = suite_exit_code(results)
+    log.info("Suite finished", exit_code=exit_code, duration=duration)
+    click.secho(format_suite_report(results, duration), fg="green" if exit_code == 0 else "red")
+    exit(exit_code)
+
+
+@main.command(name="run-suite")
+@click.argument("scenarios", nargs=-1, required=True)
+@suite_options
+@report_option
+@log_mode_option
+@environment_option
+@key_password_options
+@data_path_option
+def run_suite(
+    scenarios: Sequence[str],
+    data_path: str,
+    auth: str,
+    password: Optional[str],
+    password_file: Optional[str],
+    keystore_file: str,
+    parallel: int,
+    max_nodes: Optional[int],
+    report_file: Optional[str],
+    environment: "EnvironmentConfig",
+    raiden_client: Optional[str],
+    log_mode: str,
+):
+    """Execute the scenarios of a suite concurrently.
+
+    SCENARIOS are scenario files, directories or globs, e.g.
+    `scenarios/ci/sp1 scenarios/ci/sp2`. The scenarios with the longest
+    previous runs are started first, all of them share the orchestration
+    account. Exits with the exit code of the first failed scenario.
+    """
+    from scenario_player.suite import run_suite as run_suite_entries
+    from scenario_player.utils.version import get_complete_spec
+
+    data_path_path = Path(data_path)
+    configure_logging_for_subcommand(
+        construct_log_file_name("run-suite", data_path_path), log_mode
+    )
+    log.info("Scenario Player version:", version_info=get_complete_spec())
+
+    entries = _load_suite_entries(scenarios, data_path_path, environment)
+    account = get_account(keystore_file, get_password(password, password_file))
+    run_scenario = _make_suite_scenario_runner(
+        account, auth, data_path_path, environment, raiden_client
+    )
+
+    started = time.monotonic()
+    results = run_suite_entries(entries, run_scenario, parallel=parallel, max_nodes=max_nodes)
+    _finish_suite(results, time.monotonic() - started, data_path_path, report_file)
+
+
+@main.command(name="suite-coordinator")
+@click.argument("scenarios", nargs=-1, required=True)
+@click.option(
+    "--listen",
+    default="127.0.0.1:8700",
+    show_default=True,
+    help="Address the workers connect to, `host:port`.",
+)
+@click.option(
+    "--timeout",
+    default=None,
+    type=click.FloatRange(min=0),
+    help="Seconds to wait for the results of the workers, scenarios without a result "
+    "count as failed.",
+)
+@report_option
+@environment_option
+@data_path_option
+def suite_coordinator(
+    scenarios: Sequence[str],
+    listen: str,
+    timeout: Optional[float],
+    report_file: Optional[str],
+    environment: "EnvironmentConfig",
+    data_path: str,
+):
+    """Distribute the scenarios of a suite to `suite-worker`s.
+
+    The coordinator allocates the run numbers of all scenario runs, so that
+    the workers never reuse node keys, even if they share the same seed.
+    Exits like `run-suite` once all results were received.
+    """
+    from scenario_player.distributed import SuiteCoordinator
+    from scenario_player.utils.allocation import allocate_run_number
+
+    data_path_path = Path(data_path)
+    configure_logging_for_subcommand(construct_log_file_name("suite-coordinator", data_path_path))
+
+    host, _, port = listen.rpartition(":")
+    if not host or not port.isdigit():
+        raise click.BadParameter("Must be given as `host:port`", param_hint="--listen")
+
+    def scenario_run_number(scenario_name: str) -> int:
+        scenario_dir = data_path_path.joinpath("scenarios", scenario_name)
+        scenario_dir.mkdir(parents=True, exist_ok=True)
+        return allocate_run_number(scenario_dir)
+
+    entries = _load_suite_entries(scenarios, data_path_path, environment)
+    coordinator = SuiteCoordinator(entries, scenario_run_number)
+    server = coordinator.serve((host, int(port)))
+    click.secho(f"Coordinating {len(entries)} scenarios on {listen}", fg="yellow")
+
+    started = time.monotonic()
+    if not coordinator.finished.wait(timeout):
+        log.error("Timeout waiting for the workers", status=coordinator.status())
+        coordinator.abandon()
+    server.stop()
+    _finish_suite(coordinator.results, time.monotonic() - started, data_path_path, report_file)
+
+
+@main.command(name="suite-worker")
+@click.argument("coordinator-url")
+@suite_options
+@log_mode_option
+@environment_option
+@key_password_options
+@data_path_option
+def suite_worker(
+    coordinator_url: str,
+    data_path: str,
+    auth: str,
+    password: Optional[str],
+    password_file: Optional[str],
+    keystore_file: str,
+    parallel: int,
+    max_nodes: Optional[int],
+    environment: "EnvironmentConfig",
+    raiden_client: Optional[str],
+    log_mode: str,
+):
+    """Run scenarios of the `suite-coordinator` at COORDINATOR_URL until none are left.
+
+    The scenario files are read relative to the working directory, run
+    the workers in a checkout of the same scenarios as the coordinator.
+    Every worker needs its own orchestration account, the coordinator
+    rejects a worker using the account of another one.
+    """
+    from scenario_player.distributed import SuiteWorker
+    from scenario_player.exceptions import AccountInUse
+    from scenario_player.utils.version import get_complete_spec
+
+    data_path_path = Path(data_path)
+    configure_logging_for_subcommand(
+        construct_log_file_name("suite-worker", data_path_path), log_mode
+    )
+    log.info("Scenario Player version:", version_info=get_complete_spec())
+
+    account = get_account(keystore_file, get_password(password, password_file))
+    run_scenario = _make_suite_scenario_runner(
+        account, auth, data_path_path, environment, raiden_client
+    )
+    worker = SuiteWorker(
+        coordinator_url,
+        run_scenario,
+        parallel=parallel,
+        max_nodes=max_nodes,
+        account=account.address,
+    )
+    try:
+        results = worker.run()
+    except AccountInUse as ex:
+        log.error("Worker rejected", error=str(ex))
+        click.secho(str(ex), fg="red")
+        exit(ex.exit_code)
+    failed = [result.name for result in results if not result.success]
+    click.secho(
+        f"{len(results)} scenarios run, failed: {', '.join(failed) or 'none'}",
+        fg="red" if failed else "green",
+    )
+
+
+@main.command(name="analyze")
+@click.argument("scenario-file", type=click.Path(dir_okay=False))
+@click.option(
+    "--run-number", type=int, help="Run of the scenario to analyze. Defaults to the latest run."
+)
+@click.option(
+    "--trace-payment",
+    "payment_identifier",
+    type=int,
+    help="Show the log entries of all nodes about the payment with this identifier.",
+)
+@click.option(
+    "--trace-transfer",
+    "transfer_count",
+    type=int,
+    help="Like --trace-payment, for the n-th transfer of the run with a generated identifier.",
+)
+@click.option("--raw", is_flag=True, help="Show the complete log entries of traced payments.")
+@click.option(
+    "--error-rate",
+    "error_rate_interval",
+    type=int,
+    help="Show the error rate of every node per interval of this many seconds.",
+)
+@click.option(
+    "--parallel",
+    default=os.cpu_count() or 1,
+    show_default=True,
+    help="Number of processes parsing the node logs when building the index.",
+)
+@click.option("--rebuild", is_flag=True, help="Rebuild the index of the logs, even if current.")
+@data_path_option
+def analyze(
+    scenario_file: str,
+    run_number: Optional[int],
+    payment_identifier: Optional[int],
+    transfer_count: Optional[int],
+    raw: bool,
+    error_rate_interval: Optional[int],
+    parallel: int,
+    rebuild: bool,
+    data_path: str,
+):
+    """Analyze the node logs of a run of SCENARIO_FILE.
+
+    The logs are indexed on the first analysis of a run, which makes later
+    queries fast. Without a query, a summary of the logs of every node is shown.
+    """
+    from scenario_player.analysis import (
+        format_error_rates,
+        format_payment_trace,
+        format_summary,
+        open_run_index,
+    )
+    from scenario_player.constants import RUN_NUMBER_FILENAME
+    from scenario_player.utils.identifiers import generate_payment_identifier
+
+    scenario_name = Path(scenario_file).stem
+    scenario_dir = Path(data_path).joinpath("scenarios", scenario_name)
+    if run_number is None:
+        try:
+            run_number = int(scenario_dir.joinpath(RUN_NUMBER_FILENAME).read_text())
+        except (OSError, ValueError):
+            raise click.ClickException(f"No runs of scenario {scenario_name} found") from None
+    if transfer_count is not None:
+        payment_identifier = generate_payment_identifier(scenario_name, run_number, transfer_count)
+
+    try:
+        index = open_run_index(scenario_dir, run_number, parallel=parallel, rebuild=rebuild)
+    except FileNotFoundError as ex:
+        raise click.ClickException(str(ex)) from ex
+
+    if payment_identifier is not None:
+        entries = index.trace_payment(payment_identifier)
+        raw_entries = index.raw_entries(entry.row for entry in entries) if raw else None
+        click.echo(format_payment_trace(payment_identifier, entries, raw_entries))
+    if error_rate_interval is not None:
+        click.echo(format_error_rates(index.error_rates(error_rate_interval)))
+    if payment_identifier is None and error_rate_interval is None:
+        click.echo(format_summary(index))
+
+
 @main.command(name="reclaim-eth")
 @click.option(
     "--min-age",
@@ -433,14 +921,26 @@ class ScenarioUIManager(AbstractContextManager):
 @data_path_option
 def reclaim_eth(
     min_age,
-    reclaim_tokens: List[TokenAddress],
+    reclaim_tokens: List["TokenAddress"],
     withdraw_from_udc: bool,
     password,
     password_file,
     keystore_file,
-    environment: EnvironmentConfig,
+    environment: "EnvironmentConfig",
     data_path,
 ):
+    from eth_utils import to_canonical_address, to_checksum_address
+    from raiden_common.network.rpc.client import make_sane_poa_middleware
+    from raiden_common.network.rpc.middleware import faster_gas_price_strategy
+    from raiden_common.settings import RAIDEN_CONTRACT_VERSION
+    from raiden_common.utils.typing import Address
+    from raiden_contracts.contract_manager import ContractManager, contracts_precompiled_path
+    from web3 import HTTPProvider, Web3
+    from web3.middleware import simple_cache_middleware
+
+    import scenario_player.utils.reclaim
+    from scenario_player.utils.reclaim import ReclamationCandidate, get_reclamation_candidates
+
     eth_rpc_endpoint = environment.eth_rpc_endpoints[0]
     log.info("start cmd", eth_rpc_endpoint=eth_rpc_endpoint)
 
@@ -507,11 +1007,19 @@ def version(short):
     if short:
         click.secho(message=__version__)
     else:
+        from scenario_player.utils.version import get_complete_spec
+
         spec = get_complete_spec()
         click.secho(message=json.dumps(spec, indent=2))
 
 
-def smoketest_deployed_contracts(contracts: Dict[str, Any]) -> DeployedContracts:
+def smoketest_deployed_contracts(contracts: Dict[str, Any]) -> "DeployedContracts":
+    from eth_typing import HexStr
+    from eth_utils import to_checksum_address
+    from raiden_common.settings import RAIDEN_CONTRACT_VERSION
+    from raiden_contracts.constants import CHAINNAME_TO_ID
+    from raiden_contracts.contract_manager import DeployedContract, DeployedContracts
+
     return DeployedContracts(
         chain_id=CHAINNAME_TO_ID["smoketest"],
         contracts={
@@ -529,16 +1037,22 @@ def smoketest_deployed_contracts(contracts: Dict[str, Any]) -> DeployedContracts
 
 
 @main.command(name="smoketest", help="Run a short self-test.")
-@option(
+@click.option(
     "--eth-client",
-    type=EnumChoiceType(EthClient),
-    default=EthClient.GETH.value,
+    # The values of `raiden_common.constants.EthClient`
+    type=click.Choice(["geth", "parity", "arbitrum"]),
+    default="geth",
     show_default=True,
     help="Which Ethereum client to run for the smoketests",
 )
-def smoketest(eth_client: EthClient):
+def smoketest(eth_client: str):
+    from eth_typing import URI
+    from raiden_common.constants import EthClient
     from raiden_common.network.utils import get_free_port
     from raiden_common.tests.utils.smoketest import setup_smoketest, step_printer
+    from raiden_common.utils.typing import BlockTimeout, FeeAmount, TokenAddress, TokenAmount
+
+    from scenario_player.utils.configuration.settings import EnvironmentConfig
 
     free_port_generator = get_free_port()
     datadir = mkdtemp()
@@ -550,7 +1064,7 @@ def smoketest(eth_client: EthClient):
         with step_printer(step_count=6, stdout=sys.stdout) as print_step:
             setup: RaidenTestSetup
             with setup_smoketest(
-                eth_client=eth_client,
+                eth_client=EthClient(eth_client),
                 print_step=print_step,
                 free_port_generator=free_port_generator,
                 debug=False,
@@ -608,6 +1122,8 @@ def report(report_path=None, disable_debug_logfile=True):
         report_file = tempfile.mktemp(suffix=".log")
     else:
         report_file = report_path
+    from raiden_common.log_config import configure_logging
+
     click.secho(f"Report file: {report_file}", fg="yellow")
     configure_logging(
         logger_level_config={"": "INFO", "raiden": "DEBUG", "scenario_player": "DEBUG"},
@@ -630,6 +1146,9 @@ def report(report_path=None, disable_debug_logfile=True):
 
 
 def create_smoketest_config_file(setup: "RaidenTestSetup", datadir: str) -> Path:
+    import yaml
+    from eth_utils import to_checksum_address
+
     udc_address = to_checksum_address(setup.args["user_deposit_contract_address"])
     config = yaml.safe_load(Path("tests/smoketests/template.yaml").read_text())
     config_file = Path(tempfile.mktemp(dir=datadir, suffix=".yaml"))
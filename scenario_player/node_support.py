@@ -3,9 +3,10 @@ import json
 import os
 import shutil
 import signal
+from collections import Counter
 from pathlib import Path
-from subprocess import Popen
-from typing import IO, TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
+from subprocess import PIPE, Popen
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
 
 import gevent
 import structlog
@@ -17,7 +18,8 @@ from raiden_common.utils.nursery import Nursery
 
 from scenario_player.exceptions import ScenarioError
 from scenario_player.utils.configuration.nodes import NodesConfig
-from scenario_player.utils.process import unused_port
+from scenario_player.utils.flamegraph import read_folded, write_folded
+from scenario_player.utils.node_logs import RotatingLogWriter, compress_in_background, pump_output
 
 if TYPE_CHECKING:
     from scenario_player.runner import ScenarioRunner
@@ -144,7 +146,14 @@ MANAGED_CONFIG_OPTIONS_OVERRIDABLE = {
 
 
 class NodeRunner:
-    def __init__(self, runner: "ScenarioRunner", index: int, raiden_client: str, options: dict):
+    def __init__(
+        self,
+        runner: "ScenarioRunner",
+        index: int,
+        raiden_client: str,
+        options: dict,
+        profile: bool = False,
+    ):
         self._runner = runner
         self._index = index
         self._options = options
@@ -160,11 +169,20 @@ class NodeRunner:
         self._address: Optional[ChecksumAddress] = None
         self._api_address: Optional[str] = None
 
-        self._output_files: Dict[str, IO] = {}
+        self._output_files: Dict[str, RotatingLogWriter] = {}
 
         if options.pop("_clean", False):
             shutil.rmtree(self.datadir)
         self.datadir.mkdir(parents=True, exist_ok=True)
+        if profile:
+            options.setdefault(
+                "flamegraph",
+                str(self.datadir.joinpath(f"flamegraph-run-{self._runner.run_number:03d}")),
+            )
+        # Raiden writes the sampled stacks to this directory when it stops
+        self.flamegraph_dir: Optional[Path] = (
+            Path(options["flamegraph"]) if "flamegraph" in options else None
+        )
         self._validate_options(options)
         self._eth_rpc_endpoint: URI = next(
             self._runner.definition.settings.eth_rpc_endpoint_iterator
@@ -184,13 +202,26 @@ class NodeRunner:
             port=self.api_address.rpartition(":")[2],
         )
         log.debug("Node start command", command=self._command)
-        self._output_files["stdout"] = self._stdout_file.open("at", 1)
-        self._output_files["stderr"] = self._stderr_file.open("at", 1)
+        nodes_config = self._runner.definition.nodes
+        for name, path in (("stdout", self._stdout_file), ("stderr", self._stderr_file)):
+            self._output_files[name] = RotatingLogWriter(
+                path,
+                segment_size=nodes_config.log_segment_size,
+                compress=nodes_config.compress_logs,
+            )
         for file in self._output_files.values():
             file.write("--------- Starting ---------\n")
         self._output_files["stdout"].write(f"Command line: {' '.join(self._command)}\n")
+        if self.flamegraph_dir is not None:
+            self.flamegraph_dir.mkdir(parents=True, exist_ok=True)
 
-        self._process = self.nursery.exec_under_watch(self._command, **self._output_files)
+        self._process = self.nursery.exec_under_watch(self._command, stdout=PIPE, stderr=PIPE)
+        if self._process is not None:
+            for name, stream in (
+                ("stdout", self._process.stdout),
+                ("stderr", self._process.stderr),
+            ):
+                self.nursery.spawn_under_watch(pump_output, stream, self._output_files[name])
 
     # FIXME: Make node stop configurable?
     def stop(self, timeout=600):  # 10 mins
@@ -199,6 +230,15 @@ class NodeRunner:
         if self._process.wait(timeout):
             raise Exception(f"Node {self._index} did not stop cleanly: ")
 
+    def compress_log(self) -> Any:
+        """Compress the JSON log of the node in the background, once the node stopped.
+
+        Returns the `AsyncResult` of the compression or `None`.
+        """
+        if not self._log_file.exists():
+            return None
+        return compress_in_background(self._log_file)
+
     @property
     def address(self) -> ChecksumAddress:
         if not self._address:
@@ -324,8 +364,7 @@ class NodeRunner:
         if not self._api_address:
             self._api_address = self._options.get("api-address")
             if self._api_address is None:
-                next_free_port = unused_port()
-                self._api_address = f"127.0.0.1:{next_free_port}"
+                self._api_address = f"127.0.0.1:{self._runner.ports.next_port()}"
         return self._api_address
 
     @property
@@ -493,6 +532,7 @@ class NodeController:
         self._runner = runner
         self._global_options = config.default_options
         self._node_options = config.node_options
+        self._profiled_nodes = config.profiled_nodes
 
         self._node_runners = [
             NodeRunner(
@@ -500,6 +540,7 @@ class NodeController:
                 index=index,
                 raiden_client=raiden_client,
                 options={**self._global_options, **self._node_options.get(index, {})},
+                profile=index in self._profiled_nodes,
             )
             for index in range(config.count)
         ]
@@ -550,6 +591,46 @@ class NodeController:
         stop_group.join(raise_error=True)
         log.info("Nodes stopped")
 
+    def compress_logs(self):
+        """Compress the JSON logs of the stopped nodes, if enabled."""
+        if not self._runner.definition.nodes.compress_logs:
+            return
+        compressions = [runner.compress_log() for runner in self._node_runners]
+        for compression in compressions:
+            if compression is not None:
+                compression.get()
+
+    def collect_flamegraphs(self, directory: Path) -> Dict[str, Path]:
+        """Merge the stacks sampled by the stopped nodes per role into `directory`.
+
+        Nodes with a ``flamegraph`` option which aren't in ``nodes.profiling``
+        have the role ``node-<index>``. Returns the folded file of every role.
+        """
+        stacks: Dict[str, Counter] = {}
+        for index, runner in enumerate(self._node_runners):
+            if runner.flamegraph_dir is None or not runner.flamegraph_dir.is_dir():
+                continue
+            role = self._profiled_nodes.get(index, f"node-{index}")
+            role_stacks = stacks.setdefault(role, Counter())
+            for path in sorted(runner.flamegraph_dir.iterdir()):
+                if path.is_file():
+                    role_stacks.update(read_folded(path))
+
+        run_number = self._runner.run_number
+        flamegraphs = {
+            role: write_folded(
+                directory.joinpath(f"run-{run_number:03d}.nodes-{role}.folded"), role_stacks
+            )
+            for role, role_stacks in stacks.items()
+            if role_stacks
+        }
+        if flamegraphs:
+            log.info(
+                "Node flamegraphs collected",
+                flamegraphs={role: str(path) for role, path in flamegraphs.items()},
+            )
+        return flamegraphs
+
     def initialize_nodes(self):
         for runner in self._node_runners:
             runner.initialize()
@@ -0,0 +1,154 @@
+"""Profiler of the scenario player itself, enabled with ``run --profile``.
+
+All tasks of the player run as greenlets on one gevent hub, so any blocking
+call stalls all of them and delays the requests to the nodes. The profiler
+runs a native thread, which
+
+  - samples the stack of the hub's thread every `sample_interval` seconds,
+  - detects stalls of the event loop longer than `blocking_threshold`
+    seconds and records the stack blocking it.
+
+:meth:`Profiler.write` writes the results to the ``profile`` directory of the scenario:
+
+  - ``run-XXX.samples.folded``: the sampled stacks, weighted by sample count,
+  - ``run-XXX.blocking.folded``: the blocking stacks, weighted by milliseconds,
+  - ``run-XXX.stalls.jsonl``: one JSON line per stall with its time, duration
+    and stack.
+
+The folded files are flamegraph input, see :mod:`scenario_player.utils.flamegraph`.
+"""
+import json
+import sys
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import gevent
+import structlog
+from gevent import monkey
+
+from scenario_player.utils.flamegraph import fold_stack, write_folded
+
+log = structlog.get_logger(__name__)
+
+PROFILE_DIRNAME = "profile"
+SAMPLE_INTERVAL = 0.01
+BLOCKING_THRESHOLD = 0.1
+# Label of the samples without a Python frame, i.e. the hub waiting for events
+IDLE_STACK = "(hub idle)"
+
+_start_new_thread, _get_ident, _allocate_lock = monkey.get_original(
+    "_thread", ["start_new_thread", "get_ident", "allocate_lock"]
+)
+_sleep = monkey.get_original("time", "sleep")
+
+
+@dataclass
+class Stall:
+    """A stall of the event loop, `started` is a unix timestamp."""
+
+    started: float
+    duration: float
+    stack: str
+
+
+class Profiler:
+    """Sampling profiler and event loop stall detector of the current thread's hub."""
+
+    def __init__(
+        self,
+        sample_interval: float = SAMPLE_INTERVAL,
+        blocking_threshold: float = BLOCKING_THRESHOLD,
+    ) -> None:
+        self.sample_interval = sample_interval
+        self.blocking_threshold = blocking_threshold
+        self.samples: Dict[str, int] = Counter()
+        self.stalls: List[Stall] = []
+        # The ticker greenlet runs four times per threshold, a stall delays its tick
+        self._tick_interval = blocking_threshold / 4
+        self._thread_id = 0
+        self._running = False
+        self._stopped = _allocate_lock()
+        self._ticker: Optional[gevent.Greenlet] = None
+        self._last_tick = time.monotonic()
+
+    def start(self) -> None:
+        self._thread_id = _get_ident()
+        self._last_tick = time.monotonic()
+        self._running = True
+        self._ticker = gevent.spawn(self._tick)
+        self._stopped.acquire()
+        _start_new_thread(self._monitor, ())
+        log.info(
+            "Profiling started",
+            sample_interval=self.sample_interval,
+            blocking_threshold=self.blocking_threshold,
+        )
+
+    def stop(self) -> None:
+        if not self._running:
+            return
+        self._running = False
+        self._stopped.acquire()
+        self._stopped.release()
+        if self._ticker is not None:
+            self._ticker.kill()
+        log.info(
+            "Profiling stopped",
+            samples=sum(self.samples.values()),
+            stalls=len(self.stalls),
+            stalled_seconds=round(sum(stall.duration for stall in self.stalls), 3),
+        )
+
+    def _tick(self) -> None:
+        while True:
+            self._last_tick = time.monotonic()
+            gevent.sleep(self._tick_interval)
+
+    def _monitor(self) -> None:
+        stall: Optional[Stall] = None
+        stalled_tick = 0.0
+        try:
+            while self._running:
+                _sleep(self.sample_interval)
+                frame = sys._current_frames().get(self._thread_id)  # pylint: disable=W0212
+                stack = fold_stack(frame) or IDLE_STACK
+                del frame
+                self.samples[stack] += 1
+
+                last_tick = self._last_tick
+                overdue = time.monotonic() - last_tick - self._tick_interval
+                if stall is None:
+                    if overdue > self.blocking_threshold:
+                        stall = Stall(started=time.time() - overdue, duration=0.0, stack=stack)
+                        stalled_tick = last_tick
+                elif last_tick != stalled_tick:
+                    stall.duration = last_tick - stalled_tick - self._tick_interval
+                    self.stalls.append(stall)
+                    stall = None
+        finally:
+            self._stopped.release()
+
+    def blocking_stacks(self) -> Dict[str, int]:
+        """Return the blocking stacks, weighted by the milliseconds they blocked."""
+        stacks: Dict[str, int] = Counter()
+        for stall in self.stalls:
+            stacks[stall.stack] += round(stall.duration * 1000)
+        return stacks
+
+    def write(self, directory: Path, prefix: str) -> List[Path]:
+        """Write the profile to `directory`, the file names start with `prefix`."""
+        directory.mkdir(parents=True, exist_ok=True)
+        stalls_path = directory.joinpath(f"{prefix}.stalls.jsonl")
+        with stalls_path.open("w") as stalls_file:
+            for stall in self.stalls:
+                stalls_file.write(json.dumps(asdict(stall)) + "\n")
+        paths = [
+            write_folded(directory.joinpath(f"{prefix}.samples.folded"), self.samples),
+            write_folded(directory.joinpath(f"{prefix}.blocking.folded"), self.blocking_stacks()),
+            stalls_path,
+        ]
+        log.info("Profile written", files=[str(path) for path in paths])
+        return paths
@@ -0,0 +1,95 @@
+import json
+import os
+import sys
+import time
+from typing import IO, List, Optional
+
+import gevent
+import structlog
+
+from scenario_player.tasks.base import Task, TaskState
+
+log = structlog.get_logger(__name__)
+
+# Seconds between two writes to the progress stream
+PROGRESS_FLUSH_INTERVAL = 1.0
+
+
+def task_progress_event(task: Task, state: TaskState) -> dict:
+    """Return the progress event for `task` entering `state`."""
+    event = {
+        "ts": round(time.time(), 3),
+        "id": task.id,
+        "type": type(task)._name,
+        "parent": task._parent.id if task._parent else None,
+        "state": state.name.lower(),
+        "attempts": task.attempts,
+    }
+    name = task._config.get("name") if isinstance(task._config, dict) else None
+    if name:
+        event["name"] = name
+    if task._start_time is not None:
+        stop_time = task._stop_time or time.monotonic()
+        event["runtime"] = round(stop_time - task._start_time, 3)
+    if state is TaskState.ERRORED and task.exception is not None:
+        event["error"] = repr(task.exception)
+    return event
+
+
+class ProgressStream:
+    """Write task state changes as JSON lines, e.g. for CI dashboards.
+
+    Events are buffered and written every `flush_interval` seconds, so that
+    there is at most one write per interval, regardless of the number of
+    tasks.
+
+    Example event::
+
+        {"ts":1612345678.123,"id":"3","type":"transfer","parent":"2",
+         "state":"finished","attempts":1,"runtime":0.214}
+    """
+
+    def __init__(self, stream: IO[str], flush_interval: float = PROGRESS_FLUSH_INTERVAL) -> None:
+        self._stream = stream
+        self._flush_interval = flush_interval
+        self._buffer: List[str] = []
+        self._flusher: Optional[gevent.Greenlet] = None
+
+    @classmethod
+    def open(cls, target: str, flush_interval: float = PROGRESS_FLUSH_INTERVAL):
+        """Open the progress stream to a file path, a file descriptor number or `-` for stdout."""
+        if target == "-":
+            stream = sys.stdout
+        elif target.isdigit():
+            stream = os.fdopen(int(target), "w", closefd=False)
+        else:
+            stream = open(target, "a")
+        return cls(stream, flush_interval)
+
+    def task_state_changed(self, runner, task: Task, state: TaskState) -> None:
+        # pylint: disable=unused-argument
+        self._buffer.append(json.dumps(task_progress_event(task, state), separators=(",", ":")))
+        if self._flusher is None:
+            self._flusher = gevent.spawn_later(self._flush_interval, self._flush_later)
+
+    def _flush_later(self) -> None:
+        self._flusher = None
+        self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        lines, self._buffer = self._buffer, []
+        try:
+            self._stream.write("\n".join(lines) + "\n")
+            self._stream.flush()
+        except OSError:
+            log.exception("Writing to the progress stream failed")
+
+    def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.kill()
+            self._flusher = None
+        self.flush()
+        if self._stream is not sys.stdout:
+            self._stream.close()
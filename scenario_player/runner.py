@@ -44,18 +44,28 @@ from raiden_contracts.utils.type_aliases import TokenAmount
 from requests import HTTPError, Session
 from web3 import HTTPProvider, Web3
 
+from scenario_player.channel_samples import ChannelSampler, samples_dir_for
 from scenario_player.constants import (
     API_URL_TOKEN_NETWORK_ADDRESS,
     MAX_RAIDEN_STARTUP_TIME,
     NODE_ACCOUNT_BALANCE_FUND,
     NODE_ACCOUNT_BALANCE_MIN,
     OWN_ACCOUNT_BALANCE_MIN,
-    RUN_NUMBER_FILENAME,
 )
 from scenario_player.definition import ScenarioDefinition
 from scenario_player.exceptions import ScenarioError, TokenNetworkDiscoveryTimeout
+from scenario_player.gas import GAS_DIRNAME, GasProfiler
+from scenario_player.latency import LATENCY_DIRNAME, PaymentTracer
 from scenario_player.node_support import NodeController, NodeRunner
+from scenario_player.profiler import PROFILE_DIRNAME
 from scenario_player.utils import TimeOutHTTPAdapter
+from scenario_player.utils.allocation import (
+    PortAllocator,
+    PortRange,
+    allocate_run_number,
+    load_or_create_seed,
+    record_run_number,
+)
 from scenario_player.utils.configuration.nodes import NodesConfig
 from scenario_player.utils.configuration.settings import (
     EnvironmentConfig,
@@ -146,20 +156,20 @@ def determine_run_number(scenario_dir: Path) -> int:
     """Determine the current run number.
 
     We check for a run number file, and use any number that is logged there
-    after incrementing it.
+    after incrementing it. The file is locked, so concurrent runs of the
+    same scenario get different run numbers.
     """
-    # TODO: Use advisory file locks to avoid concurrent read/writes on the
-    # run_number_file. Otherwise this can lead to very hard to debug races.
-    run_number_file = scenario_dir.joinpath(RUN_NUMBER_FILENAME)
-
-    if run_number_file.exists():
-        run_number = int(run_number_file.read_text()) + 1
-    else:
-        run_number = 0
+    return allocate_run_number(scenario_dir)
 
-    run_number_file.write_text(str(run_number))
 
-    return run_number
+def make_orchestration_client(account: Account, web3: Web3) -> JSONRPCClient:
+    assert account.privkey, "Account not unlockable"
+    return JSONRPCClient(
+        web3=web3,
+        privkey=account.privkey,
+        gas_price_strategy=faster_gas_price_strategy,
+        block_num_confirmations=DEFAULT_NUMBER_OF_BLOCK_CONFIRMATIONS,
+    )
 
 
 def make_session(auth: str, settings: SettingsConfig, node_config: NodesConfig) -> Session:
@@ -263,7 +273,25 @@ class ScenarioRunner:
         ] = None,
         smoketest_deployment_data: DeployedContracts = None,
         delete_snapshots: bool = False,
+        client: Optional[JSONRPCClient] = None,
+        run_number: Optional[int] = None,
+        trace_payments: bool = False,
+        profile_gas: bool = False,
     ) -> None:
+        """Runner of a single scenario.
+
+        `client` is the client of the orchestration `account`. Runners that
+        run at the same time, e.g. in a suite, must share it, as it
+        allocates the nonces of the account's transactions.
+
+        `run_number` is given if it was allocated elsewhere, e.g. by the
+        coordinator of a distributed suite.
+
+        `trace_payments` enables the :class:`PaymentTracer`, which measures the
+        latencies of the payments until the targets received them, and
+        `profile_gas` the :class:`GasProfiler`, which reports the gas costs of
+        the transactions of the run.
+        """
         self.success = success
 
         self.smoketest_deployment_data = smoketest_deployment_data
@@ -279,34 +307,61 @@ class ScenarioRunner:
         self.task_count = 0
         self.running_task_count = 0
         self.task_cache: Dict[str, Task] = {}
-        self.task_state_callback = task_state_callback
+        self.task_state_callbacks: List[
+            Callable[["ScenarioRunner", "Task", "TaskState"], None]
+        ] = []
+        if task_state_callback is not None:
+            self.task_state_callbacks.append(task_state_callback)
         # Storage for arbitrary data tasks might need to persist
         self.task_storage: Dict[str, dict] = defaultdict(dict)
+        # Transfer tasks created, encoded in the generated payment identifiers
+        self.transfer_count = 0
+        # Merged flamegraph input of the profiled nodes by role, see `nodes.profiling`
+        self.flamegraphs: Dict[str, Path] = {}
+        self.payment_tracer: Optional[PaymentTracer] = None
+        self.latency_report: Optional[Path] = None
+        self.channel_sampler: Optional[ChannelSampler] = None
+        self.gas_profiler: Optional[GasProfiler] = None
+        self.gas_report: Optional[Path] = None
 
         self.definition = ScenarioDefinition(scenario_file, data_path, self.environment)
 
         log.debug("Local seed", seed=self.local_seed)
 
-        self.run_number = determine_run_number(self.definition.scenario_dir)
+        if run_number is None:
+            run_number = determine_run_number(self.definition.scenario_dir)
+        else:
+            record_run_number(self.definition.scenario_dir, run_number)
+        self.run_number = run_number
 
         log.info("Run number", run_number=self.run_number)
 
+        if trace_payments:
+            self.payment_tracer = PaymentTracer(self)
+        sampling_interval = self.definition.settings.channel_sampling_interval
+        if sampling_interval is not None:
+            self.channel_sampler = ChannelSampler(
+                self,
+                sampling_interval,
+                samples_dir_for(self.definition.scenario_dir, self.run_number),
+            )
+
+        self.port_allocator = PortAllocator(data_path)
+        self._ports: Optional[PortRange] = None
+
         self.protocol = "http"
         self.session = make_session(auth, self.definition.settings, self.definition.nodes)
 
-        web3 = Web3(HTTPProvider(environment.eth_rpc_endpoints[0], session=self.session))
-        self.chain_id = ChainID(web3.eth.chainId)
+        if client is None:
+            web3 = Web3(HTTPProvider(environment.eth_rpc_endpoints[0], session=self.session))
+            client = make_orchestration_client(account, web3)
+        self.client = client
+        if profile_gas:
+            self.gas_profiler = GasProfiler(self.client.web3)
+        self.chain_id = ChainID(self.client.chain_id)
         self.definition.settings.eth_rpc_endpoint_iterator = environment.eth_rpc_endpoint_iterator
         self.definition.settings.chain_id = self.chain_id
 
-        assert account.privkey, "Account not unlockable"
-        self.client = JSONRPCClient(
-            web3=web3,
-            privkey=account.privkey,
-            gas_price_strategy=faster_gas_price_strategy,
-            block_num_confirmations=DEFAULT_NUMBER_OF_BLOCK_CONFIRMATIONS,
-        )
-
         assert account.address, "Account not loaded"
         balance = self.client.balance(account.address)
         if balance < OWN_ACCOUNT_BALANCE_MIN:
@@ -340,12 +395,21 @@ class ScenarioRunner:
         """
         assert self.definition.settings.sp_root_dir
         seed_file = self.definition.settings.sp_root_dir.joinpath("seed.txt")
-        if not seed_file.exists():
-            seed = str(encode_hex(bytes(random.randint(0, 255) for _ in range(20))))
-            seed_file.write_text(seed)
-        else:
-            seed = seed_file.read_text().strip()
-        return seed
+        return load_or_create_seed(
+            seed_file, lambda: str(encode_hex(bytes(random.randint(0, 255) for _ in range(20))))
+        )
+
+    @property
+    def ports(self) -> PortRange:
+        """The ports reserved for the nodes of this run, reserved on first use."""
+        if self._ports is None:
+            self._ports = self.port_allocator.reserve(self.definition.nodes.count)
+        return self._ports
+
+    def release_ports(self) -> None:
+        if self._ports is not None:
+            self._ports.release()
+            self._ports = None
 
     def ensure_token_network_discovery(
         self, token: CustomToken, token_network_addresses: TokenNetworkAddress
@@ -368,6 +432,51 @@ class ScenarioRunner:
                 )
 
     def run_scenario(self) -> None:
+        try:
+            self._run_scenario()
+        finally:
+            if self.channel_sampler is not None:
+                self.channel_sampler.stop()
+            self.release_ports()
+            self.node_controller.compress_logs()
+            # The nodes write their samples when they stop, also after a failure
+            self.flamegraphs = self.node_controller.collect_flamegraphs(
+                self.definition.scenario_dir.joinpath(PROFILE_DIRNAME)
+            )
+            if self.gas_profiler is not None:
+                self._write_gas_report(self.gas_profiler)
+            if self.payment_tracer is not None:
+                self.payment_tracer.stop()
+                self.latency_report = self.payment_tracer.write(
+                    self.definition.scenario_dir.joinpath(LATENCY_DIRNAME),
+                    f"run-{self.run_number:03d}",
+                )
+
+    def _write_gas_report(self, gas_profiler: GasProfiler) -> None:
+        gas_profiler.stop()
+        if gas_profiler.from_block is None:
+            # The run failed before the setup started
+            return
+        try:
+            self.gas_report = gas_profiler.write(
+                self.definition.scenario_dir.joinpath(GAS_DIRNAME),
+                f"run-{self.run_number:03d}",
+                self._gas_profiled_accounts(),
+            )
+        except Exception:  # pylint: disable=broad-except
+            # The report must not hide the result of the run
+            log.exception("Writing the gas report failed")
+
+    def _gas_profiled_accounts(self) -> Dict[ChecksumAddress, str]:
+        """The accounts in the gas report, the orchestration account and the nodes, by name."""
+        accounts = {to_checksum_address(self.client.address): "orchestration"}
+        accounts.update(
+            (address, f"node-{index}")
+            for address, index in self.node_controller.address_to_index.items()
+        )
+        return accounts
+
+    def _run_scenario(self) -> None:
         with Janitor() as nursery:
             self.node_controller.set_nursery(nursery)
             self.node_controller.initialize_nodes()
@@ -425,6 +534,13 @@ class ScenarioRunner:
         assert deploy, msg
 
         proxy_manager = get_proxy_manager(self.client, deploy)
+        if self.gas_profiler is not None:
+            # Includes the funding of the nodes
+            self.gas_profiler.start(
+                block_execution_started,
+                proxy_manager.contract_manager,
+                self._gas_profiled_accounts(),
+            )
 
         # Tracking pool to synchronize on all concurrent transactions
         pool = Pool()
@@ -504,8 +620,18 @@ class ScenarioRunner:
         self.token_network_address = to_checksum_address(token_network_address)
         self.block_execution_started = block_execution_started
 
+        log.debug("Compiling tasks", task_count=len(self.task_cache))
+        for task in list(self.task_cache.values()):
+            task.compile()
+
+        if self.channel_sampler is not None:
+            self.channel_sampler.start()
         self.root_task()
 
+        if self.payment_tracer is not None:
+            # The nodes are stopped once the scenario is done
+            self.payment_tracer.finish()
+
     def setup_raiden_nodes_ether_balances(
         self, pool: Pool, node_addresses: Set[ChecksumAddress]
     ) -> Set[Greenlet]:
@@ -669,8 +795,8 @@ class ScenarioRunner:
         return proxy_manager.custom_token(TokenAddress(token_address), "latest")
 
     def task_state_changed(self, task: "Task", state: "TaskState"):
-        if self.task_state_callback:
-            self.task_state_callback(self, task, state)
+        for callback in self.task_state_callbacks:
+            callback(self, task, state)
 
     def get_node_address(self, index):
         return self.node_controller[index].address
@@ -0,0 +1,223 @@
+import json
+import math
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import gevent
+import structlog
+from gevent import GreenletExit
+from gevent.queue import Queue
+
+log = structlog.get_logger(__name__)
+
+SUITE_DURATIONS_FILENAME = "suite_durations.json"
+DEFAULT_SUITE_PARALLELISM = 4
+
+
+@dataclass
+class SuiteEntry:
+    """A scenario of a suite, with the information used to schedule it."""
+
+    scenario_file: Path
+    node_count: int
+    expected_duration: Optional[float] = None
+    # Allocated by the coordinator of a distributed suite
+    run_number: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        return self.scenario_file.stem
+
+
+@dataclass
+class SuiteResult:
+    name: str
+    scenario_file: str
+    exit_code: int
+    duration: float
+    message: str = ""
+
+    @property
+    def success(self) -> bool:
+        return self.exit_code == 0
+
+
+def collect_scenario_files(patterns: Sequence[str]) -> List[Path]:
+    """Return the scenario files given by `patterns`.
+
+    A pattern may be a scenario file, a directory (all its ``.yaml`` files)
+    or a glob relative to the current directory, e.g. ``scenarios/ci/sp*/*.yaml``.
+    """
+    scenario_files: Dict[Path, None] = {}
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = sorted(path.glob("*.yaml"))
+        elif path.is_file():
+            matches = [path]
+        else:
+            matches = sorted(Path().glob(pattern))
+        if not matches:
+            raise FileNotFoundError(f"No scenario files found for {pattern!r}")
+        for match in matches:
+            scenario_files[match.absolute()] = None
+    return list(scenario_files)
+
+
+def load_durations(durations_file: Path) -> Dict[str, float]:
+    """Return the durations of the last successful run of every scenario."""
+    try:
+        return json.loads(durations_file.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_durations(durations_file: Path, results: Iterable[SuiteResult]) -> None:
+    durations = load_durations(durations_file)
+    durations.update({result.name: result.duration for result in results if result.success})
+    durations_file.write_text(json.dumps(durations, indent=2, sort_keys=True))
+
+
+def scheduling_priority(entry: SuiteEntry):
+    """Sort key of the longest processing time first scheduling."""
+    expected_duration = entry.expected_duration
+    if expected_duration is None:
+        expected_duration = math.inf
+    return expected_duration, entry.node_count
+
+
+class SuiteScheduler:
+    """Longest processing time first scheduling of the scenarios of a suite.
+
+    Scenarios are started in the order of their expected duration, scenarios
+    that never ran before first, the ones with more nodes first on a tie.
+    At most `parallel` scenarios run at the same time and, if `max_nodes` is
+    given, the scenarios running at the same time have at most `max_nodes`
+    nodes in total. A scenario with more than `max_nodes` nodes runs alone.
+    """
+
+    def __init__(
+        self, entries: Iterable[SuiteEntry], parallel: int, max_nodes: Optional[int] = None
+    ) -> None:
+        assert parallel > 0, "At least one scenario must be allowed to run"
+        self.pending = sorted(entries, key=scheduling_priority, reverse=True)
+        self.running: List[SuiteEntry] = []
+        self.parallel = parallel
+        self.max_nodes = max_nodes
+
+    @property
+    def done(self) -> bool:
+        return not self.pending and not self.running
+
+    def _fits(self, entry: SuiteEntry) -> bool:
+        if self.max_nodes is None or not self.running:
+            return True
+        running_nodes = sum(running.node_count for running in self.running)
+        return running_nodes + entry.node_count <= self.max_nodes
+
+    def start_next(self) -> List[SuiteEntry]:
+        """Return the scenarios to start now and mark them as running."""
+        started = []
+        for entry in list(self.pending):
+            if len(self.running) >= self.parallel:
+                break
+            if self._fits(entry):
+                self.pending.remove(entry)
+                self.running.append(entry)
+                started.append(entry)
+        return started
+
+    def finished(self, entry: SuiteEntry) -> None:
+        self.running.remove(entry)
+
+
+def run_suite_entry(run_scenario: Callable[[SuiteEntry], None], entry: SuiteEntry) -> SuiteResult:
+    """Run the scenario of `entry`, exit codes are the ones of the `run` command.
+
+    A :class:`SystemExit` of the runner, e.g. raised when a node died, fails
+    only this scenario with its exit code.
+    """
+    log.info("Starting scenario", scenario=entry.name, node_count=entry.node_count)
+    started = time.monotonic()
+    exit_code = 0
+    message = ""
+    try:
+        run_scenario(entry)
+    except GreenletExit:
+        raise
+    except SystemExit as ex:
+        log.exception("Scenario exited", scenario=entry.name, code=ex.code)
+        exit_code = ex.code if isinstance(ex.code, int) and ex.code != 0 else 10
+        message = f"SystemExit: {ex.code}"
+    except BaseException as ex:  # pylint: disable=broad-except
+        log.exception("Scenario failed", scenario=entry.name)
+        exit_code = getattr(ex, "exit_code", 10)
+        message = f"{type(ex).__name__}: {ex}"
+    duration = time.monotonic() - started
+    log.info("Scenario finished", scenario=entry.name, exit_code=exit_code, duration=duration)
+    return SuiteResult(
+        name=entry.name,
+        scenario_file=str(entry.scenario_file),
+        exit_code=exit_code,
+        duration=round(duration, 3),
+        message=message,
+    )
+
+
+def run_suite(
+    entries: Sequence[SuiteEntry],
+    run_scenario: Callable[[SuiteEntry], None],
+    parallel: int = DEFAULT_SUITE_PARALLELISM,
+    max_nodes: Optional[int] = None,
+) -> List[SuiteResult]:
+    """Run the scenarios of the suite concurrently, each one in its own greenlet.
+
+    `run_scenario` runs a single scenario and raises if it failed. The
+    results are returned in the order the scenarios finished.
+    """
+    scheduler = SuiteScheduler(entries, parallel, max_nodes)
+    finished: Queue = Queue()
+    results = []
+    while not scheduler.done:
+        for entry in scheduler.start_next():
+            greenlet = gevent.spawn(run_suite_entry, run_scenario, entry)
+            greenlet.link(lambda greenlet, entry=entry: finished.put((entry, greenlet)))
+
+        entry, greenlet = finished.get()
+        scheduler.finished(entry)
+        results.append(greenlet.get())
+    return results
+
+
+def suite_exit_code(results: Iterable[SuiteResult]) -> int:
+    """Return the exit code of the first failed scenario, `0` if all succeeded."""
+    return next((result.exit_code for result in results if not result.success), 0)
+
+
+def format_suite_report(results: Sequence[SuiteResult], duration: float) -> str:
+    name_width = max([len(result.name) for result in results] + [8])
+    lines = [f"{'Scenario':<{name_width}}  {'Result':<7}  {'Code':>4}  {'Duration':>9}"]
+    for result in sorted(results, key=lambda result: result.name):
+        status = "success" if result.success else "failed"
+        lines.append(
+            f"{result.name:<{name_width}}  {status:<7}  {result.exit_code:>4}  "
+            f"{result.duration:>8.1f}s"
+        )
+    failed = sum(1 for result in results if not result.success)
+    serial_duration = sum(result.duration for result in results)
+    lines.append(
+        f"{len(results) - failed}/{len(results)} scenarios successful in {duration:.1f}s "
+        f"(serial: {serial_duration:.1f}s)"
+    )
+    return "\n".join(lines)
+
+
+def write_suite_report(report_file: Path, results: Sequence[SuiteResult], duration: float) -> None:
+    report = {
+        "duration": round(duration, 3),
+        "exit_code": suite_exit_code(results),
+        "results": [asdict(result) for result in results],
+    }
+    report_file.write_text(json.dumps(report, indent=2))
@@ -1,8 +1,16 @@
+import json
 import re
-from typing import Any, Union
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Pattern, Union
 
 import structlog
-from requests import ConnectTimeout, ReadTimeout, RequestException  # type: ignore
+from requests import (  # type: ignore
+    ConnectTimeout,
+    ReadTimeout,
+    RequestException,
+    Response,
+    Session,
+)
 
 from scenario_player import runner as scenario_runner
 from scenario_player.constants import MAX_API_TASK_TIMEOUT
@@ -11,6 +19,32 @@ from scenario_player.tasks.base import Task
 
 log = structlog.get_logger(__name__)
 
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+@dataclass(frozen=True)
+class RequestPlan:
+    """The request of a task, resolved once and sent unchanged on every attempt."""
+
+    method: str
+    url: str
+    params: Dict[str, Any]
+    body: bytes
+    expected_status: Pattern
+    timeout: float
+
+    def send(self, session: Session) -> Response:
+        return session.request(
+            method=self.method,
+            url=self.url,
+            data=self.body,
+            headers=JSON_HEADERS,
+            timeout=self.timeout,
+        )
+
+    def status_matches(self, status_code: int) -> bool:
+        return self.expected_status.match(str(status_code)) is not None
+
 
 class RESTAPIActionTask(Task):
     _name = ""
@@ -26,6 +60,7 @@ class RESTAPIActionTask(Task):
         self._expected_http_status = config.get("expected_http_status", self._expected_http_status)
         self._http_status_re = re.compile(f"^{self._expected_http_status}$")
         self._timeout = config.get("timeout", MAX_API_TASK_TIMEOUT)
+        self._plan: Optional[RequestPlan] = None
 
     @property
     def _request_params(self):
@@ -38,23 +73,38 @@ class RESTAPIActionTask(Task):
     def _process_response(self, response_dict: dict):  # pylint: disable=no-self-use
         return response_dict
 
+    def compile(self) -> None:
+        params = self._request_params
+        self._plan = RequestPlan(
+            method=self._method.upper(),
+            url=self._expand_url(),
+            params=params,
+            body=json.dumps(params).encode(),
+            expected_status=self._http_status_re,
+            timeout=self._timeout,
+        )
+
+    @property
+    def plan(self) -> RequestPlan:
+        """The request of the task, compiled on first use if the runner didn't."""
+        if self._plan is None:
+            self.compile()
+        assert self._plan is not None
+        return self._plan
+
     def _run(self, *args, **kwargs):  # pylint: disable=unused-argument
-        url = self._expand_url()
-        log.debug("Requesting", url=url, method=self._method, json=self._request_params)
+        plan = self.plan
+        url = plan.url
+        log.debug("Requesting", url=url, method=plan.method, json=plan.params)
         try:
-            resp = self._runner.session.request(
-                method=self._method,
-                url=url,
-                json=self._request_params,
-                timeout=self._timeout,
-            )
+            resp = plan.send(self._runner.session)
         except (ReadTimeout, ConnectTimeout) as ex:
             self._handle_timeout(ex)
         except RequestException as ex:
             raise RESTAPIError(
                 f"Error performing REST-API call: {self._name}"  # pylint: disable=no-member
             ) from ex
-        if not self._http_status_re.match(str(resp.status_code)):
+        if not plan.status_matches(resp.status_code):
             raise RESTAPIStatusMismatchError(
                 f'HTTP status code "{resp.status_code}" while fetching {url}. '
                 f"Expected {self._expected_http_status}: {resp.text}"
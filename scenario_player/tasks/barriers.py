@@ -0,0 +1,258 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+import gevent
+import structlog
+from raiden_common.utils.formatting import to_checksum_address
+from requests import RequestException  # type: ignore
+
+from scenario_player import runner as scenario_runner
+from scenario_player.exceptions import ScenarioError, SynchronizationTimeout
+from scenario_player.tasks.base import Task
+
+log = structlog.get_logger(__name__)
+
+# Polls start with the first interval, which doubles up to the maximum
+SYNC_POLL_INTERVAL = 0.1
+SYNC_POLL_INTERVAL_MAX = 5.0
+SYNC_REQUEST_TIMEOUT = 10
+DEFAULT_SYNC_TIMEOUT = 5 * 60
+
+
+class SyncCondition(ABC):
+    """A condition of the system, which a :class:`WaitForSyncTask` waits for."""
+
+    def __init__(self, runner: scenario_runner.ScenarioRunner) -> None:
+        self._runner = runner
+        self.diagnostic: Optional[str] = "not checked yet"
+
+    @abstractmethod
+    def check(self) -> Optional[str]:
+        """Return `None` if the condition holds, otherwise why it doesn't."""
+
+    def wait(self) -> None:
+        """Poll the condition with an increasing interval, until it holds."""
+        interval = SYNC_POLL_INTERVAL
+        while True:
+            try:
+                self.diagnostic = self.check()
+            except (RequestException, ValueError, KeyError) as ex:
+                self.diagnostic = f"request failed: {ex!r}"
+            if self.diagnostic is None:
+                return
+            gevent.sleep(interval)
+            interval = min(interval * 2, SYNC_POLL_INTERVAL_MAX)
+
+    def _request(self, method: str, url: str, **kwargs: Any) -> Any:
+        return self._runner.session.request(
+            method=method, url=url, timeout=SYNC_REQUEST_TIMEOUT, **kwargs
+        )
+
+    def _node_url(self, node: int, path: str) -> str:
+        return f"{self._runner.protocol}://{self._runner.get_node_baseurl(node)}/api/v1/{path}"
+
+
+class ChainBlockCondition(SyncCondition):
+    def __init__(self, runner: scenario_runner.ScenarioRunner, block: int) -> None:
+        super().__init__(runner)
+        self.block = block
+
+    def __str__(self) -> str:
+        return f"chain at block {self.block}"
+
+    def check(self) -> Optional[str]:
+        current_block = self._runner.client.block_number()
+        if current_block < self.block:
+            return f"chain is at block {current_block}"
+        return None
+
+
+class NodeSyncedCondition(SyncCondition):
+    """The node finished its initial sync, i.e. reports the status ``ready``.
+
+    The status doesn't change back once the node is ready, so it doesn't
+    show whether the node processed the blocks mined since.
+    """
+
+    def __init__(self, runner: scenario_runner.ScenarioRunner, node: int) -> None:
+        super().__init__(runner)
+        self.node = node
+
+    def __str__(self) -> str:
+        return f"node {self.node} synced"
+
+    def check(self) -> Optional[str]:
+        status = self._request("get", self._node_url(self.node, "status")).json()
+        if status["status"] != "ready":
+            return f"status is {status}"
+        return None
+
+
+class ChannelSyncedCondition(SyncCondition):
+    """Both partners see the channel opened and the expected deposits.
+
+    The REST API of a node only shows its own deposit in a channel, so the
+    deposit of every partner is checked on the partner's node.
+    """
+
+    def __init__(
+        self,
+        runner: scenario_runner.ScenarioRunner,
+        node: int,
+        partner: int,
+        total_deposit: Optional[int] = None,
+        partner_total_deposit: Optional[int] = None,
+    ) -> None:
+        super().__init__(runner)
+        self.node = node
+        self.partner = partner
+        self.total_deposits = {node: total_deposit, partner: partner_total_deposit}
+
+    def __str__(self) -> str:
+        return f"channel {self.node}-{self.partner} synced"
+
+    def check(self) -> Optional[str]:
+        token_address = to_checksum_address(self._runner.token.address)
+        channel_identifiers = set()
+        for node, partner in ((self.node, self.partner), (self.partner, self.node)):
+            partner_address = self._runner.get_node_address(partner)
+            url = self._node_url(node, f"channels/{token_address}/{partner_address}")
+            response = self._request("get", url)
+            if response.status_code == 404:
+                return f"node {node} doesn't know the channel"
+            channel = response.json()
+            if channel["state"] != "opened":
+                return f"node {node} sees the channel {channel['state']}"
+            total_deposit = self.total_deposits[node]
+            if total_deposit is not None and int(channel["total_deposit"]) != total_deposit:
+                return (
+                    f"node {node} sees its total deposit {channel['total_deposit']}, "
+                    f"expected {total_deposit}"
+                )
+            channel_identifiers.add(str(channel["channel_identifier"]))
+        if len(channel_identifiers) > 1:
+            return f"the nodes see different channels {sorted(channel_identifiers)}"
+        return None
+
+
+class PFSCapacityCondition(SyncCondition):
+    """The PFS finds a route from `source` to `target` with a capacity of `amount`."""
+
+    def __init__(
+        self, runner: scenario_runner.ScenarioRunner, source: int, target: int, amount: int
+    ) -> None:
+        super().__init__(runner)
+        self.source = source
+        self.target = target
+        self.amount = amount
+
+    def __str__(self) -> str:
+        return f"PFS route {self.source}->{self.target} for {self.amount}"
+
+    def check(self) -> Optional[str]:
+        pfs_url = self._runner.definition.settings.services.pfs.url
+        url = f"{pfs_url}/api/v1/{self._runner.token_network_address}/paths"
+        params = {
+            "from": self._runner.get_node_address(self.source),
+            "to": self._runner.get_node_address(self.target),
+            "value": self.amount,
+            "max_paths": 1,
+        }
+        response = self._request("post", url, json=params)
+        if response.status_code != 200:
+            return f"PFS responded {response.status_code}: {response.text}"
+        if not response.json().get("result"):
+            return "PFS found no route"
+        return None
+
+
+class WaitForSyncTask(Task):
+    """
+    Wait until the nodes, channels and PFS are in sync, instead of a fixed time.
+
+    All conditions are polled concurrently, starting every `0.1`s and backing
+    off to every `5`s. If they don't all hold within ``timeout`` seconds
+    (default: 300), the task fails with the conditions still missing.
+
+    Config options, all optional:
+
+      - ``block``: The chain reached this block. The REST API doesn't show
+        which block a node processed, so this doesn't mean the nodes
+        processed it, wait for the resulting ``channels`` state instead.
+      - ``nodes``: The nodes which must have finished their initial sync,
+        by default all nodes. ``[]`` skips this check.
+      - ``channels``: List of channels whose partners both see the channel
+        opened, with the optional ``total_deposit`` of ``from`` and
+        ``partner_total_deposit`` of ``to``.
+      - ``pfs_capacity``: List of routes which the PFS knows with the capacity
+        ``amount``.
+
+    Example usages:
+
+        # Wait until both partners see the deposit
+        wait_for_sync:
+          channels:
+            - {from: 0, to: 1, total_deposit: 1_000, partner_total_deposit: 500}
+          pfs_capacity:
+            - {from: 0, to: 2, amount: 1_000}
+
+        # Wait until the chain reached block 1_200
+        wait_for_sync: {block: 1_200}
+    """
+
+    _name = "wait_for_sync"
+    SYNCHRONIZATION_TIME_SECONDS = 0
+
+    def __init__(
+        self, runner: scenario_runner.ScenarioRunner, config: Any, parent: Task = None
+    ) -> None:
+        super().__init__(runner, config or {}, parent)
+        # The task applies the timeout itself, to report the missing conditions
+        self._sync_timeout = self._config.pop("timeout", DEFAULT_SYNC_TIMEOUT)
+        self.conditions = self._make_conditions(self._config)
+
+    def _make_conditions(self, config: Dict[str, Any]) -> List[SyncCondition]:
+        conditions: List[SyncCondition] = []
+        if "block" in config:
+            conditions.append(ChainBlockCondition(self._runner, int(config["block"])))
+        nodes = config.get("nodes", range(len(self._runner.node_controller)))
+        conditions.extend(NodeSyncedCondition(self._runner, int(node)) for node in nodes)
+        try:
+            conditions.extend(
+                ChannelSyncedCondition(
+                    self._runner,
+                    int(channel["from"]),
+                    int(channel["to"]),
+                    channel.get("total_deposit"),
+                    channel.get("partner_total_deposit"),
+                )
+                for channel in config.get("channels", [])
+            )
+            conditions.extend(
+                PFSCapacityCondition(
+                    self._runner, int(route["from"]), int(route["to"]), int(route["amount"])
+                )
+                for route in config.get("pfs_capacity", [])
+            )
+        except KeyError as ex:
+            raise ScenarioError(f"Missing key {ex} in config of {self._name}") from None
+        if config.get("pfs_capacity") and not self._runner.definition.settings.services.pfs.url:
+            raise ScenarioError("PFS tasks require settings.services.pfs.url to be set.")
+        return conditions
+
+    def _run(self, *args, **kwargs):  # pylint: disable=unused-argument
+        greenlets = [gevent.spawn(condition.wait) for condition in self.conditions]
+        try:
+            gevent.joinall(greenlets, timeout=self._sync_timeout, raise_error=True)
+        finally:
+            gevent.killall(greenlets)
+
+        missing = [condition for condition in self.conditions if condition.diagnostic]
+        if missing:
+            self._runner.node_controller.send_debugging_signal()
+            raise SynchronizationTimeout(
+                f"Not in sync after {self._sync_timeout}s: "
+                + "; ".join(f"{condition}: {condition.diagnostic}" for condition in missing)
+            )
+        log.debug("In sync", conditions=[str(condition) for condition in self.conditions])
+        return True
@@ -69,7 +69,9 @@ class Task:
     # on-chain deposits are ignored by the PFS). And a fee update is necessary for
     # the sender.
     #
-    # None of the above consistency checks are currently performed. Other
+    # None of the above consistency checks are performed by the tasks
+    # themselves, scenarios can wait for them with the `wait_for_sync` task
+    # (see `tasks/barriers.py`) instead of a fixed `wait`. Other
     # actions, like assert on the state of a channel after a close or settle,
     # checking monitoring requests, etc. also require additional
     # synchronization. Eventually the synchronization will have to be
@@ -97,6 +99,8 @@ class Task:
         self._parent = parent
         self._state = TaskState.INITIALIZED
         self.exception: Optional[BaseException] = None
+        # Number of times `_run` was called, tasks with a timeout are retried
+        self.attempts = 0
         self.level: int = parent.level + 1 if parent else 0
         self._start_time: Optional[float] = None
         self._stop_time: Optional[float] = None
@@ -123,6 +127,7 @@ class Task:
                         return_val = None
                         while True:
                             try:
+                                self.attempts += 1
                                 return_val = self._run(*args, **kwargs)
                             except ScenarioAssertionError as ex:
                                 exception = ex
@@ -138,11 +143,12 @@ class Task:
                     if exception:
                         raise exception
             else:
+                self.attempts += 1
                 return_val = self._run(*args, **kwargs)
         except BaseException as ex:
+            self.exception = ex
             self.state = TaskState.ERRORED
             log.exception("Task errored", task=self)
-            self.exception = ex
             raise
         finally:
             self._stop_time = time.monotonic()
@@ -153,6 +159,13 @@ class Task:
         self.state = TaskState.FINISHED
         return return_val
 
+    def compile(self) -> None:
+        """Resolve the parts of the task that don't change while the scenario runs.
+
+        Called by the runner for all tasks once the setup is done, so that the
+        attempts of the task only do the remaining work.
+        """
+
     def _run(self, *args, **kwargs):  # pylint: disable=unused-argument,no-self-use
         gevent.sleep(1)
 
@@ -1,4 +1,3 @@
-import hashlib
 from typing import Any
 
 import structlog
@@ -9,6 +8,8 @@ from scenario_player import runner as scenario_runner
 from scenario_player.exceptions import ScenarioAssertionError, ScenarioError
 from scenario_player.tasks.base import Task
 from scenario_player.tasks.raiden_api import RaidenAPIActionTask
+from scenario_player.utils.identifiers import generate_payment_identifier
+from scenario_player.utils.multiset import multiset_diff
 
 STORAGE_KEY_CHANNEL_INFO = "channel_info"
 
@@ -92,23 +93,28 @@ class TransferTask(ChannelActionTask):
     _name = "transfer"
     _url_template = "{protocol}://{target_host}/api/v1/payments/{token_address}/{partner_address}"
     _method = "post"
-    _transfer_count = 0
 
     def __init__(self, runner: scenario_runner.ScenarioRunner, config: Any, parent=None) -> None:
         super().__init__(runner, config, parent)
-        # Unique transfer identifier
-        self.__class__._transfer_count += 1
+        # Unique transfer identifier, counted per runner as a suite runs several in one process
+        self._runner.transfer_count += 1
         id_scheme = str(self._config.get("identifier", "generate")).lower()
         if id_scheme == "generate":
-            transfer_count = self.__class__._transfer_count
-            scenario_hash = int.from_bytes(
-                hashlib.sha256(self._runner.definition.name.encode()).digest()[:2],
-                "little",
-            )
-            self._config["identifier"] = int(
-                f"1{scenario_hash}1{self._runner.run_number:04d}1{transfer_count:06d}"
+            self._config["identifier"] = generate_payment_identifier(
+                self._runner.definition.name,
+                self._runner.run_number,
+                self._runner.transfer_count,
             )
 
+    def _run(self, *args, **kwargs):
+        tracer = self._runner.payment_tracer
+        # Retries of the request are the same payment
+        if tracer is not None and self.attempts == 1 and isinstance(self._config["to"], int):
+            identifier = self._config.get("identifier")
+            if identifier is not None:
+                tracer.expect(int(identifier), int(self._config["from"]), self._config["to"])
+        return super()._run(*args, **kwargs)
+
     @property
     def _request_params(self):
         params = dict(amount=self._config["amount"])
@@ -202,27 +208,15 @@ class AssertAllTask(ChannelActionTask):
                     f'Assertion field "{field}" has too {direction} values. '
                     f"Have {channel_count} channels but {assert_field_value_count} values."
                 )
-            channel_field_values_all = channel_field_values[:]
-            for value in self._config[assert_field]:
-                try:
-                    channel_field_values.remove(str(value))
-                except ValueError:
-                    channel_field_values_str = ", ".join(
-                        str(val) for val in channel_field_values_all
-                    )
-                    assert_field_values_str = ", ".join(
-                        str(val) for val in self._config[assert_field]
-                    )
-                    raise ScenarioAssertionError(
-                        f'Expected value "{value}" for field "{field}" not found in any channel. '
-                        f"Existing values: {channel_field_values_str} "
-                        f"Expected values: {assert_field_values_str} "
-                        f"Channels: {response_dict}"
-                    ) from None
-            if len(channel_field_values) != 0:
+            diff = multiset_diff(
+                (str(value) for value in self._config[assert_field]), channel_field_values
+            )
+            if diff:
+                # There are as many expected as actual values, so some are missing
+                missing_value = next(iter(diff.missing))
                 raise ScenarioAssertionError(
-                    f'Value mismatch for field "{field}". '
-                    f"Not all values consumed, remaining: {channel_field_values}"
+                    f'Expected value "{missing_value}" for field "{field}" not found in any '
+                    f"channel. Value mismatch, {diff.format()}"
                 )
         return response_dict
 
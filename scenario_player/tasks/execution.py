@@ -1,16 +1,28 @@
-from typing import Any, List
+from collections import Counter, deque
+from functools import partial
+from typing import Any, Deque, Dict, Hashable, Iterator, List, Optional
 
 import click
 import gevent
 import structlog
 from gevent import Greenlet
+from gevent.event import Event
 from gevent.pool import Pool
 
 from scenario_player import runner as scenario_runner
+from scenario_player.exceptions import ScenarioError
 from scenario_player.tasks.base import Task, TaskState, get_task_class_for_type
 
 log = structlog.get_logger(__name__)
 
+# Returned by the scheduler of `ParallelTask` if every node is at its in-flight limit
+NO_NODE_AVAILABLE = object()
+
+
+def _is_positive_int(value: Any) -> bool:
+    # YAML booleans are `int`s in Python, but never a meaningful limit or weight
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
 
 class SerialTask(Task):
     _name = "serial"
@@ -50,16 +62,142 @@ class SerialTask(Task):
         return [" - ", ("task_name", self._name)]
 
 
+def smooth_weighted_round_robin(weights: Dict[Hashable, int]) -> Iterator[Hashable]:
+    """Endlessly yield the keys of `weights`, each as often as its weight.
+
+    Keys are interleaved as evenly as possible, e.g. ``{a: 3, b: 1}`` yields
+    ``a, a, b, a, a, a, b, a, ...``.
+    """
+    total = sum(weights.values())
+    current = dict.fromkeys(weights, 0)
+    while True:
+        for key, weight in weights.items():
+            current[key] += weight
+        selected = max(current, key=current.__getitem__)
+        current[selected] -= total
+        yield selected
+
+
 class ParallelTask(SerialTask):
+    """Run the child tasks concurrently.
+
+    By default all children are started at once, limited only by
+    `concurrency`. With `max_in_flight_per_node` or `node_weights` the
+    children are queued per node they are sent `from`, and started from the
+    queues in a weighted round-robin, with at most `max_in_flight_per_node`
+    of them running per node at any time. Children without a `from` node
+    share one queue that is not limited. The weights must be positive
+    integers and every node given a weight must be the `from` node of a child.
+
+    Example usage::
+
+        # Node 0 gets twice the share of node 1, at most 5 requests per node at a time
+        parallel:
+          max_in_flight_per_node: 5
+          node_weights: {0: 2, 1: 1}
+          tasks:
+            - transfer: {from: 0, to: 1, amount: 1}
+            ...
+    """
+
     SYNCHRONIZATION_TIME_SECONDS = 0
     _name = "parallel"
 
+    def __init__(
+        self, runner: scenario_runner.ScenarioRunner, config: Any, parent: "Task" = None
+    ) -> None:
+        super().__init__(runner, config, parent)
+        self._max_in_flight_per_node: Optional[int] = config.get("max_in_flight_per_node")
+        self._node_weights: Dict[Any, int] = config.get("node_weights", {})
+        self._queues: Dict[Any, Deque[Task]] = {}
+        self._in_flight: Counter = Counter()
+        self._validate_scheduling()
+
+    def _validate_scheduling(self) -> None:
+        limit = self._max_in_flight_per_node
+        if limit is not None and not _is_positive_int(limit):
+            raise ScenarioError(
+                "max_in_flight_per_node of a parallel task must be a positive integer, "
+                f"not {limit!r}"
+            )
+        if not isinstance(self._node_weights, dict):
+            raise ScenarioError("node_weights of a parallel task must map nodes to weights")
+        invalid = {
+            node: weight
+            for node, weight in self._node_weights.items()
+            if not _is_positive_int(weight)
+        }
+        if invalid:
+            raise ScenarioError(
+                f"node_weights of a parallel task must be positive integers: {invalid}"
+            )
+        nodes = {
+            task._config.get("from") for task in self._tasks if isinstance(task._config, dict)
+        }
+        unknown = [node for node in self._node_weights if node not in nodes]
+        if unknown:
+            raise ScenarioError(
+                f"node_weights {unknown!r} of a parallel task are not the `from` node of a task, "
+                f"the nodes of the tasks are {sorted(nodes - {None}, key=repr)!r}"
+            )
+
+    @property
+    def queue_depth(self) -> Dict[Any, int]:
+        """Number of child tasks per node that are waiting to be started."""
+        return {node: len(queue) for node, queue in self._queues.items()}
+
+    @property
+    def in_flight(self) -> Dict[Any, int]:
+        """Number of running child tasks per node."""
+        return dict(self._in_flight)
+
     def _run(self, *args, **kwargs):
         pool = Pool(size=self._config.get("concurrency", None))
-        for task in self._tasks:
-            pool.start(Greenlet(task))
+        if self._max_in_flight_per_node is None and not self._node_weights:
+            for task in self._tasks:
+                pool.start(Greenlet(task))
+        else:
+            self._run_scheduled(pool)
         pool.join(raise_error=True)
 
+    def _run_scheduled(self, pool: Pool) -> None:
+        for task in self._tasks:
+            node = task._config.get("from") if isinstance(task._config, dict) else None
+            self._queues.setdefault(node, deque()).append(task)
+
+        weights = {node: self._node_weights.get(node, 1) for node in self._queues}
+        schedule = smooth_weighted_round_robin(weights)
+        slot_freed = Event()
+
+        def task_finished(node, _):
+            self._in_flight[node] -= 1
+            slot_freed.set()
+
+        while any(self._queues.values()):
+            node = self._next_node(schedule, sum(weights.values()))
+            if node is NO_NODE_AVAILABLE:
+                log.debug("All nodes at their in-flight limit", queue_depth=self.queue_depth)
+                slot_freed.clear()
+                slot_freed.wait()
+                continue
+
+            greenlet = Greenlet(self._queues[node].popleft())
+            greenlet.link(partial(task_finished, node))
+            self._in_flight[node] += 1
+            # Blocks while `concurrency` tasks are running
+            pool.start(greenlet)
+
+    def _next_node(self, schedule: Iterator[Any], cycle_length: int) -> Any:
+        """Return the next node in the schedule that has a queued task and a free slot."""
+        for _ in range(cycle_length):
+            node = next(schedule)
+            if not self._queues[node]:
+                continue
+            limit = self._max_in_flight_per_node
+            if node is None or limit is None or self._in_flight[node] < limit:
+                return node
+        return NO_NODE_AVAILABLE
+
 
 class SnapshotTask(SerialTask):
     _name = "snapshot"
@@ -0,0 +1,142 @@
+from abc import ABCMeta, abstractmethod
+from typing import Any, Iterator
+
+import click
+import structlog
+from gevent import Greenlet
+from gevent.pool import Pool
+
+from scenario_player import runner as scenario_runner
+from scenario_player.exceptions import ScenarioError
+from scenario_player.tasks.base import Task, get_task_class_for_type
+from scenario_player.utils.configuration.generators import TopologyConfig, TrafficConfig
+
+log = structlog.get_logger(__name__)
+
+
+class GeneratorTask(Task, metaclass=ABCMeta):
+    """Base class for tasks that expand into a stream of sub-tasks while running.
+
+    A sub-task is only instantiated once the pool has room for it, so that
+    generated scenarios of any size never exist as a complete task tree.
+    """
+
+    SYNCHRONIZATION_TIME_SECONDS = 0
+    _sub_task_name: str
+
+    def __init__(
+        self, runner: scenario_runner.ScenarioRunner, config: Any, parent: "Task" = None
+    ) -> None:
+        super().__init__(runner, config, parent)
+        self._started = 0
+
+    @property
+    @abstractmethod
+    def _total(self) -> int:
+        """Number of sub-tasks."""
+
+    @property
+    @abstractmethod
+    def _concurrency(self) -> int:
+        """Maximum number of sub-tasks existing at the same time."""
+
+    @abstractmethod
+    def _generate(self) -> Iterator[dict]:
+        """Yield the configs of the sub-tasks."""
+
+    def _run(self, *args, **kwargs):  # pylint: disable=unused-argument
+        task_class = get_task_class_for_type(self._sub_task_name)
+        pool = Pool(size=self._concurrency)
+        for task_config in self._generate():
+            # Blocks while the pool is full
+            pool.wait_available()
+            task = task_class(runner=self._runner, config=task_config, parent=self)
+            pool.start(Greenlet(task))
+            self._started += 1
+        pool.join(raise_error=True)
+
+    @property
+    def _progress(self) -> str:
+        return f"{self._started}/{self._total} {self._sub_task_name}"
+
+    @property
+    def _str_details(self):
+        return f' - {click.style(self._progress, fg="blue")}'
+
+    @property
+    def _urwid_details(self):
+        return [" - ", ("task_name", self._progress)]
+
+
+class OpenTopologyTask(GeneratorTask):
+    """Open the channels of the topology configured in the scenario definition.
+
+    The settings of the `topology` section can be overridden per task.
+
+    Example usage::
+
+        # Open a ring of channels between the first 50 nodes
+        open_topology: {type: ring, nodes: 50, deposit: 1000}
+    """
+
+    _name = "open_topology"
+    _sub_task_name = "open_channel"
+
+    def __init__(
+        self, runner: scenario_runner.ScenarioRunner, config: Any, parent: "Task" = None
+    ) -> None:
+        super().__init__(runner, config, parent)
+        defaults = runner.definition.topology
+        topology = {**defaults.dict, **(config or {})}
+        if not topology:
+            raise ScenarioError("No 'topology' configured in the scenario definition")
+        self._topology = TopologyConfig({"topology": topology}, defaults.node_count)
+
+    @property
+    def _total(self) -> int:
+        return self._topology.channel_count
+
+    @property
+    def _concurrency(self) -> int:
+        return self._topology.concurrency
+
+    def _generate(self) -> Iterator[dict]:
+        for node, partner in self._topology.edges():
+            yield {"from": node, "to": partner, "total_deposit": self._topology.deposit}
+
+
+class RunTrafficTask(GeneratorTask):
+    """Send the payments of the traffic configured in the scenario definition.
+
+    The settings of the `traffic` section can be overridden per task.
+
+    Example usage::
+
+        # 1000 payments, most of them to the first nodes
+        run_traffic: {pattern: zipf, count: 1000, amount: 10, concurrency: 20}
+    """
+
+    _name = "run_traffic"
+    _sub_task_name = "transfer"
+
+    def __init__(
+        self, runner: scenario_runner.ScenarioRunner, config: Any, parent: "Task" = None
+    ) -> None:
+        super().__init__(runner, config, parent)
+        defaults = runner.definition.traffic
+        traffic = {**defaults.dict, **(config or {})}
+        if not traffic:
+            raise ScenarioError("No 'traffic' configured in the scenario definition")
+        self._traffic = TrafficConfig({"traffic": traffic}, defaults.node_count)
+
+    @property
+    def _total(self) -> int:
+        return self._traffic.count
+
+    @property
+    def _concurrency(self) -> int:
+        return self._traffic.concurrency
+
+    def _generate(self) -> Iterator[dict]:
+        for initiator, target in self._traffic.payments():
+            yield {"from": initiator, "to": target, "amount": self._traffic.amount}
@@ -0,0 +1,207 @@
+import time
+from collections import Counter
+from typing import Any, Dict, List, Tuple, Union
+
+import gevent
+import structlog
+from eth_typing import ChecksumAddress
+from gevent.pool import Pool
+from raiden_common.utils.formatting import to_checksum_address
+from requests import RequestException  # type: ignore
+
+from scenario_player import runner as scenario_runner
+from scenario_player.exceptions import ScenarioAssertionError, ScenarioError
+from scenario_player.tasks.base import Task
+
+log = structlog.get_logger(__name__)
+
+# Sweeps start with the first interval, which doubles up to the maximum
+NETWORK_STATE_POLL_INTERVAL = 0.5
+NETWORK_STATE_POLL_INTERVAL_MAX = 10.0
+NETWORK_STATE_REQUEST_TIMEOUT = 30
+NETWORK_STATE_CONCURRENCY = 32
+DEFAULT_NETWORK_STATE_TIMEOUT = 5 * 60
+# Mismatches listed in the error of a failed assertion
+MAX_REPORTED_MISMATCHES = 20
+
+CHANNEL_FIELDS = ("state", "total_deposit", "total_withdraw", "balance")
+
+# A channel as seen by a node: (node, partner)
+ChannelKey = Tuple[int, int]
+
+
+def derive_channels(model: Dict[str, Any]) -> Dict[ChannelKey, Dict[str, Any]]:
+    """Return the expected channels after the deposits, withdraws and transfers of `model`.
+
+    Every deposit opens a channel, seen by both partners. Transfers are
+    modelled along their ``path`` (default: ``[from, to]``), mediation fees are
+    not modelled.
+    """
+    total_deposits: Dict[ChannelKey, int] = {}
+    try:
+        for deposit in model.get("deposits", []):
+            node, partner = int(deposit["from"]), int(deposit["to"])
+            total_deposits[node, partner] = int(deposit["total_deposit"])
+            total_deposits.setdefault((partner, node), 0)
+        total_withdraws = {
+            (int(withdraw["from"]), int(withdraw["to"])): int(withdraw["total_withdraw"])
+            for withdraw in model.get("withdraws", [])
+        }
+        transferred: Dict[ChannelKey, int] = Counter()
+        for transfer in model.get("transfers", []):
+            hops = transfer["path"] if "path" in transfer else [transfer["from"], transfer["to"]]
+            path = [int(node) for node in hops]
+            for hop in zip(path, path[1:]):
+                if hop not in total_deposits:
+                    raise ScenarioError(
+                        f"Transfer over the channel {hop[0]}-{hop[1]}, which has no deposit "
+                        f"in the model"
+                    )
+                transferred[hop] += int(transfer["amount"])
+    except KeyError as ex:
+        raise ScenarioError(f"Missing key {ex} in the model of assert_network_state") from None
+
+    return {
+        (node, partner): {
+            "state": "opened",
+            "total_deposit": total_deposit,
+            "total_withdraw": total_withdraws.get((node, partner), 0),
+            "balance": (
+                total_deposit
+                - total_withdraws.get((node, partner), 0)
+                - transferred[node, partner]
+                + transferred[partner, node]
+            ),
+        }
+        for (node, partner), total_deposit in total_deposits.items()
+    }
+
+
+class AssertNetworkStateTask(Task):
+    """
+    Assert the state of all channels of the network at once.
+
+    Every attempt fetches the channels of all nodes concurrently and checks
+    all expected channels in one pass. The attempts are repeated, starting
+    every `0.5`s and backing off to every `10`s, until all channels are as
+    expected or ``timeout`` seconds (default: 300) passed. The error lists
+    the mismatches of the last attempt.
+
+    Config options:
+
+      - ``channels``: The expected channels as seen by the node ``from``, with
+        any of the fields ``state``, ``total_deposit``, ``total_withdraw`` and
+        ``balance``.
+      - ``model``: Derive the expected channels from the ``deposits``,
+        ``withdraws`` and ``transfers`` since the channels were opened.
+        Transfers take an optional ``path`` of nodes for mediated transfers.
+        Fields given in ``channels`` take precedence.
+
+    Example usages:
+
+        assert_network_state:
+          channels:
+            - {from: 0, to: 1, total_deposit: 10, balance: 9, state: opened}
+            - {from: 1, to: 0, total_deposit: 10, balance: 11, state: opened}
+
+        assert_network_state:
+          model:
+            deposits:
+              - {from: 0, to: 1, total_deposit: 10}
+              - {from: 1, to: 2, total_deposit: 10}
+            transfers:
+              - {from: 0, to: 1, amount: 1}
+              - {path: [0, 1, 2], amount: 2}
+    """
+
+    _name = "assert_network_state"
+    SYNCHRONIZATION_TIME_SECONDS = 0
+
+    def __init__(
+        self, runner: scenario_runner.ScenarioRunner, config: Any, parent: Task = None
+    ) -> None:
+        super().__init__(runner, config, parent)
+        # The task retries itself, to report the mismatches of the last attempt
+        self._state_timeout = self._config.pop("timeout", DEFAULT_NETWORK_STATE_TIMEOUT)
+        self.expected = self._expected_channels(self._config)
+        self._addresses: Dict[int, ChecksumAddress] = {}
+
+    def _expected_channels(self, config: Dict[str, Any]) -> Dict[ChannelKey, Dict[str, Any]]:
+        expected = derive_channels(config["model"]) if "model" in config else {}
+        try:
+            for channel in config.get("channels", []):
+                fields = {field: channel[field] for field in CHANNEL_FIELDS if field in channel}
+                expected.setdefault((int(channel["from"]), int(channel["to"])), {}).update(fields)
+        except KeyError as ex:
+            raise ScenarioError(f"Missing key {ex} in config of {self._name}") from None
+        if not expected:
+            raise ScenarioError(f"{self._name} requires expected `channels` or a `model`.")
+        return expected
+
+    def _address(self, node: int) -> ChecksumAddress:
+        if node not in self._addresses:
+            self._addresses[node] = self._runner.get_node_address(node)
+        return self._addresses[node]
+
+    def _fetch_channels(self, node: int) -> Union[Dict[ChecksumAddress, dict], Exception]:
+        """Return the channels of `node` by partner address, or why they couldn't be fetched."""
+        token_address = to_checksum_address(self._runner.token.address)
+        url = (
+            f"{self._runner.protocol}://{self._runner.get_node_baseurl(node)}"
+            f"/api/v1/channels/{token_address}"
+        )
+        try:
+            response = self._runner.session.get(url, timeout=NETWORK_STATE_REQUEST_TIMEOUT)
+            response.raise_for_status()
+            return {channel["partner_address"]: channel for channel in response.json()}
+        except (RequestException, ValueError, KeyError) as ex:
+            return ex
+
+    def check(self) -> List[str]:
+        """Fetch the channels of all nodes and return the mismatches with the expected ones."""
+        nodes = sorted({node for node, _ in self.expected})
+        pool = Pool(NETWORK_STATE_CONCURRENCY)
+        channels_by_node = dict(zip(nodes, pool.map(self._fetch_channels, nodes)))
+
+        mismatches = [
+            f"node {node}: request failed: {channels!r}"
+            for node, channels in channels_by_node.items()
+            if isinstance(channels, Exception)
+        ]
+        for (node, partner), fields in self.expected.items():
+            channels = channels_by_node[node]
+            if isinstance(channels, Exception):
+                continue
+            channel = channels.get(self._address(partner))
+            if channel is None:
+                mismatches.append(f"node {node} has no channel with {partner}")
+                continue
+            mismatches.extend(
+                f"{node}->{partner}: {field} is {channel.get(field)}, expected {value}"
+                for field, value in fields.items()
+                if str(channel.get(field)) != str(value)
+            )
+        return mismatches
+
+    def _run(self, *args, **kwargs):  # pylint: disable=unused-argument
+        deadline = time.monotonic() + self._state_timeout
+        interval = NETWORK_STATE_POLL_INTERVAL
+        while True:
+            mismatches = self.check()
+            if not mismatches:
+                log.debug("Network state as expected", channels=len(self.expected))
+                return True
+            if time.monotonic() + interval > deadline:
+                break
+            log.debug("Network state not as expected yet", mismatches=mismatches[:3])
+            gevent.sleep(interval)
+            interval = min(interval * 2, NETWORK_STATE_POLL_INTERVAL_MAX)
+
+        self._runner.node_controller.send_debugging_signal()
+        reported = "; ".join(mismatches[:MAX_REPORTED_MISMATCHES])
+        if len(mismatches) > MAX_REPORTED_MISMATCHES:
+            reported += f"; ... {len(mismatches) - MAX_REPORTED_MISMATCHES} more"
+        raise ScenarioAssertionError(
+            f"Network state not as expected after {self._state_timeout}s, "
+            f"{len(mismatches)} mismatches: {reported}"
+        )
@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Union
 
 import structlog
 from eth_typing import ChecksumAddress
@@ -7,6 +7,7 @@ from scenario_player import runner as scenario_runner
 from scenario_player.exceptions import ScenarioAssertionError, ScenarioError
 from scenario_player.tasks.api_base import RESTAPIActionTask
 from scenario_player.tasks.base import Task
+from scenario_player.utils.multiset import multiset_diff
 
 log = structlog.get_logger(__name__)
 
@@ -177,6 +178,27 @@ class AssertPFSHistoryTask(RESTAPIActionTask):
     _url_template = "{pfs_url}/api/v1/_debug/routes/{token_network_address}/{source_address}{extra_params}"  # noqa
     DEFAULT_TIMEOUT = 5 * 60  # 5 minutes
 
+    def __init__(
+        self, runner: scenario_runner.ScenarioRunner, config: Any, parent: Task = None
+    ) -> None:
+        super().__init__(runner, config, parent)
+        self._expected_routes: Optional[List[tuple]] = None
+
+    def compile(self) -> None:
+        super().compile()
+        self._expected_routes = [
+            tuple(self._runner.get_node_address(node) for node in route)
+            for route in self._config.get("expected_routes") or []
+        ]
+
+    @property
+    def expected_routes(self) -> List[tuple]:
+        """The expected routes as tuples of addresses, resolved on compilation."""
+        if self._expected_routes is None:
+            self.compile()
+        assert self._expected_routes is not None
+        return self._expected_routes
+
     @property
     def _url_params(self):
         pfs_url = self._runner.definition.settings.services.pfs.url
@@ -249,29 +271,27 @@ class AssertPFSHistoryTask(RESTAPIActionTask):
         else:
             actual_routes = list(actual_routes)
 
-        node_address_to_index = self._runner.node_controller.address_to_index
-        actual_routes_indices = [
-            [node_address_to_index.get(hop, hop) for hop in actual_route]
-            for actual_route in actual_routes
-        ]
-
         exp_routes: List[List[Union[ChecksumAddress, int]]] = self._config.get("expected_routes")
         if exp_routes:
             if len(exp_routes) != len(actual_routes):
                 raise ScenarioAssertionError(
                     f"Expected {len(exp_routes)} routes but got {len(actual_routes)}."
                 )
-            for exp_route in exp_routes:
-                exp_route_addr: tuple = tuple(
-                    self._runner.get_node_address(node) for node in exp_route
+            diff = multiset_diff(self.expected_routes, actual_routes)
+            if diff:
+                node_address_to_index = self._runner.node_controller.address_to_index
+
+                def route_indices(route: tuple) -> List[Union[ChecksumAddress, int]]:
+                    return [node_address_to_index.get(hop, hop) for hop in route]
+
+                # There are as many expected as actual routes, so some are missing
+                missing_route = next(iter(diff.missing))
+                actual_routes_indices = [route_indices(route) for route in actual_routes]
+                raise ScenarioAssertionError(
+                    f"Expected route {route_indices(missing_route)} not found. "
+                    f"Actual routes: {actual_routes_indices}. "
+                    f"Route mismatch, {diff.format(lambda route: str(route_indices(route)))}"
                 )
-                try:
-                    actual_routes.remove(exp_route_addr)
-                except ValueError as ex:
-                    raise ScenarioAssertionError(
-                        f"Expected route {exp_route} not found. "
-                        f"Actual routes: {actual_routes_indices}."
-                    ) from ex
 
         exp_fees = self._config.get("expected_fees")
         if exp_fees:
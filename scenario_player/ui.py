@@ -1,14 +1,16 @@
 import logging
 import sys
+from collections import deque
 from operator import itemgetter
+from typing import Any, Deque, List, Set
 
 import gevent
 import structlog
 import urwid as uwd
 from structlog.stdlib import ProcessorFormatter
-from urwid import SimpleFocusListWalker
 
 from scenario_player.runner import ScenarioRunner
+from scenario_player.tasks.base import TaskState
 from scenario_player.utils import ConcatenableNone
 
 PALETTE = [
@@ -40,6 +42,12 @@ log = structlog.get_logger(__name__)
 
 EVENT_LEN = 30
 
+# Seconds between two refreshes of the screen
+UI_REFRESH_INTERVAL = 0.25
+
+# Older lines are only kept in the log file
+DEFAULT_LOG_BUFFER_LINES = 10_000
+
 LOGGING_PROCESSORS = [
     structlog.stdlib.add_logger_name,
     structlog.stdlib.add_log_level,
@@ -66,31 +74,75 @@ class SelectableText(uwd.Text):
         return key
 
 
-class UrwidLogWalker(SimpleFocusListWalker):
+class UrwidLogWalker(uwd.ListWalker):
+    """Log pane content, keeping only the last `capacity` lines.
+
+    The lines are stored as text markup, widgets are only created for the
+    lines urwid asks for, i.e. the visible ones. Positions are the absolute
+    line numbers, so they stay valid while old lines are dropped.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_LOG_BUFFER_LINES):
+        self._lines: Deque[Any] = deque(maxlen=capacity)
+        # Absolute position of the first buffered line
+        self._first = 0
+        self.focus = 0
+
     def write(self, content):
-        if not (content is None or isinstance(content, ConcatenableNone)):
-            self.extend(
-                [
-                    uwd.AttrMap(SelectableText(line, wrap="clip"), None, focus_map="log_focus")
-                    for line in content.msg
-                ]
-            )
+        if content is None or isinstance(content, ConcatenableNone):
+            return
 
-    def _adjust_focus_on_contents_modified(self, slc: slice, new_items=()):
-        own_len = len(self)
-        is_append = (
-            slc.start == slc.stop == self._focus + 1 == own_len
-            and slc.step is None
-            and len(new_items)
-        )
-        if is_append:
-            # Append to end and we're at the end - follow
-            return own_len + len(new_items) - 1
-        return super()._adjust_focus_on_contents_modified(slc, new_items)
+        following = self.at_end
+        dropped = max(0, len(self._lines) + len(content.msg) - self._lines.maxlen)
+        self._lines.extend(content.msg)
+        self._first += dropped
+
+        if following:
+            self.focus = self.last_position
+        else:
+            self.focus = max(self.focus, self._first)
+        self._modified()
+
+    def __len__(self):
+        return len(self._lines)
+
+    @property
+    def line_count(self) -> int:
+        """The number of lines logged, including the dropped ones."""
+        return self._first + len(self._lines)
+
+    @property
+    def last_position(self) -> int:
+        return self._first + max(len(self._lines) - 1, 0)
 
     @property
     def at_end(self):
-        return self._focus == len(self) - 1
+        return self.focus >= self.last_position
+
+    def follow(self):
+        self.set_focus(self.last_position)
+
+    def _widget(self, position):
+        if not self._first <= position <= self.last_position or not self._lines:
+            return None, None
+        line = self._lines[position - self._first]
+        return (
+            uwd.AttrMap(SelectableText(line, wrap="clip"), None, focus_map="log_focus"),
+            position,
+        )
+
+    def get_focus(self):
+        return self._widget(self.focus)
+
+    def set_focus(self, position):
+        self.focus = position
+        self._modified()
+
+    def get_next(self, position):
+        return self._widget(position + 1)
+
+    def get_prev(self, position):
+        return self._widget(position - 1)
 
 
 class UrwidLogRenderer:
@@ -157,21 +209,52 @@ class TaskTreeNode(uwd.ParentNode):
 
 
 class TaskWidget(uwd.TreeWidget):
-    def __init__(self, node):
-        super().__init__(node)
-        gevent.spawn(self._update_display_text)
-
     def get_display_text(self):
         return self._node.get_value().urwid_label
 
-    def _update_display_text(self):
-        while True:
-            if self._innerwidget:
-                self._innerwidget.set_text(self.get_display_text())
-                if self._node.get_value().done:
-                    # Stop updating once the task has entered a final state
-                    return
-            gevent.sleep(0.25)
+    def update_display_text(self):
+        if self._innerwidget:
+            self._innerwidget.set_text(self.get_display_text())
+
+
+class TaskTreeListBox(uwd.TreeListBox):
+    """Task tree that only updates the labels of the tasks on screen."""
+
+    def __init__(self, walker):
+        super().__init__(walker)
+        self._last_size = None
+        self._last_focus = False
+
+    def render(self, size, focus=False):
+        self._last_size = size
+        self._last_focus = focus
+        return super().render(size, focus)
+
+    def visible_widgets(self) -> List[TaskWidget]:
+        """Return the widgets of the last rendered screen.
+
+        Collapsed tasks and tasks outside of the screen are not included.
+        """
+        if self._last_size is None:
+            return []
+        middle, top, bottom = self.calculate_visible(self._last_size, self._last_focus)
+        if middle is None:
+            return []
+        above = [widget for widget, _, _ in top[1]]
+        below = [widget for widget, _, _ in bottom[1]]
+        return [*reversed(above), middle[1], *below]
+
+    def refresh(self, dirty_tasks: Set[str]) -> None:
+        """Update the visible tasks whose state changed, and running tasks for their duration.
+
+        Updated tasks are removed from `dirty_tasks`, tasks that are not
+        visible stay dirty until they are shown.
+        """
+        for widget in self.visible_widgets():
+            task = widget.get_node().get_value()
+            if task.id in dirty_tasks or task.state is TaskState.RUNNING:
+                widget.update_display_text()
+                dirty_tasks.discard(task.id)
 
 
 class TabFocusSwitchingPile(uwd.Pile):
@@ -198,9 +281,13 @@ class ScenarioUI:
         self._log_walker = log_walker
         self._log_file_name = log_file_name
 
-        self._task_box = uwd.LineBox(self._task_widget, title="Tasks", title_align="left")
+        # Ids of the tasks whose state changed since their widget was last updated
+        self._dirty_tasks: Set[str] = set()
+        runner.task_state_callbacks.append(self._task_state_changed)
+
+        self._task_list_box = self._task_widget
+        self._task_box = uwd.LineBox(self._task_list_box, title="Tasks", title_align="left")
         self._log_box = uwd.LineBox(self._log_widget, title="Log", title_align="left")
-        uwd.connect_signal(self._log_walker, "modified", self._update_log_box_title)
         self._header_text = uwd.Text("")
         self._status_text = uwd.Text("")
         self._update_header_text()
@@ -227,17 +314,23 @@ class ScenarioUI:
         if not sys.stdout.isatty():
             return gevent.spawn(lambda: True)
 
-        def _wakeup():
-            # Force loop wakeup every 250 milliseconds to update screen
-            self._loop.event_loop.alarm(0.25, _wakeup)
+        def _tick():
+            # Refresh changed widgets, the loop redraws the screen after every alarm
+            self._task_list_box.refresh(self._dirty_tasks)
+            self._update_header_text()
+            self._update_log_box_title()
+            self._loop.event_loop.alarm(UI_REFRESH_INTERVAL, _tick)
 
-        _wakeup()
+        _tick()
         return gevent.spawn(self._loop.run)
 
+    def _task_state_changed(self, runner, task, state):  # pylint: disable=unused-argument
+        self._dirty_tasks.add(task.id)
+
     @property
     def _task_widget(self):
         tree = TaskTreeNode(self._runner.root_task, key=self._runner.root_task.id)
-        return uwd.TreeListBox(uwd.TreeWalker(tree))
+        return TaskTreeListBox(uwd.TreeWalker(tree))
 
     @property
     def _log_widget(self):
@@ -269,7 +362,7 @@ class ScenarioUI:
             self._runner.node_controller.stop()
             raise uwd.ExitMainLoop()
         elif key == "f":
-            self._log_walker.set_focus(len(self._log_walker) - 1)
+            self._log_walker.follow()
         elif key in {"up", "down", "page up", "page down"}:
             self._root_widget.body.focus.original_widget.original_widget.keypress(
                 self._loop.screen_size, key
@@ -280,7 +373,9 @@ class ScenarioUI:
             focus = ", following"
         else:
             focus = f" @ {self._log_walker.focus}"
-        self._log_box.set_title(f"Log - {len(self._log_walker)} lines{focus}")
+        title = f"Log - {self._log_walker.line_count} lines{focus}"
+        if title != self._log_box.title_widget.text.strip():
+            self._log_box.set_title(title)
 
     def set_success(self, success):
         if success:
@@ -289,9 +384,12 @@ class ScenarioUI:
             self._loop.screen.register_palette_entry("focus", "dark red", "default")
 
 
-def attach_urwid_logbuffer():
-    """Enable formatted text output for the console UI."""
-    log_buffer = UrwidLogWalker([])
+def attach_urwid_logbuffer(capacity: int = DEFAULT_LOG_BUFFER_LINES):
+    """Enable formatted text output for the console UI.
+
+    At most `capacity` log lines are kept for the UI.
+    """
+    log_buffer = UrwidLogWalker(capacity)
     for handler in logging.getLogger("").handlers:
         if isinstance(handler, logging.StreamHandler):
             handler.terminator = ConcatenableNone()  # type: ignore
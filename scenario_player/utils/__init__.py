@@ -1,13 +1,16 @@
-from scenario_player.utils.legacy import (
-    ConcatenableNone,
-    DummyStream,
-    TimeOutHTTPAdapter,
-    wait_for_txs,
-)
-
 __all__ = [
     "TimeOutHTTPAdapter",
     "ConcatenableNone",
     "DummyStream",
     "wait_for_txs",
 ]
+
+
+def __getattr__(name):
+    # Import `legacy` (and with it web3) only when one of its names is used,
+    # so that `scenario_player.utils.cli` stays cheap to import for the CLI.
+    if name in __all__:
+        from scenario_player.utils import legacy
+
+        return getattr(legacy, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
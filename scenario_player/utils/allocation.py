@@ -0,0 +1,248 @@
+"""Allocation of the resources of scenario runs that must not collide between
+concurrent runs on the same host, e.g. run numbers, seeds and ports.
+
+All allocations are done while holding an advisory lock (``flock``) on a
+``.lock`` file next to the allocated file, and the allocated values are
+written atomically, so a crashed run never leaves a partially written file.
+"""
+import errno
+import fcntl
+import itertools
+import json
+import os
+import re
+import socket
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import gevent
+import structlog
+
+from scenario_player.constants import RUN_NUMBER_FILENAME
+from scenario_player.exceptions import ScenarioError
+
+log = structlog.get_logger(__name__)
+
+# Seconds between two attempts to acquire a held lock
+LOCK_RETRY_INTERVAL = 0.01
+
+NODE_DATADIR_RE = re.compile(r"^node_(\d+)_\d+$")
+
+PORT_LEASES_FILENAME = "port_leases.json"
+# Below the ephemeral port range of Linux, so outgoing connections don't
+# take the ports of the nodes.
+PORT_RANGE_START = 20_000
+PORT_RANGE_END = 32_000
+PORT_HOST = "127.0.0.1"
+
+_lease_ids = itertools.count()
+
+
+@contextmanager
+def file_lock(lock_file: Path) -> Iterator[None]:
+    """Hold an exclusive advisory lock on `lock_file`.
+
+    The lock is polled instead of blocking on it, so that other greenlets
+    keep running. The lock is released by the OS if the process dies.
+    """
+    lock_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_file, "a") as lock:
+        while True:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError as ex:
+                if ex.errno not in (errno.EAGAIN, errno.EACCES):
+                    raise
+                gevent.sleep(LOCK_RETRY_INTERVAL)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def lock_file_for(path: Path) -> Path:
+    return path.with_name(f".{path.name}.lock")
+
+
+def write_file_atomic(path: Path, content: str) -> None:
+    tmp_file = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_file.write_text(content)
+    tmp_file.replace(path)
+
+
+def highest_used_run_number(scenario_dir: Path) -> Optional[int]:
+    """Return the highest run number of the node data directories in `scenario_dir`."""
+    run_numbers = [
+        int(match.group(1))
+        for match in (NODE_DATADIR_RE.match(path.name) for path in scenario_dir.iterdir())
+        if match
+    ]
+    return max(run_numbers, default=None)
+
+
+def _stored_run_number(scenario_dir: Path, run_number_file: Path) -> Optional[int]:
+    """Return the last run number of the scenario, the run number file must be locked."""
+    try:
+        return int(run_number_file.read_text())
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        highest = highest_used_run_number(scenario_dir)
+        log.warning("Invalid run number file", file=run_number_file, highest=highest)
+        return highest
+
+
+def allocate_run_number(scenario_dir: Path) -> int:
+    """Return the next run number of the scenario and store it.
+
+    Concurrent runs of the same scenario always get different run numbers.
+    If the run number file is unreadable, the numbering continues after the
+    highest run number of the existing node data directories.
+    """
+    run_number_file = scenario_dir.joinpath(RUN_NUMBER_FILENAME)
+    with file_lock(lock_file_for(run_number_file)):
+        last_run_number = _stored_run_number(scenario_dir, run_number_file)
+        run_number = 0 if last_run_number is None else last_run_number + 1
+        write_file_atomic(run_number_file, str(run_number))
+    return run_number
+
+
+def record_run_number(scenario_dir: Path, run_number: int) -> None:
+    """Store `run_number`, allocated elsewhere, e.g. by a suite coordinator, as used.
+
+    The stored run number is only ever raised, so the next allocated run
+    number is higher than `run_number`.
+    """
+    run_number_file = scenario_dir.joinpath(RUN_NUMBER_FILENAME)
+    with file_lock(lock_file_for(run_number_file)):
+        last_run_number = _stored_run_number(scenario_dir, run_number_file)
+        if last_run_number is None or last_run_number < run_number:
+            write_file_atomic(run_number_file, str(run_number))
+
+
+def load_or_create_seed(seed_file: Path, create_seed: Callable[[], str]) -> str:
+    """Return the seed stored in `seed_file`, create and store it with `create_seed` if needed.
+
+    Concurrent first runs all get the same seed.
+    """
+    with file_lock(lock_file_for(seed_file)):
+        try:
+            seed = seed_file.read_text().strip()
+        except FileNotFoundError:
+            seed = ""
+        if not seed:
+            seed = create_seed()
+            write_file_atomic(seed_file, seed)
+    return seed
+
+
+def pid_is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def port_is_free(port: int, host: str = PORT_HOST) -> bool:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    with closing(sock):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind((host, port))
+        except OSError:
+            return False
+    return True
+
+
+class PortRange:
+    """A contiguous range of ports reserved by a :class:`PortAllocator`."""
+
+    def __init__(self, allocator: "PortAllocator", lease_id: str, start: int, count: int):
+        self.allocator = allocator
+        self.lease_id = lease_id
+        self.start = start
+        self.count = count
+        self._ports = iter(range(start, start + count))
+
+    def next_port(self) -> int:
+        try:
+            return next(self._ports)
+        except StopIteration:
+            raise ScenarioError(
+                f"All {self.count} reserved ports from {self.start} are in use"
+            ) from None
+
+    def release(self) -> None:
+        self.allocator.release(self.lease_id)
+
+
+class PortAllocator:
+    """Reserve ranges of ports for the nodes of concurrent scenario runs.
+
+    The reserved ranges are stored with the pid of the reserving process in
+    ``port_leases.json`` of the data path. Ranges of processes that died
+    without releasing them are reused.
+    """
+
+    def __init__(
+        self, data_path: Path, start: int = PORT_RANGE_START, end: int = PORT_RANGE_END
+    ) -> None:
+        self.leases_file = data_path.joinpath(PORT_LEASES_FILENAME)
+        self.start = start
+        self.end = end
+
+    def _load_leases(self) -> Dict[str, dict]:
+        try:
+            leases = json.loads(self.leases_file.read_text())
+        except (OSError, ValueError):
+            return {}
+        return {
+            lease_id: lease for lease_id, lease in leases.items() if pid_is_alive(lease["pid"])
+        }
+
+    def _find_free_range(self, count: int, reserved: List[Tuple[int, int]]) -> int:
+        start = self.start
+        while start + count <= self.end:
+            end = start + count
+            overlap_end = max(
+                (
+                    lease_end
+                    for lease_start, lease_end in reserved
+                    if lease_start < end and start < lease_end
+                ),
+                default=None,
+            )
+            if overlap_end is not None:
+                start = overlap_end
+                continue
+            busy_port = next((port for port in range(start, end) if not port_is_free(port)), None)
+            if busy_port is not None:
+                start = busy_port + 1
+                continue
+            return start
+        raise ScenarioError(f"No {count} free ports between {self.start} and {self.end}")
+
+    def reserve(self, count: int) -> PortRange:
+        """Reserve `count` contiguous ports, which are currently free."""
+        with file_lock(lock_file_for(self.leases_file)):
+            leases = self._load_leases()
+            reserved = [
+                (lease["start"], lease["start"] + lease["count"]) for lease in leases.values()
+            ]
+            start = self._find_free_range(count, reserved)
+            lease_id = f"{os.getpid()}-{next(_lease_ids)}"
+            leases[lease_id] = {"pid": os.getpid(), "start": start, "count": count}
+            write_file_atomic(self.leases_file, json.dumps(leases))
+        log.debug("Ports reserved", start=start, count=count)
+        return PortRange(self, lease_id, start, count)
+
+    def release(self, lease_id: str) -> None:
+        with file_lock(lock_file_for(self.leases_file)):
+            leases = self._load_leases()
+            if leases.pop(lease_id, None) is not None:
+                write_file_atomic(self.leases_file, json.dumps(leases))
@@ -0,0 +1,109 @@
+"""Scan of the transactions sent by a set of accounts in a range of blocks.
+
+The blocks and receipts are fetched concurrently and cached by the
+:class:`ChainScanner`, so scanning an overlapping range again, e.g. for the
+next report of a run, only fetches the new blocks.
+"""
+from dataclasses import dataclass
+from typing import Any, Collection, Dict, List, Optional
+
+import structlog
+from eth_typing import ChecksumAddress
+from eth_utils import decode_hex, encode_hex, to_checksum_address
+from gevent.pool import Pool
+from web3 import Web3
+
+log = structlog.get_logger(__name__)
+
+SCAN_CONCURRENCY = 16
+
+
+@dataclass
+class ScannedTransaction:
+    """A mined transaction with the results of its receipt."""
+
+    hash: str
+    sender: ChecksumAddress
+    to: Optional[ChecksumAddress]
+    block_number: int
+    block_timestamp: int
+    # The first four bytes of the input, None for plain ether transfers
+    selector: Optional[bytes]
+    gas_used: int
+    effective_gas_price: int
+    success: bool
+
+    @property
+    def cost(self) -> int:
+        return self.gas_used * self.effective_gas_price
+
+
+def _to_bytes(value: Any) -> bytes:
+    return decode_hex(value) if isinstance(value, str) else bytes(value)
+
+
+def hash_hex(tx_hash: Any) -> str:
+    """Return a transaction hash given as bytes or hex string as lower case hex string."""
+    return encode_hex(_to_bytes(tx_hash))
+
+
+class ChainScanner:
+    """Cached access to the blocks and receipts of a chain."""
+
+    def __init__(self, web3: Web3, concurrency: int = SCAN_CONCURRENCY) -> None:
+        self.web3 = web3
+        self.concurrency = concurrency
+        self._blocks: Dict[int, Any] = {}
+        self._receipts: Dict[str, Any] = {}
+
+    def block(self, number: int) -> Any:
+        """Return block `number` with its transactions."""
+        if number not in self._blocks:
+            self._blocks[number] = self.web3.eth.get_block(number, full_transactions=True)
+        return self._blocks[number]
+
+    def receipt(self, tx_hash: str) -> Any:
+        if tx_hash not in self._receipts:
+            self._receipts[tx_hash] = self.web3.eth.get_transaction_receipt(tx_hash)
+        return self._receipts[tx_hash]
+
+    def transactions(
+        self, from_block: int, to_block: int, senders: Collection[ChecksumAddress]
+    ) -> List[ScannedTransaction]:
+        """Return the transactions of `senders` mined in the blocks `from_block` to `to_block`."""
+        senders = set(senders)
+        pool = Pool(self.concurrency)
+        sent = [
+            (block, transaction)
+            for block in pool.imap(self.block, range(from_block, to_block + 1))
+            for transaction in block["transactions"]
+            if to_checksum_address(transaction["from"]) in senders
+        ]
+        hashes = [hash_hex(transaction["hash"]) for _, transaction in sent]
+        receipts = pool.imap(self.receipt, hashes)
+
+        scanned = []
+        for (block, transaction), tx_hash, receipt in zip(sent, hashes, receipts):
+            data = _to_bytes(transaction["input"])
+            to = transaction.get("to")
+            scanned.append(
+                ScannedTransaction(
+                    hash=tx_hash,
+                    sender=to_checksum_address(transaction["from"]),
+                    to=to_checksum_address(to) if to else None,
+                    block_number=block["number"],
+                    block_timestamp=block["timestamp"],
+                    selector=data[:4] if data else None,
+                    gas_used=receipt["gasUsed"],
+                    # Receipts of blocks before EIP-1559 have no effective gas price
+                    effective_gas_price=receipt.get("effectiveGasPrice", transaction["gasPrice"]),
+                    success=receipt.get("status", 1) == 1,
+                )
+            )
+        log.debug(
+            "Chain scanned",
+            from_block=from_block,
+            to_block=to_block,
+            transactions=len(scanned),
+        )
+        return scanned
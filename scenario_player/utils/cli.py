@@ -0,0 +1,40 @@
+import click
+
+# Keep the imports of this module light, it is imported by the CLI entry point.
+
+
+class AddressType(click.ParamType):
+    """`raiden_common.utils.cli.AddressType`, imported only once a value is converted."""
+
+    name = "address"
+
+    def convert(self, value, param, ctx):
+        from raiden_common.utils.cli import AddressType as RaidenAddressType
+
+        return RaidenAddressType().convert(value, param, ctx)
+
+
+class DummyStream:
+    def write(self, content):
+        pass
+
+
+class MutuallyExclusiveOption(click.Option):
+    def __init__(self, *args, **kwargs):
+        self.mutually_exclusive = set(kwargs.pop("mutually_exclusive", []))
+        help_ = kwargs.get("help", "")
+        if self.mutually_exclusive:
+            ex_str = ", ".join(self.mutually_exclusive)
+            kwargs["help"] = help_ + (
+                " NOTE: This argument is mutually exclusive with " " arguments: [" + ex_str + "]."
+            )
+        super(MutuallyExclusiveOption, self).__init__(*args, **kwargs)
+
+    def handle_parse_result(self, ctx, opts, args):
+        if self.mutually_exclusive.intersection(opts) and self.name in opts:
+            raise click.UsageError(
+                f"Illegal usage: {self.name} is mutually exclusive with "
+                f"arguments {', '.join(self.mutually_exclusive)}."
+            )
+
+        return super(MutuallyExclusiveOption, self).handle_parse_result(ctx, opts, args)
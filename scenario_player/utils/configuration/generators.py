@@ -0,0 +1,325 @@
+import itertools
+import random
+from typing import Iterator, List, Tuple
+
+import structlog
+
+from scenario_player.exceptions.config import GeneratorConfigurationError
+
+log = structlog.get_logger(__name__)
+
+Edge = Tuple[int, int]
+
+TOPOLOGY_HUB = "hub"
+TOPOLOGY_RING = "ring"
+TOPOLOGY_RANDOM_REGULAR = "random_regular"
+TOPOLOGY_SCALE_FREE = "scale_free"
+TOPOLOGY_TYPES = (TOPOLOGY_HUB, TOPOLOGY_RING, TOPOLOGY_RANDOM_REGULAR, TOPOLOGY_SCALE_FREE)
+
+TRAFFIC_UNIFORM = "uniform"
+TRAFFIC_ZIPF = "zipf"
+TRAFFIC_PATTERNS = (TRAFFIC_UNIFORM, TRAFFIC_ZIPF)
+
+# Sub-tasks of a generator task existing at the same time, unless `concurrency` is given
+DEFAULT_CONCURRENCY = 10
+
+# Creating a random regular graph can get stuck with a few unmatched stubs
+# left, in which case it is started over.
+RANDOM_REGULAR_MAX_ATTEMPTS = 100
+
+
+def hub_edges(node_count: int, hub: int) -> Iterator[Edge]:
+    """Every node opens a channel with the `hub` node."""
+    for node in range(node_count):
+        if node != hub:
+            yield node, hub
+
+
+def ring_edges(node_count: int) -> Iterator[Edge]:
+    """Every node opens a channel with the next node, the last one with the first."""
+    for node in range(node_count):
+        yield node, (node + 1) % node_count
+
+
+def random_regular_edges(node_count: int, degree: int, rng: random.Random) -> List[Edge]:
+    """Return the channels of a random graph in which every node has `degree` partners."""
+    for _ in range(RANDOM_REGULAR_MAX_ATTEMPTS):
+        edges = set()
+        stubs = [node for node in range(node_count) for _ in range(degree)]
+        while stubs:
+            rng.shuffle(stubs)
+            unmatched = []
+            for node, partner in zip(stubs[::2], stubs[1::2]):
+                edge = (min(node, partner), max(node, partner))
+                if node == partner or edge in edges:
+                    unmatched.extend(edge)
+                else:
+                    edges.add(edge)
+            if len(unmatched) == len(stubs):
+                break
+            stubs = unmatched
+        else:
+            return sorted(edges)
+
+    raise GeneratorConfigurationError(
+        f"Failed to create a random regular topology of {node_count} nodes "
+        f"with degree {degree}."
+    )
+
+
+def scale_free_edges(node_count: int, degree: int, rng: random.Random) -> Iterator[Edge]:
+    """Barabási–Albert graph, every new node opens `degree` channels.
+
+    The partners are chosen with a probability proportional to the number of
+    channels they already have.
+    """
+    partners = list(range(degree))
+    weighted_nodes: List[int] = []
+    for node in range(degree, node_count):
+        for partner in partners:
+            yield node, partner
+        weighted_nodes.extend(partners)
+        weighted_nodes.extend([node] * degree)
+
+        partners = []
+        while len(partners) < degree:
+            partner = rng.choice(weighted_nodes)
+            if partner not in partners:
+                partners.append(partner)
+
+
+class TopologyConfig:
+    """Channel topology generator interface.
+
+    Thin wrapper around the 'topology' setting section of a loaded scenario
+    .yaml file. The channels are opened by the `open_topology` task, which
+    may override any of the settings.
+
+    Example scenario definition::
+
+        >my_scenario.yaml
+        version: 2
+        ...
+        topology:
+          type: random_regular
+          degree: 3
+          deposit: 1_000_000
+        ...
+        scenario:
+          serial:
+            tasks:
+              - open_topology: {}
+    """
+
+    CONFIGURATION_ERROR = GeneratorConfigurationError
+
+    def __init__(self, loaded_definition: dict, node_count: int) -> None:
+        self.dict = loaded_definition.get("topology") or {}
+        self.node_count = node_count
+        if self.dict:
+            self.validate()
+
+    @property
+    def type(self) -> str:
+        return self.dict["type"]
+
+    @property
+    def nodes(self) -> int:
+        """Number of nodes in the topology, the first nodes of the scenario are used."""
+        return self.dict.get("nodes", self.node_count)
+
+    @property
+    def deposit(self) -> int:
+        return self.dict["deposit"]
+
+    @property
+    def hub(self) -> int:
+        return self.dict.get("hub", 0)
+
+    @property
+    def degree(self) -> int:
+        """Channels per node for `random_regular`, new channels per node for `scale_free`."""
+        return self.dict.get("degree", 2)
+
+    @property
+    def seed(self) -> int:
+        return self.dict.get("seed", 0)
+
+    @property
+    def concurrency(self) -> int:
+        return self.dict.get("concurrency", DEFAULT_CONCURRENCY)
+
+    @property
+    def channel_count(self) -> int:
+        if self.type == TOPOLOGY_HUB:
+            return self.nodes - 1
+        elif self.type == TOPOLOGY_RING:
+            return self.nodes
+        elif self.type == TOPOLOGY_RANDOM_REGULAR:
+            return self.nodes * self.degree // 2
+        return (self.nodes - self.degree) * self.degree
+
+    def edges(self) -> Iterator[Edge]:
+        """Lazily generate the `(from, to)` pairs of the channels to open."""
+        rng = random.Random(self.seed)
+        if self.type == TOPOLOGY_HUB:
+            return hub_edges(self.nodes, self.hub)
+        elif self.type == TOPOLOGY_RING:
+            return ring_edges(self.nodes)
+        elif self.type == TOPOLOGY_RANDOM_REGULAR:
+            return iter(random_regular_edges(self.nodes, self.degree, rng))
+        return scale_free_edges(self.nodes, self.degree, rng)
+
+    def validate(self) -> None:
+        """Assert that the given configuration is valid.
+
+        Ensures the following statements are True:
+
+            * `type` is one of the supported topologies
+            * `deposit` is given and a non-negative integer
+            * `nodes` is at least 2 and at most the number of scenario nodes
+            * `hub` is one of the nodes of the topology
+            * `degree` can be satisfied by the number of nodes
+            * `concurrency` is a positive integer
+        """
+        assert self.dict.get("type") in TOPOLOGY_TYPES, (
+            f'Setting "topology.type" must be one of {TOPOLOGY_TYPES}, '
+            f"not {self.dict.get('type')}!"
+        )
+        assert isinstance(
+            self.dict.get("deposit"), int
+        ), 'Setting "topology.deposit" must be a number!'
+        assert self.deposit >= 0, 'Setting "topology.deposit" must not be negative!'
+
+        assert isinstance(self.nodes, int), 'Setting "topology.nodes" must be a number!'
+        assert (
+            2 <= self.nodes <= self.node_count
+        ), f'Setting "topology.nodes" must be between 2 and the node count ({self.node_count})!'
+
+        assert (
+            isinstance(self.concurrency, int) and self.concurrency > 0
+        ), 'Setting "topology.concurrency" must be a positive number!'
+
+        if self.type == TOPOLOGY_HUB:
+            assert 0 <= self.hub < self.nodes, 'Setting "topology.hub" must be a topology node!'
+        elif self.type == TOPOLOGY_RING:
+            assert self.nodes >= 3, "A ring topology needs at least 3 nodes!"
+        elif self.type == TOPOLOGY_RANDOM_REGULAR:
+            assert (
+                0 < self.degree < self.nodes
+            ), 'Setting "topology.degree" must be between 1 and the number of nodes - 1!'
+            assert (
+                self.nodes * self.degree % 2 == 0
+            ), 'The product of "topology.nodes" and "topology.degree" must be even!'
+        elif self.type == TOPOLOGY_SCALE_FREE:
+            assert (
+                0 < self.degree < self.nodes
+            ), 'Setting "topology.degree" must be between 1 and the number of nodes - 1!'
+
+
+class TrafficConfig:
+    """Payment traffic generator interface.
+
+    Thin wrapper around the 'traffic' setting section of a loaded scenario
+    .yaml file. The payments are sent by the `run_traffic` task, which may
+    override any of the settings.
+
+    With the `zipf` pattern the probability of a node being the target of a
+    payment is proportional to `1 / (index + 1) ** exponent`.
+
+    Example scenario definition::
+
+        >my_scenario.yaml
+        version: 2
+        ...
+        traffic:
+          pattern: zipf
+          count: 1000
+          amount: 1_000
+          concurrency: 20
+        ...
+        scenario:
+          serial:
+            tasks:
+              - run_traffic: {}
+              - run_traffic: {pattern: uniform, count: 100}
+    """
+
+    CONFIGURATION_ERROR = GeneratorConfigurationError
+
+    def __init__(self, loaded_definition: dict, node_count: int) -> None:
+        self.dict = loaded_definition.get("traffic") or {}
+        self.node_count = node_count
+        if self.dict:
+            self.validate()
+
+    @property
+    def pattern(self) -> str:
+        return self.dict.get("pattern", TRAFFIC_UNIFORM)
+
+    @property
+    def count(self) -> int:
+        return self.dict["count"]
+
+    @property
+    def amount(self) -> int:
+        return self.dict["amount"]
+
+    @property
+    def nodes(self) -> int:
+        return self.dict.get("nodes", self.node_count)
+
+    @property
+    def exponent(self) -> float:
+        return self.dict.get("exponent", 1.0)
+
+    @property
+    def seed(self) -> int:
+        return self.dict.get("seed", 0)
+
+    @property
+    def concurrency(self) -> int:
+        return self.dict.get("concurrency", DEFAULT_CONCURRENCY)
+
+    def payments(self) -> Iterator[Edge]:
+        """Lazily generate the `(from, to)` pairs of the payments to send."""
+        rng = random.Random(self.seed)
+        nodes = range(self.nodes)
+        if self.pattern == TRAFFIC_ZIPF:
+            weights = [1 / (node + 1) ** self.exponent for node in nodes]
+        else:
+            weights = [1.0] * self.nodes
+        cum_weights = list(itertools.accumulate(weights))
+
+        for _ in range(self.count):
+            initiator = rng.randrange(self.nodes)
+            target = initiator
+            while target == initiator:
+                (target,) = rng.choices(nodes, cum_weights=cum_weights)
+            yield initiator, target
+
+    def validate(self) -> None:
+        """Assert that the given configuration is valid.
+
+        Ensures the following statements are True:
+
+            * `pattern` is one of the supported traffic patterns
+            * `count` and `amount` are given and positive integers
+            * `nodes` is at least 2 and at most the number of scenario nodes
+            * `concurrency` is a positive integer
+        """
+        assert (
+            self.pattern in TRAFFIC_PATTERNS
+        ), f'Setting "traffic.pattern" must be one of {TRAFFIC_PATTERNS}, not {self.pattern}!'
+        for key in ("count", "amount"):
+            assert isinstance(
+                self.dict.get(key), int
+            ), f'Setting "traffic.{key}" must be a number!'
+            assert self.dict[key] > 0, f'Setting "traffic.{key}" must be positive!'
+        assert isinstance(self.nodes, int), 'Setting "traffic.nodes" must be a number!'
+        assert (
+            2 <= self.nodes <= self.node_count
+        ), f'Setting "traffic.nodes" must be between 2 and the node count ({self.node_count})!'
+        assert (
+            isinstance(self.concurrency, int) and self.concurrency > 0
+        ), 'Setting "traffic.concurrency" must be a positive number!'
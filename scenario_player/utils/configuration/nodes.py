@@ -1,6 +1,9 @@
+from typing import Dict, List
+
 import structlog
 
 from scenario_player.exceptions.config import NodeConfigurationError
+from scenario_player.utils.node_logs import NODE_LOG_SEGMENT_SIZE
 
 log = structlog.get_logger(__name__)
 
@@ -26,6 +29,11 @@ class NodesConfig:
             0:
               gas_price: slow
           commands:
+          log_segment_size: 67_108_864
+          compress_logs: true
+          profiling:
+            hub: [0]
+            initiator: [1, 2]
 
     """
 
@@ -64,6 +72,26 @@ class NodesConfig:
         """Node-specific overrides for the CLI options of nodes."""
         return self.dict.get("node_options", {})
 
+    @property
+    def log_segment_size(self) -> int:
+        """Size in bytes at which the stdout and stderr logs of the nodes are rotated."""
+        return self.dict.get("log_segment_size", NODE_LOG_SEGMENT_SIZE)
+
+    @property
+    def compress_logs(self) -> bool:
+        """Compress the rotated node logs and the JSON logs of finished runs."""
+        return self.dict.get("compress_logs", True)
+
+    @property
+    def profiling(self) -> Dict[str, List[int]]:
+        """Nodes started with flamegraph sampling, by their role in the scenario."""
+        return self.dict.get("profiling", {})
+
+    @property
+    def profiled_nodes(self) -> Dict[int, str]:
+        """Return the role of every profiled node."""
+        return {node: role for role, nodes in self.profiling.items() for node in nodes}
+
     @property
     def commands(self) -> dict:
         """Return the commands configured for the nodes."""
@@ -81,6 +109,10 @@ class NodesConfig:
             * If `restore_snapshot` is present it must be a string.
             * If `restore_snapshot` is not None, `reuse_accounts` must be `True`
             * If `node_options` is present, make sure its of type `Dict[int, Dict[str, Any]]`
+            * If `log_segment_size` is present it must be a positive integer
+            * If `compress_logs` is present it must be a boolean
+            * If `profiling` is present, make sure its of type `Dict[str, List[int]]`
+              with the indices of existing nodes, each node having one role
         """
         assert self.dict, "Must specify 'nodes' setting section!"
         assert "count" in self.dict, 'Must specify a "count" setting!'
@@ -108,3 +140,16 @@ class NodesConfig:
             )
             assert all(isinstance(k, int) for k in self.node_options.keys()), msg
             assert all(isinstance(v, dict) for v in self.node_options.values()), msg
+
+        assert (
+            isinstance(self.log_segment_size, int) and self.log_segment_size > 0
+        ), 'Setting "log_segment_size" must be a positive number!'
+        assert isinstance(self.compress_logs, bool), 'Setting "compress_logs" must be boolean!'
+
+        if self.profiling:
+            msg = "profiling must be a dictionary of roles to lists of integer node-ids"
+            assert isinstance(self.profiling, dict), msg
+            assert all(isinstance(nodes, list) for nodes in self.profiling.values()), msg
+            profiled = [node for nodes in self.profiling.values() for node in nodes]
+            assert all(isinstance(node, int) and 0 <= node < self.count for node in profiled), msg
+            assert len(set(profiled)) == len(profiled), "Profiled nodes must have one role!"
@@ -219,6 +219,7 @@ class SettingsConfig:
           timeout: 55
           notify: False
           gas_price: fast
+          channel_sampling_interval: 10
           services:
             <ServicesSettingsConfig>
         ...
@@ -258,6 +259,11 @@ class SettingsConfig:
                 f"{list(GAS_STRATEGIES.keys())}, not {self.gas_price}"
             )
 
+        interval = self.channel_sampling_interval
+        assert (
+            interval is None or interval > 0
+        ), f"channel_sampling_interval must be a positive number of seconds, not {interval}"
+
     @property
     def timeout(self) -> int:
         """Returns the scenario's set timeout in seconds."""
@@ -265,6 +271,16 @@ class SettingsConfig:
         assert isinstance(timeout, int)
         return timeout
 
+    @property
+    def channel_sampling_interval(self) -> Optional[float]:
+        """Return the seconds between two samples of the channels of all nodes.
+
+        Defaults to None, which disables the sampling.
+        """
+        interval = self.dict.get("channel_sampling_interval")
+        assert interval is None or isinstance(interval, (int, float))
+        return interval
+
     @property
     def gas_price(self) -> Union[str, int]:
         """Return the configured gas price for this scenario.
@@ -0,0 +1,61 @@
+"""Stacks in the folded format of flamegraph tools.
+
+Every line of a folded file is a stack from the root to the leaf frame,
+separated by ``;``, followed by a space and the weight of the stack, e.g.
+``run (gevent/greenlet.py:900);_run (tasks/base.py:171) 12``. The files can
+be rendered with ``flamegraph.pl``, speedscope or inferno.
+"""
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Dict, Optional
+
+# Path components kept of the file names in the frames
+FILENAME_PARTS = 2
+MAX_STACK_DEPTH = 128
+
+
+def frame_label(frame: FrameType, line: bool = False) -> str:
+    code = frame.f_code
+    filename = "/".join(Path(code.co_filename).parts[-FILENAME_PARTS:])
+    lineno = frame.f_lineno if line else code.co_firstlineno
+    return f"{code.co_name} ({filename}:{lineno})"
+
+
+def fold_stack(frame: Optional[FrameType], max_depth: int = MAX_STACK_DEPTH) -> str:
+    """Return the stack of `frame` from the root in the folded format.
+
+    The leaf frame is labeled with its current line, the other frames with
+    the first line of their function, so samples aggregate per function.
+    """
+    labels = []
+    leaf = True
+    while frame is not None and len(labels) < max_depth:
+        labels.append(frame_label(frame, line=leaf))
+        leaf = False
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def write_folded(path: Path, stacks: Dict[str, int]) -> Path:
+    """Write `stacks` with their weights to `path`, the heaviest stacks first."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w") as folded:
+        for stack, weight in Counter(stacks).most_common():
+            # Flamegraph tools require integer weights
+            folded.write(f"{stack} {round(weight)}\n")
+    return path
+
+
+def read_folded(path: Path) -> Dict[str, int]:
+    """Return the weights of the stacks in `path`, summed up per stack.
+
+    Lines which aren't a stack with an integer weight are skipped.
+    """
+    stacks: Dict[str, int] = Counter()
+    with path.open(errors="replace") as folded:
+        for line in folded:
+            stack, _, weight = line.rstrip("\n").rpartition(" ")
+            if stack and weight.isdigit():
+                stacks[stack] += int(weight)
+    return stacks
@@ -0,0 +1,33 @@
+"""Payment identifiers generated for the transfers of a scenario.
+
+A generated identifier is the concatenation of the decimal digits
+``1<scenario hash>1<run number:04d>1<transfer count:06d>``, so the scenario,
+run and transfer of a payment can be read from the node logs.
+"""
+import hashlib
+import re
+from typing import NamedTuple, Optional
+
+GENERATED_IDENTIFIER_RE = re.compile(r"^1(\d{1,5})1(\d{4,})1(\d{6})$")
+
+
+class GeneratedIdentifier(NamedTuple):
+    scenario_hash: int
+    run_number: int
+    transfer_count: int
+
+
+def scenario_hash(scenario_name: str) -> int:
+    return int.from_bytes(hashlib.sha256(scenario_name.encode()).digest()[:2], "little")
+
+
+def generate_payment_identifier(scenario_name: str, run_number: int, transfer_count: int) -> int:
+    return int(f"1{scenario_hash(scenario_name)}1{run_number:04d}1{transfer_count:06d}")
+
+
+def parse_payment_identifier(identifier: int) -> Optional[GeneratedIdentifier]:
+    """Return the parts of a generated payment identifier, None for other identifiers."""
+    match = GENERATED_IDENTIFIER_RE.match(str(identifier))
+    if match is None:
+        return None
+    return GeneratedIdentifier(*(int(part) for part in match.groups()))
@@ -1,7 +1,6 @@
 import time
 from typing import Iterable, Optional
 
-import click
 import structlog
 from eth_utils import encode_hex
 from raiden_common.network.rpc.client import TransactionSent
@@ -11,6 +10,7 @@ from web3.exceptions import TransactionNotFound
 from web3.types import TxReceipt
 
 from scenario_player.exceptions import ScenarioTxError
+from scenario_player.utils.cli import DummyStream, MutuallyExclusiveOption  # noqa: F401
 
 log = structlog.get_logger(__name__)
 
@@ -32,32 +32,6 @@ class ConcatenableNone:
         return other
 
 
-class DummyStream:
-    def write(self, content):
-        pass
-
-
-class MutuallyExclusiveOption(click.Option):
-    def __init__(self, *args, **kwargs):
-        self.mutually_exclusive = set(kwargs.pop("mutually_exclusive", []))
-        help_ = kwargs.get("help", "")
-        if self.mutually_exclusive:
-            ex_str = ", ".join(self.mutually_exclusive)
-            kwargs["help"] = help_ + (
-                " NOTE: This argument is mutually exclusive with " " arguments: [" + ex_str + "]."
-            )
-        super(MutuallyExclusiveOption, self).__init__(*args, **kwargs)
-
-    def handle_parse_result(self, ctx, opts, args):
-        if self.mutually_exclusive.intersection(opts) and self.name in opts:
-            raise click.UsageError(
-                f"Illegal usage: {self.name} is mutually exclusive with "
-                f"arguments {', '.join(self.mutually_exclusive)}."
-            )
-
-        return super(MutuallyExclusiveOption, self).handle_parse_result(ctx, opts, args)
-
-
 def wait_for_txs(web3: Web3, transactions: Iterable[TransactionSent], timeout: int = 360):
     start = time.monotonic()
     outstanding = None
@@ -0,0 +1,288 @@
+"""Low-overhead logging for scenarios with a high rate of tasks and requests.
+
+The default ``debug`` log mode writes every event with its full payload to the
+debug log file. The ``lean`` mode keeps the same log files and format, but
+
+  - samples repetitive debug and info events, see :class:`EventSampler`,
+  - truncates large payloads and replaces them by their length and hash,
+    see :class:`PayloadLimiter`,
+  - writes the debug log file in batches from a background thread, see
+    :class:`BackgroundFileHandler`.
+
+Warnings and errors are never sampled.
+"""
+import hashlib
+import logging
+import logging.handlers
+import os
+import reprlib
+import time
+from enum import Enum
+from typing import Any, Dict, FrozenSet, List, MutableMapping, Optional, Union
+
+import structlog
+from gevent import monkey
+
+LOG_MODE_DEBUG = "debug"
+LOG_MODE_LEAN = "lean"
+LOG_MODES = (LOG_MODE_DEBUG, LOG_MODE_LEAN)
+
+# Events logged per task or request, which are sampled in the lean mode
+SAMPLED_EVENTS = frozenset(
+    {
+        "Starting task",
+        "Running task with timeout",
+        "Assertion failed, retrying...",
+        "Task successful",
+        "Requesting",
+        "Received response",
+    }
+)
+SAMPLED_LEVELS = frozenset({"debug", "info"})
+# All of the first events of every interval are logged, then one out of `SAMPLE_RATE`
+SAMPLE_BURST = 100
+SAMPLE_INTERVAL = 1.0
+SAMPLE_RATE = 100
+
+MAX_PAYLOAD_LENGTH = 256
+MAX_PAYLOAD_ITEMS = 16
+# Values of these keys are passed to the renderers unchanged
+UNLIMITED_KEYS = frozenset({"event", "exc_info", "exception", "stack_info"})
+
+LOG_BATCH_SIZE = 1024
+LOG_FLUSH_INTERVAL = 1.0
+LOG_BUFFER_SIZE = 256 * 1024
+
+# The writer must be a native thread and block on a native queue, also when
+# gevent patched the standard library.
+_start_new_thread, _allocate_lock = monkey.get_original(
+    "_thread", ["start_new_thread", "allocate_lock"]
+)
+_NativeQueue, _Empty = monkey.get_original("queue", ["SimpleQueue", "Empty"])
+
+
+class EventSampler:
+    """structlog processor, which samples repetitive events.
+
+    The first `burst` events of every `interval` seconds are logged, after
+    that only one out of `rate`. Logged events of a sampled interval get the
+    key ``sampled`` with the rate, so counts can be estimated from the log.
+    """
+
+    def __init__(
+        self,
+        events: FrozenSet[str] = SAMPLED_EVENTS,
+        burst: int = SAMPLE_BURST,
+        interval: float = SAMPLE_INTERVAL,
+        rate: int = SAMPLE_RATE,
+    ) -> None:
+        self.events = events
+        self.burst = burst
+        self.interval = interval
+        self.rate = rate
+        self.dropped = 0
+        # Start of the current interval and count of events in it, per event
+        self._windows: Dict[str, List[float]] = {}
+
+    def __call__(
+        self, logger: Any, method_name: str, event_dict: MutableMapping[str, Any]
+    ) -> MutableMapping[str, Any]:
+        event = event_dict.get("event")
+        if method_name not in SAMPLED_LEVELS or event not in self.events:
+            return event_dict
+
+        now = time.monotonic()
+        window = self._windows.get(event)
+        if window is None or now - window[0] >= self.interval:
+            window = self._windows[event] = [now, 0]
+        window[1] += 1
+        count = window[1]
+        if count <= self.burst:
+            return event_dict
+        if (count - self.burst) % self.rate:
+            self.dropped += 1
+            raise structlog.DropEvent
+        event_dict["sampled"] = self.rate
+        return event_dict
+
+
+def truncate_payload(value: Union[str, bytes], max_length: int = MAX_PAYLOAD_LENGTH) -> str:
+    """Return the start of `value`, followed by its length and hash."""
+    data = value.encode(errors="replace") if isinstance(value, str) else value
+    head = value[:max_length]
+    if isinstance(head, bytes):
+        head = head.decode(errors="replace")
+    digest = hashlib.blake2b(data, digest_size=8).hexdigest()
+    return f"{head}...<{len(data)} bytes, blake2b {digest}>"
+
+
+def summarize_object(obj: Any) -> str:
+    """Return the type and the name or id of `obj`, without calling its ``__repr__``."""
+    attributes = getattr(obj, "__dict__", None) or {}
+    for key in ("name", "id"):
+        value = attributes.get(key)
+        if isinstance(value, (str, int)) and not isinstance(value, bool):
+            return f"<{type(obj).__name__} {key}={value!r}>"
+    return f"<{type(obj).__name__} at {id(obj):#x}>"
+
+
+class _SummaryRepr(reprlib.Repr):
+    """:class:`reprlib.Repr`, which summarizes objects of non-builtin types.
+
+    The representation of arbitrary objects, e.g. tasks, can be expensive to
+    compute and is truncated anyway, see :func:`summarize_object`.
+    """
+
+    def repr_instance(self, x: Any, level: int) -> str:
+        if type(x).__module__ == "builtins" or isinstance(x, (BaseException, Enum)):
+            return super().repr_instance(x, level)
+        return summarize_object(x)
+
+
+class PayloadLimiter:
+    """structlog processor, which limits the size of the values of an event.
+
+    Strings and bytes longer than `max_length` are truncated, see
+    :func:`truncate_payload`. Containers with more than `max_items` items and
+    other objects are rendered with :mod:`reprlib`, objects of non-builtin types
+    are only summarized, see :func:`summarize_object`.
+    """
+
+    def __init__(
+        self, max_length: int = MAX_PAYLOAD_LENGTH, max_items: int = MAX_PAYLOAD_ITEMS
+    ) -> None:
+        self.max_length = max_length
+        self.max_items = max_items
+        self._repr = _SummaryRepr()
+        self._repr.maxstring = self._repr.maxother = max_length
+        self._repr.maxlist = self._repr.maxtuple = self._repr.maxdict = max_items
+        self._repr.maxset = self._repr.maxfrozenset = max_items
+
+    def __call__(
+        self, logger: Any, method_name: str, event_dict: MutableMapping[str, Any]
+    ) -> MutableMapping[str, Any]:
+        for key, value in event_dict.items():
+            if key in UNLIMITED_KEYS or value is None or isinstance(value, (bool, int, float)):
+                continue
+            if isinstance(value, (str, bytes)):
+                if len(value) > self.max_length:
+                    event_dict[key] = truncate_payload(value, self.max_length)
+            elif isinstance(value, (dict, list, tuple, set, frozenset)):
+                if len(value) > self.max_items:
+                    event_dict[key] = self._repr.repr(value)
+            else:
+                event_dict[key] = self._repr.repr(value)
+        return event_dict
+
+
+class BackgroundFileHandler(logging.Handler):
+    """Handler, which formats records in the caller and writes them from a native thread.
+
+    The formatted records are written in batches of up to `batch_size` lines to
+    a buffered file, which is flushed every `flush_interval` seconds and when
+    no records arrive. :meth:`close` writes the remaining records.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        filename: str,
+        batch_size: int = LOG_BATCH_SIZE,
+        flush_interval: float = LOG_FLUSH_INTERVAL,
+    ) -> None:
+        super().__init__()
+        self.baseFilename = os.path.abspath(filename)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._stream = open(self.baseFilename, "a", buffering=LOG_BUFFER_SIZE, encoding="utf-8")
+        self._queue = _NativeQueue()
+        self._stopped = _allocate_lock()
+        self._stopped.acquire()
+        self._closed = False
+        _start_new_thread(self._write_batches, ())
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._queue.put(self.format(record))
+        except Exception:  # pylint: disable=broad-except
+            self.handleError(record)
+
+    def _next_batch(self) -> Optional[List[Any]]:
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except _Empty:
+            return None
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except _Empty:
+                break
+        return batch
+
+    def _write_batches(self) -> None:
+        last_flush = time.monotonic()
+        unflushed = False
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    # Nothing arrived within the flush interval
+                    if unflushed:
+                        self._stream.flush()
+                        last_flush, unflushed = time.monotonic(), False
+                    continue
+                lines = [line for line in batch if line is not self._STOP]
+                if lines:
+                    self._stream.write("\n".join(lines) + "\n")
+                    unflushed = True
+                if len(lines) < len(batch):
+                    return
+                if unflushed and time.monotonic() - last_flush >= self.flush_interval:
+                    self._stream.flush()
+                    last_flush, unflushed = time.monotonic(), False
+        finally:
+            self._stream.close()
+            self._stopped.release()
+
+    def close(self) -> None:
+        """Write the queued records and close the file."""
+        self.acquire()
+        try:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(self._STOP)
+                self._stopped.acquire()
+        finally:
+            self.release()
+        super().close()
+
+
+def enable_lean_logging(log_file_name: str) -> BackgroundFileHandler:
+    """Switch the logging configured by raiden's ``configure_logging`` to the lean mode.
+
+    The processors are prepended to the structlog processors and the debug log
+    file handler is replaced by a :class:`BackgroundFileHandler` with the same
+    formatter and filters.
+    """
+    config = structlog.get_config()
+    structlog.configure(
+        processors=[structlog.stdlib.filter_by_level, EventSampler(), PayloadLimiter()]
+        + list(config["processors"])
+    )
+
+    root = logging.getLogger()
+    handler = BackgroundFileHandler(log_file_name)
+    for previous in list(root.handlers):
+        if (
+            isinstance(previous, logging.handlers.RotatingFileHandler)
+            and previous.baseFilename == handler.baseFilename
+        ):
+            handler.setLevel(previous.level)
+            handler.setFormatter(previous.formatter)
+            for log_filter in previous.filters:
+                handler.addFilter(log_filter)
+            root.removeHandler(previous)
+            previous.close()
+    root.addHandler(handler)
+    return handler
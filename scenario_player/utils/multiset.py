@@ -0,0 +1,52 @@
+"""Comparison of expected and actual values regardless of their order.
+
+Assertion tasks compare e.g. the balances of all channels of a node or the
+routes returned by a PFS. The values are counted, so comparing is linear in
+the number of values, and the differences are reported with multiplicities.
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Generic, Hashable, Iterable, TypeVar
+
+T = TypeVar("T", bound=Hashable)
+
+# Values shown per kind of difference in `MultisetDiff.format`
+MAX_REPORTED_VALUES = 20
+
+
+@dataclass
+class MultisetDiff(Generic[T]):
+    """The values missing from and unexpected in the actual values, with their counts.
+
+    Both counters keep the order in which the values were first seen.
+    """
+
+    missing: Counter = field(default_factory=Counter)
+    unexpected: Counter = field(default_factory=Counter)
+
+    def __bool__(self) -> bool:
+        return bool(self.missing or self.unexpected)
+
+    def format(self, render: Callable[[T], str] = str) -> str:
+        """Return e.g. ``missing: 90 (2x), 80; unexpected: 50 (3x), 40``."""
+        parts = []
+        for name, counts in (("missing", self.missing), ("unexpected", self.unexpected)):
+            if not counts:
+                continue
+            values = [
+                render(value) if count == 1 else f"{render(value)} ({count}x)"
+                for value, count in list(counts.items())[:MAX_REPORTED_VALUES]
+            ]
+            if len(counts) > MAX_REPORTED_VALUES:
+                values.append(f"... {len(counts) - MAX_REPORTED_VALUES} more")
+            parts.append(f"{name}: {', '.join(values)}")
+        return "; ".join(parts)
+
+
+def multiset_diff(expected: Iterable[T], actual: Iterable[T]) -> MultisetDiff[T]:
+    """Compare `expected` and `actual` as multisets, in linear time."""
+    expected_counts = Counter(expected)
+    actual_counts = Counter(actual)
+    return MultisetDiff(
+        missing=expected_counts - actual_counts, unexpected=actual_counts - expected_counts
+    )
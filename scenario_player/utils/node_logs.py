@@ -0,0 +1,184 @@
+"""Rotated and compressed output files of the Raiden nodes.
+
+The output of a node is written to ``run-XXX.stdout`` (and ``.stderr``)
+until it reaches the segment size. It is then renamed to
+``run-XXX.stdout.<segment>`` and compressed to ``run-XXX.stdout.<segment>.gz``
+in a background thread, while writing continues in a new ``run-XXX.stdout``.
+Once the node exited, the last segment is rotated and compressed as well.
+
+Every log has an index ``run-XXX.stdout.index`` with one JSON line about
+every megabyte of output, e.g. ``{"ts": 1612345678.1, "segment": 3,
+"offset": 1048576}``. :func:`find_log_position` uses it to find the segment
+and offset of a point in time, without reading the logs.
+"""
+import gzip
+import json
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import IO, Any, List, Optional, Tuple, Union
+
+import gevent
+import structlog
+
+log = structlog.get_logger(__name__)
+
+NODE_LOG_SEGMENT_SIZE = 64 * 1024**2
+NODE_LOG_BUFFER_SIZE = 256 * 1024
+# Bytes of output between two entries of the index
+NODE_LOG_INDEX_INTERVAL = 1024**2
+PUMP_CHUNK_SIZE = 64 * 1024
+COMPRESSED_SUFFIX = ".gz"
+
+
+def index_path_for(path: Path) -> Path:
+    return path.with_name(f"{path.name}.index")
+
+
+def segment_path_for(path: Path, segment: int) -> Path:
+    """Return the path of a rotated segment of the log at `path`, compressed or not."""
+    segment_path = path.with_name(f"{path.name}.{segment}")
+    compressed_path = segment_path.with_name(f"{segment_path.name}{COMPRESSED_SUFFIX}")
+    if compressed_path.exists():
+        return compressed_path
+    return segment_path
+
+
+def rotated_segments(path: Path) -> List[int]:
+    segment_re = re.compile(rf"^{re.escape(path.name)}\.(\d+)({re.escape(COMPRESSED_SUFFIX)})?$")
+    return sorted(
+        int(match.group(1))
+        for match in (segment_re.match(candidate.name) for candidate in path.parent.iterdir())
+        if match
+    )
+
+
+def compress_file(path: Path) -> Path:
+    """Compress `path` with gzip, keeping its modification time, and remove it."""
+    compressed_path = path.with_name(f"{path.name}{COMPRESSED_SUFFIX}")
+    with path.open("rb") as source, gzip.open(compressed_path, "wb", compresslevel=6) as target:
+        shutil.copyfileobj(source, target, PUMP_CHUNK_SIZE)
+    shutil.copystat(path, compressed_path)
+    path.unlink()
+    return compressed_path
+
+
+def compress_in_background(path: Path) -> Any:
+    """Compress `path` in a thread of the hub's thread pool, returns its `AsyncResult`."""
+    return gevent.get_hub().threadpool.spawn(compress_file, path)
+
+
+class RotatingLogWriter:
+    """Block buffered writer of a log, which is rotated at `segment_size` bytes."""
+
+    def __init__(
+        self,
+        path: Path,
+        segment_size: int = NODE_LOG_SEGMENT_SIZE,
+        buffer_size: int = NODE_LOG_BUFFER_SIZE,
+        index_interval: int = NODE_LOG_INDEX_INTERVAL,
+        compress: bool = True,
+    ) -> None:
+        self.path = path
+        self.segment_size = segment_size
+        self.buffer_size = buffer_size
+        self.index_interval = index_interval
+        self.compress = compress
+        self.segment = max(rotated_segments(path), default=-1) + 1
+        self._compressions: List[Any] = []
+        self._index = index_path_for(path).open("a", buffering=1)
+        self._open_segment()
+
+    def _open_segment(self) -> None:
+        self._file = self.path.open("ab", buffering=self.buffer_size)
+        self._size = self._file.tell()
+        self._next_index_at = self._size
+
+    def write(self, data: Union[bytes, str]) -> None:
+        if isinstance(data, str):
+            data = data.encode()
+        if self._size >= self._next_index_at:
+            entry = {"ts": round(time.time(), 3), "segment": self.segment, "offset": self._size}
+            self._index.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            self._next_index_at = self._size + self.index_interval
+        self._file.write(data)
+        self._size += len(data)
+        if self._size >= self.segment_size:
+            self.rotate()
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def _close_segment(self) -> None:
+        self._file.close()
+        segment_path = self.path.with_name(f"{self.path.name}.{self.segment}")
+        self.path.rename(segment_path)
+        if self.compress:
+            self._compressions.append(compress_in_background(segment_path))
+        self.segment += 1
+
+    def rotate(self) -> None:
+        """Close the current segment and continue in a new one."""
+        self._close_segment()
+        self._open_segment()
+
+    def close(self) -> None:
+        """Close the log, after the compression of all segments finished.
+
+        If compression is enabled, the last segment is rotated and compressed too.
+        """
+        if self.compress and self._size > 0:
+            self._close_segment()
+        else:
+            self._file.close()
+        self._index.close()
+        for compression in self._compressions:
+            compression.get()
+        self._compressions.clear()
+
+
+def pump_output(stream: IO[bytes], writer: RotatingLogWriter) -> None:
+    """Write the output of a node from `stream` to `writer` until the stream ends."""
+    try:
+        while True:
+            data = stream.read1(PUMP_CHUNK_SIZE)
+            if not data:
+                break
+            writer.write(data)
+    finally:
+        writer.close()
+
+
+def open_log_segment(path: Path) -> IO[bytes]:
+    if path.name.endswith(COMPRESSED_SUFFIX):
+        return gzip.open(path, "rb")
+    return path.open("rb")
+
+
+def find_log_position(path: Path, timestamp: float) -> Tuple[Path, int]:
+    """Return the segment and offset of the log at `path` to read from for `timestamp`.
+
+    The position is at most one index interval before the first output at
+    `timestamp`. The offset is an offset into the uncompressed segment,
+    open the segment with :func:`open_log_segment`.
+    """
+    position: Optional[Tuple[int, int]] = None
+    try:
+        with index_path_for(path).open() as index:
+            for line in index:
+                entry = json.loads(line)
+                if entry["ts"] > timestamp:
+                    break
+                position = (entry["segment"], entry["offset"])
+    except FileNotFoundError:
+        pass
+
+    if position is None:
+        segments = rotated_segments(path)
+        return (segment_path_for(path, segments[0]) if segments else path), 0
+
+    segment, offset = position
+    if segment in rotated_segments(path):
+        return segment_path_for(path, segment), offset
+    return path, offset
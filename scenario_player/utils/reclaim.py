@@ -1,5 +1,6 @@
 import json
 import pathlib
+import re
 import time
 from dataclasses import dataclass
 from itertools import chain as iter_chain
@@ -13,7 +14,7 @@ from gevent.pool import Pool
 from raiden_common.accounts import Account
 from raiden_common.blockchain.events import BlockchainEvents
 from raiden_common.blockchain.filters import RaidenContractFilter
-from raiden_common.constants import BLOCK_ID_LATEST
+from raiden_common.constants import BLOCK_ID_LATEST, TRANSACTION_INTRINSIC_GAS
 from raiden_common.exceptions import InsufficientEth
 from raiden_common.messages.abstract import cached_property
 from raiden_common.network.proxies.custom_token import CustomToken
@@ -61,7 +62,9 @@ from scenario_player.utils.legacy import wait_for_txs
 
 log = structlog.get_logger(__name__)
 
-VALUE_TX_GAS_COST = 21_000
+RUN_LOG_RE = re.compile(r"^run-(\d+)\.log")
+# The client sends ether with this gas limit, the balance must cover all of it
+VALUE_TX_GAS_LIMIT = TRANSACTION_INTRINSIC_GAS
 
 
 @dataclass
@@ -103,6 +106,11 @@ class ReclamationCandidate:
         return self._proxy_manager_cache[self.address]
 
 
+def _run_number(log_path: Path) -> int:
+    match = RUN_LOG_RE.match(log_path.name)
+    return int(match.group(1)) if match else -1
+
+
 def get_reclamation_candidates(
     data_path: pathlib.Path, min_age_hours: int
 ) -> List[ReclamationCandidate]:
@@ -111,16 +119,8 @@ def get_reclamation_candidates(
         if (node_dir / "reclaimed").exists():
             continue
 
-        last_run = next(
-            iter(
-                sorted(
-                    node_dir.glob("run-*.log*"),
-                    key=lambda p: p.stat().st_mtime,
-                    reverse=True,
-                )
-            ),
-            None,
-        )
+        # The JSON logs of the runs, compressed or not, only the log of the last run is stat'ed
+        last_run = max(node_dir.glob("run-*.log*"), key=_run_number, default=None)
         # If there is no last run assume we can reclaim
         if last_run:
             age_hours = (time.time() - last_run.stat().st_mtime) / 3600
@@ -292,7 +292,7 @@ def reclaim_eth(reclamation_candidates: List[ReclamationCandidate], account: Acc
     txs = []
     reclaim_amount = 0
     gas_price = web3.eth.gasPrice
-    reclaim_tx_cost = gas_price * VALUE_TX_GAS_COST
+    reclaim_tx_cost = gas_price * VALUE_TX_GAS_LIMIT
 
     log.info("Checking chain for claimable ETH")
     for node in reclamation_candidates:
@@ -0,0 +1,124 @@
+import json
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+import pytest
+from eth_utils import to_checksum_address
+from raiden_common.accounts import Account
+from raiden_common.settings import RAIDEN_CONTRACT_VERSION
+from raiden_contracts.constants import CHAINNAME_TO_ID
+from raiden_contracts.contract_manager import ContractManager, contracts_precompiled_path
+
+from scenario_player import tasks
+from scenario_player.tasks.base import collect_tasks
+from tests.benchmarks.fake_chain import FakeChain, FakeChainServer, FakeCustomToken
+from tests.benchmarks.utils import (
+    ORCHESTRATION_BALANCE,
+    ORCHESTRATION_PASSWORD,
+    ORCHESTRATION_PRIVKEY,
+    FakeEnvironment,
+    make_keyfile,
+)
+
+# RPC counts are deterministic, the tolerance only avoids failing on
+# intentional changes in the order of a few requests.
+RPC_CALLS_TOLERANCE = 0.05
+
+
+@pytest.fixture(scope="session", autouse=True)
+def registered_tasks():
+    collect_tasks(tasks)
+
+
+@pytest.fixture(scope="session")
+def contract_manager() -> ContractManager:
+    return ContractManager(contracts_precompiled_path(RAIDEN_CONTRACT_VERSION))
+
+
+@pytest.fixture
+def orchestration_account(tmp_path) -> Account:
+    keystore_file = tmp_path.joinpath("orchestration.keystore")
+    keystore_file.write_text(
+        json.dumps(make_keyfile(ORCHESTRATION_PRIVKEY, ORCHESTRATION_PASSWORD))
+    )
+    return Account(
+        json.loads(keystore_file.read_text()), ORCHESTRATION_PASSWORD, str(keystore_file)
+    )
+
+
+@pytest.fixture
+def fake_environment_factory(
+    contract_manager, orchestration_account
+) -> Iterator[Callable[..., FakeEnvironment]]:
+    """Return a factory for fresh fake chains.
+
+    Every benchmark round needs its own chain, otherwise the setup finds the
+    accounts already funded and skips the transactions.
+    """
+    servers: List[FakeChainServer] = []
+
+    def factory(funded_accounts: Optional[Dict[str, int]] = None) -> FakeEnvironment:
+        chain = FakeChain(contract_manager, chain_id=CHAINNAME_TO_ID["smoketest"])
+        deployer = to_checksum_address(orchestration_account.address)
+        chain.fund(deployer, ORCHESTRATION_BALANCE)
+        for address, amount in (funded_accounts or {}).items():
+            chain.fund(address, amount)
+
+        deployment_data = chain.deploy_raiden_contracts(deployer)
+        transfer_token = chain.deploy(deployer, FakeCustomToken, 0, 18, "Transfer", "TTT")
+        chain.register_token_network(transfer_token)
+
+        server = FakeChainServer(chain).start()
+        servers.append(server)
+        return FakeEnvironment(
+            server=server, deployment_data=deployment_data, transfer_token=transfer_token
+        )
+
+    yield factory
+
+    for server in servers:
+        server.stop()
+
+
+def _load_rpc_call_baseline(config) -> Dict[str, int]:
+    """Return the RPC counts of the most recent saved benchmark run."""
+    storage = config.getoption("benchmark_storage", None)
+    if not storage or not storage.startswith("file://"):
+        return {}
+
+    saved_runs = sorted(
+        Path(storage[len("file://") :]).glob("*/*.json"), key=lambda path: path.name
+    )
+    if not saved_runs:
+        return {}
+
+    baseline = json.loads(saved_runs[-1].read_text())
+    return {
+        benchmark["fullname"]: benchmark["extra_info"]["rpc_calls"]
+        for benchmark in baseline.get("benchmarks", [])
+        if "rpc_calls" in benchmark.get("extra_info", {})
+    }
+
+
+@pytest.fixture(scope="session")
+def rpc_call_baseline(pytestconfig) -> Dict[str, int]:
+    return _load_rpc_call_baseline(pytestconfig)
+
+
+@pytest.fixture
+def record_rpc_calls(benchmark, request, rpc_call_baseline) -> Callable[[FakeChain], None]:
+    """Store the RPC counts of the last round and compare them to the saved baseline."""
+
+    def record(chain: FakeChain) -> None:
+        rpc_calls = sum(chain.rpc_calls.values())
+        benchmark.extra_info["rpc_calls"] = rpc_calls
+        benchmark.extra_info["rpc_calls_by_method"] = dict(chain.rpc_calls.most_common())
+
+        expected = rpc_call_baseline.get(request.node.nodeid)
+        if expected is not None:
+            assert rpc_calls <= expected * (1 + RPC_CALLS_TOLERANCE), (
+                f"RPC call count regressed from {expected} to {rpc_calls}: "
+                f"{benchmark.extra_info['rpc_calls_by_method']}"
+            )
+
+    return record
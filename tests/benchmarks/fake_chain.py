@@ -0,0 +1,1310 @@
+"""An in-process stand-in for an Ethereum JSON-RPC node.
+
+The :class:`FakeChain` implements the subset of the JSON-RPC interface that
+the scenario player and the ``raiden_common`` proxies use during environment
+setup and reclamation, and the contract functions of the Raiden contracts
+which are exercised along the way (``CustomToken``, ``UserDeposit``,
+``TokenNetworkRegistry`` and ``TokenNetwork``).
+
+Block production is deterministic: every accepted transaction is mined in
+its own block, which is followed by ``confirmation_blocks`` empty blocks.
+This way a transaction is confirmed as soon as ``eth_sendRawTransaction``
+returns, and the number of requests a code path needs does not depend on
+timing.
+
+State is only kept for the latest block. Block identifiers are validated,
+but queries against older blocks are answered with the latest state.
+
+:class:`FakeChainServer` exposes a chain over HTTP, together with the two
+Raiden REST endpoints the setup waits on (``/api/v1/status`` and
+``/api/v1/tokens/<token_address>``), so that all nodes of a scenario can
+point their ``api-address`` at it, and a matrix ``known_servers.json`` list
+for environment files.
+"""
+import json
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Tuple, Type
+from urllib.parse import urlparse
+
+import rlp
+from eth_abi import decode_abi, encode_abi, encode_single
+from eth_account import Account
+from eth_utils import (
+    big_endian_to_int,
+    decode_hex,
+    encode_hex,
+    function_abi_to_4byte_selector,
+    is_checksum_address,
+    keccak,
+    to_canonical_address,
+    to_checksum_address,
+)
+from raiden_contracts.constants import (
+    CONTRACT_CUSTOM_TOKEN,
+    CONTRACT_SECRET_REGISTRY,
+    CONTRACT_TOKEN_NETWORK,
+    CONTRACT_TOKEN_NETWORK_REGISTRY,
+    CONTRACT_USER_DEPOSIT,
+)
+from raiden_contracts.contract_manager import ContractManager
+
+MATRIX_SERVER = "https://matrix.invalid"
+CLIENT_VERSION = "Geth/v1.10.3-stable-991384a7/linux-amd64/go1.16.3"
+GENESIS_TIMESTAMP = 1_600_000_000
+BLOCK_TIME = 15
+BLOCK_GAS_LIMIT = 12_500_000
+DEFAULT_GAS_PRICE = 10**9
+UINT256_MAX = 2**256 - 1
+NULL_ADDRESS = to_checksum_address(b"\x00" * 20)
+EMPTY_HASH = b"\x00" * 32
+
+# Simplified gas model, only meant to be deterministic.
+TX_BASE_GAS = 21_000
+TX_CREATE_GAS = 32_000
+TX_DATA_ZERO_GAS = 4
+TX_DATA_NONZERO_GAS = 16
+CONTRACT_CALL_GAS = 30_000
+LOG_GAS = 1_000
+
+SETTLE_TIMEOUT = 500
+SETTLEMENT_TIMEOUT_MIN = 20
+SETTLEMENT_TIMEOUT_MAX = 555_428
+MAX_TOKEN_NETWORKS = UINT256_MAX
+WITHDRAW_TIMEOUT = 100
+
+
+class RPCError(Exception):
+    """Error returned to the caller as a JSON-RPC error object."""
+
+    def __init__(self, message: str, code: int = -32000) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class Revert(Exception):
+    """Raised by contract handlers to revert the current transaction or call."""
+
+
+_MISSING = object()
+
+
+class _Journal:
+    """Records writes to state mappings so they can be undone."""
+
+    def __init__(self) -> None:
+        self._undo: List[Tuple[dict, Any, Any]] = []
+
+    def set(self, mapping: dict, key: Any, value: Any) -> None:
+        self._undo.append((mapping, key, mapping.get(key, _MISSING)))
+        mapping[key] = value
+
+    def rollback(self) -> None:
+        for mapping, key, old_value in reversed(self._undo):
+            if old_value is _MISSING:
+                mapping.pop(key, None)
+            else:
+                mapping[key] = old_value
+        self._undo.clear()
+
+
+@dataclass
+class _Context:
+    """Execution context of a single contract call."""
+
+    sender: str
+    value: int
+    block_number: int
+    logs: List[dict] = field(default_factory=list)
+
+    def nested(self, sender: str) -> "_Context":
+        return _Context(sender=sender, value=0, block_number=self.block_number, logs=self.logs)
+
+
+@dataclass
+class _Block:
+    number: int
+    hash: bytes
+    parent_hash: bytes
+    timestamp: int
+    transactions: List[bytes]
+    gas_used: int
+
+
+@dataclass
+class _Execution:
+    success: bool
+    output: bytes
+    gas_used: int
+    logs: List[dict]
+    contract_address: Optional[str] = None
+
+
+def _default_value(abi_type: str) -> Any:
+    """Return the zero value for an ABI type."""
+    if abi_type.endswith("]"):
+        return []
+    if abi_type == "address":
+        return NULL_ADDRESS
+    if abi_type == "bool":
+        return False
+    if abi_type == "string":
+        return ""
+    if abi_type == "bytes":
+        return b""
+    if abi_type.startswith("bytes"):
+        return b"\x00" * int(abi_type[len("bytes") :])
+    return 0
+
+
+def _checksum_addresses(abi_types: List[str], values: tuple) -> tuple:
+    """Decoded addresses are lower case, state is keyed by checksum addresses."""
+    return tuple(
+        to_checksum_address(value) if abi_type == "address" else value
+        for abi_type, value in zip(abi_types, values)
+    )
+
+
+class FakeContract:
+    """Base class for contracts simulated by the :class:`FakeChain`.
+
+    Contract functions are implemented as methods named ``fn_<function name>``,
+    which receive the call context and the decoded arguments. Functions
+    without an implementation return the zero values of their outputs.
+    """
+
+    contract_name: ClassVar[str]
+
+    def __init__(self, chain: "FakeChain", address: str) -> None:
+        self.chain = chain
+        self.address = address
+        abi = chain.contract_abi(self.contract_name)
+        self._functions = abi.functions
+        self._events = abi.events
+
+    def constructor(self, ctx: _Context, *args: Any) -> None:
+        pass
+
+    def dispatch(self, ctx: _Context, data: bytes) -> bytes:
+        function_abi = self._functions.get(data[:4])
+        if function_abi is None:
+            raise Revert("unknown function selector")
+
+        input_types = [arg["type"] for arg in function_abi["inputs"]]
+        output_types = [arg["type"] for arg in function_abi["outputs"]]
+        args = _checksum_addresses(input_types, decode_abi(input_types, data[4:]))
+
+        handler = getattr(self, f"fn_{function_abi['name']}", None)
+        if handler is None:
+            result: Any = tuple(_default_value(abi_type) for abi_type in output_types)
+        else:
+            result = handler(ctx, *args)
+            if len(output_types) == 1:
+                result = (result,)
+
+        if not output_types:
+            return b""
+        return encode_abi(output_types, result)
+
+    def emit(self, ctx: _Context, event_name: str, **values: Any) -> None:
+        event_abi = self._events[event_name]
+        topics = [event_abi["topic"]]
+        data_types = []
+        data_values = []
+        for arg in event_abi["inputs"]:
+            value = values[arg["name"]]
+            if arg["indexed"]:
+                topics.append(encode_single(arg["type"], value))
+            else:
+                data_types.append(arg["type"])
+                data_values.append(value)
+        ctx.logs.append(
+            {
+                "address": self.address,
+                "topics": topics,
+                "data": encode_abi(data_types, data_values),
+            }
+        )
+
+    def _set(self, mapping: dict, key: Any, value: Any) -> None:
+        self.chain.write(mapping, key, value)
+
+
+class FakeSecretRegistry(FakeContract):
+    contract_name = CONTRACT_SECRET_REGISTRY
+
+
+class FakeCustomToken(FakeContract):
+    contract_name = CONTRACT_CUSTOM_TOKEN
+
+    def __init__(self, chain: "FakeChain", address: str) -> None:
+        super().__init__(chain, address)
+        self.state: Dict[str, Any] = {"supply": 0, "decimals": 0, "name": "", "symbol": ""}
+        self.balances: Dict[str, int] = {}
+        self.allowances: Dict[Tuple[str, str], int] = {}
+
+    def constructor(
+        self, ctx: _Context, initial_supply: int, decimals: int, name: str, symbol: str
+    ) -> None:
+        self._set(self.state, "decimals", decimals)
+        self._set(self.state, "name", name)
+        self._set(self.state, "symbol", symbol)
+        if initial_supply:
+            self._mint(ctx, ctx.sender, initial_supply)
+
+    def _mint(self, ctx: _Context, target: str, amount: int) -> None:
+        if amount == 0:
+            raise Revert("zero mint")
+        if self.state["supply"] + amount > UINT256_MAX:
+            raise Revert("supply overflow")
+        self._set(self.state, "supply", self.state["supply"] + amount)
+        self._set(self.balances, target, self.balances.get(target, 0) + amount)
+        self.emit(ctx, "Minted", _to=target, _num=amount)
+
+    def _move(self, ctx: _Context, source: str, target: str, amount: int) -> bool:
+        if self.balances.get(source, 0) < amount:
+            raise Revert("insufficient balance")
+        self._set(self.balances, source, self.balances.get(source, 0) - amount)
+        self._set(self.balances, target, self.balances.get(target, 0) + amount)
+        self.emit(ctx, "Transfer", _from=source, _to=target, _value=amount)
+        return True
+
+    def fn_balanceOf(self, ctx: _Context, owner: str) -> int:
+        return self.balances.get(owner, 0)
+
+    fn_balances = fn_balanceOf
+
+    def fn_allowance(self, ctx: _Context, owner: str, spender: str) -> int:
+        return self.allowances.get((owner, spender), 0)
+
+    def fn_totalSupply(self, ctx: _Context) -> int:
+        return self.state["supply"]
+
+    def fn_decimals(self, ctx: _Context) -> int:
+        return self.state["decimals"]
+
+    def fn_name(self, ctx: _Context) -> str:
+        return self.state["name"]
+
+    def fn_symbol(self, ctx: _Context) -> str:
+        return self.state["symbol"]
+
+    def fn_approve(self, ctx: _Context, spender: str, value: int) -> bool:
+        self._set(self.allowances, (ctx.sender, spender), value)
+        self.emit(ctx, "Approval", _owner=ctx.sender, _spender=spender, _value=value)
+        return True
+
+    def fn_transfer(self, ctx: _Context, target: str, value: int) -> bool:
+        return self._move(ctx, ctx.sender, target, value)
+
+    def fn_transferFrom(self, ctx: _Context, source: str, target: str, value: int) -> bool:
+        allowance = self.allowances.get((source, ctx.sender), 0)
+        if allowance < value:
+            raise Revert("insufficient allowance")
+        self._set(self.allowances, (source, ctx.sender), allowance - value)
+        return self._move(ctx, source, target, value)
+
+    def fn_mint(self, ctx: _Context, amount: int) -> None:
+        self._mint(ctx, ctx.sender, amount)
+
+    def fn_mintFor(self, ctx: _Context, amount: int, target: str) -> None:
+        self._mint(ctx, target, amount)
+
+
+class FakeUserDeposit(FakeContract):
+    contract_name = CONTRACT_USER_DEPOSIT
+
+    def __init__(self, chain: "FakeChain", address: str) -> None:
+        super().__init__(chain, address)
+        self.state: Dict[str, Any] = {
+            "token": NULL_ADDRESS,
+            "whole_balance": 0,
+            "whole_balance_limit": 0,
+            "withdraw_timeout": 0,
+            "msc_address": NULL_ADDRESS,
+            "one_to_n_address": NULL_ADDRESS,
+        }
+        self.balances: Dict[str, int] = {}
+        self.total_deposits: Dict[str, int] = {}
+        self.withdraw_plans: Dict[str, Tuple[int, int]] = {}
+
+    def constructor(
+        self, ctx: _Context, token_address: str, whole_balance_limit: int, withdraw_timeout: int
+    ) -> None:
+        self._set(self.state, "token", token_address)
+        self._set(self.state, "whole_balance_limit", whole_balance_limit)
+        self._set(self.state, "withdraw_timeout", withdraw_timeout)
+
+    @property
+    def _token(self) -> FakeCustomToken:
+        return self.chain.contract_at(self.state["token"], FakeCustomToken)
+
+    def fn_token(self, ctx: _Context) -> str:
+        return self.state["token"]
+
+    def fn_whole_balance(self, ctx: _Context) -> int:
+        return self.state["whole_balance"]
+
+    def fn_whole_balance_limit(self, ctx: _Context) -> int:
+        return self.state["whole_balance_limit"]
+
+    def fn_withdraw_timeout(self, ctx: _Context) -> int:
+        return self.state["withdraw_timeout"]
+
+    def fn_msc_address(self, ctx: _Context) -> str:
+        return self.state["msc_address"]
+
+    def fn_one_to_n_address(self, ctx: _Context) -> str:
+        return self.state["one_to_n_address"]
+
+    def fn_init(self, ctx: _Context, msc_address: str, one_to_n_address: str) -> None:
+        self._set(self.state, "msc_address", msc_address)
+        self._set(self.state, "one_to_n_address", one_to_n_address)
+
+    def fn_balances(self, ctx: _Context, owner: str) -> int:
+        return self.balances.get(owner, 0)
+
+    def fn_total_deposit(self, ctx: _Context, owner: str) -> int:
+        return self.total_deposits.get(owner, 0)
+
+    def fn_withdraw_plans(self, ctx: _Context, owner: str) -> Tuple[int, int]:
+        return self.withdraw_plans.get(owner, (0, 0))
+
+    def fn_effectiveBalance(self, ctx: _Context, owner: str) -> int:
+        planned, _ = self.withdraw_plans.get(owner, (0, 0))
+        return max(self.balances.get(owner, 0) - planned, 0)
+
+    def fn_deposit(self, ctx: _Context, beneficiary: str, new_total_deposit: int) -> None:
+        previous_total_deposit = self.total_deposits.get(beneficiary, 0)
+        if new_total_deposit <= previous_total_deposit:
+            raise Revert("deposit not increasing")
+
+        added_deposit = new_total_deposit - previous_total_deposit
+        whole_balance = self.state["whole_balance"] + added_deposit
+        if whole_balance > self.state["whole_balance_limit"]:
+            raise Revert("whole balance limit reached")
+
+        self._set(self.total_deposits, beneficiary, new_total_deposit)
+        self._set(self.balances, beneficiary, self.balances.get(beneficiary, 0) + added_deposit)
+        self._set(self.state, "whole_balance", whole_balance)
+        self._token.fn_transferFrom(
+            ctx.nested(self.address), ctx.sender, self.address, added_deposit
+        )
+
+    def fn_planWithdraw(self, ctx: _Context, amount: int) -> None:
+        if amount == 0 or self.balances.get(ctx.sender, 0) < amount:
+            raise Revert("withdrawing more than available")
+        withdraw_block = ctx.block_number + self.state["withdraw_timeout"]
+        self._set(self.withdraw_plans, ctx.sender, (amount, withdraw_block))
+        self.emit(
+            ctx,
+            "WithdrawPlanned",
+            withdrawer=ctx.sender,
+            plannedBalance=self.balances[ctx.sender] - amount,
+        )
+
+    def fn_withdraw(self, ctx: _Context, amount: int) -> None:
+        self.fn_withdrawToBeneficiary(ctx, amount, ctx.sender)
+
+    def fn_withdrawToBeneficiary(self, ctx: _Context, amount: int, beneficiary: str) -> None:
+        planned, withdraw_block = self.withdraw_plans.get(ctx.sender, (0, 0))
+        if amount == 0 or amount > planned:
+            raise Revert("withdrawing more than planned")
+        if ctx.block_number < withdraw_block:
+            raise Revert("withdrawing too early")
+
+        new_balance = self.balances[ctx.sender] - amount
+        self._set(self.balances, ctx.sender, new_balance)
+        self._set(self.state, "whole_balance", self.state["whole_balance"] - amount)
+        self.chain.delete(self.withdraw_plans, ctx.sender)
+        self.emit(ctx, "BalanceReduced", owner=ctx.sender, newBalance=new_balance)
+        self._token.fn_transfer(ctx.nested(self.address), beneficiary, amount)
+
+
+class FakeTokenNetwork(FakeContract):
+    contract_name = CONTRACT_TOKEN_NETWORK
+
+    def __init__(self, chain: "FakeChain", address: str) -> None:
+        super().__init__(chain, address)
+        self.state: Dict[str, Any] = {}
+
+    def constructor(
+        self,
+        ctx: _Context,
+        token_address: str,
+        secret_registry: str,
+        settle_timeout: int,
+        controller: str,
+        channel_participant_deposit_limit: int,
+        token_network_deposit_limit: int,
+    ) -> None:
+        self._set(self.state, "token", token_address)
+        self._set(self.state, "secret_registry", secret_registry)
+        self._set(self.state, "settle_timeout", settle_timeout)
+        self._set(self.state, "controller", controller)
+        self._set(self.state, "participant_limit", channel_participant_deposit_limit)
+        self._set(self.state, "network_limit", token_network_deposit_limit)
+
+    def fn_token(self, ctx: _Context) -> str:
+        return self.state["token"]
+
+    def fn_secret_registry(self, ctx: _Context) -> str:
+        return self.state["secret_registry"]
+
+    def fn_settle_timeout(self, ctx: _Context) -> int:
+        return self.state["settle_timeout"]
+
+    def fn_settlement_timeout_min(self, ctx: _Context) -> int:
+        return SETTLEMENT_TIMEOUT_MIN
+
+    def fn_settlement_timeout_max(self, ctx: _Context) -> int:
+        return SETTLEMENT_TIMEOUT_MAX
+
+    def fn_controller(self, ctx: _Context) -> str:
+        return self.state["controller"]
+
+    def fn_chain_id(self, ctx: _Context) -> int:
+        return self.chain.chain_id
+
+    def fn_channel_participant_deposit_limit(self, ctx: _Context) -> int:
+        return self.state["participant_limit"]
+
+    def fn_token_network_deposit_limit(self, ctx: _Context) -> int:
+        return self.state["network_limit"]
+
+
+class FakeTokenNetworkRegistry(FakeContract):
+    contract_name = CONTRACT_TOKEN_NETWORK_REGISTRY
+
+    def __init__(self, chain: "FakeChain", address: str) -> None:
+        super().__init__(chain, address)
+        self.state: Dict[str, Any] = {"created": 0}
+        self.token_to_token_networks: Dict[str, str] = {}
+
+    def constructor(
+        self,
+        ctx: _Context,
+        secret_registry_address: str,
+        settle_timeout: int,
+        max_token_networks: int,
+    ) -> None:
+        self._set(self.state, "secret_registry_address", secret_registry_address)
+        self._set(self.state, "settle_timeout", settle_timeout)
+        self._set(self.state, "max_token_networks", max_token_networks)
+        self._set(self.state, "controller", ctx.sender)
+
+    def fn_secret_registry_address(self, ctx: _Context) -> str:
+        return self.state["secret_registry_address"]
+
+    def fn_settle_timeout(self, ctx: _Context) -> int:
+        return self.state["settle_timeout"]
+
+    def fn_settlement_timeout_min(self, ctx: _Context) -> int:
+        return SETTLEMENT_TIMEOUT_MIN
+
+    def fn_settlement_timeout_max(self, ctx: _Context) -> int:
+        return SETTLEMENT_TIMEOUT_MAX
+
+    def fn_max_token_networks(self, ctx: _Context) -> int:
+        return self.state["max_token_networks"]
+
+    def fn_token_network_created(self, ctx: _Context) -> int:
+        return self.state["created"]
+
+    def fn_controller(self, ctx: _Context) -> str:
+        return self.state["controller"]
+
+    def fn_chain_id(self, ctx: _Context) -> int:
+        return self.chain.chain_id
+
+    def fn_token_to_token_networks(self, ctx: _Context, token_address: str) -> str:
+        return self.token_to_token_networks.get(token_address, NULL_ADDRESS)
+
+    def fn_createERC20TokenNetwork(
+        self,
+        ctx: _Context,
+        token_address: str,
+        channel_participant_deposit_limit: int,
+        token_network_deposit_limit: int,
+    ) -> str:
+        if token_address not in self.chain.contracts:
+            raise Revert("token has no code")
+        if token_address in self.token_to_token_networks:
+            raise Revert("token already registered")
+        if self.state["created"] >= self.state["max_token_networks"]:
+            raise Revert("too many token networks")
+
+        token_network = self.chain.create_contract(
+            ctx.nested(self.address),
+            FakeTokenNetwork,
+            token_address,
+            self.state["secret_registry_address"],
+            self.state["settle_timeout"],
+            self.state["controller"],
+            channel_participant_deposit_limit,
+            token_network_deposit_limit,
+        )
+        self._set(self.token_to_token_networks, token_address, token_network.address)
+        self._set(self.state, "created", self.state["created"] + 1)
+        self.emit(
+            ctx,
+            "TokenNetworkCreated",
+            token_address=token_address,
+            token_network_address=token_network.address,
+            settle_timeout=self.state["settle_timeout"],
+        )
+        return token_network.address
+
+    def fn_createERC20TokenNetworkWithoutLimits(self, ctx: _Context, token_address: str) -> str:
+        return self.fn_createERC20TokenNetwork(ctx, token_address, UINT256_MAX, UINT256_MAX)
+
+
+FAKE_CONTRACTS: Tuple[Type[FakeContract], ...] = (
+    FakeCustomToken,
+    FakeUserDeposit,
+    FakeTokenNetworkRegistry,
+    FakeTokenNetwork,
+    FakeSecretRegistry,
+)
+
+
+@dataclass
+class _ContractABI:
+    bytecode: bytes
+    runtime_bytecode: bytes
+    constructor_types: List[str]
+    functions: Dict[bytes, dict]
+    events: Dict[str, dict]
+
+
+def _index_abi(contract: dict) -> _ContractABI:
+    functions = {}
+    events = {}
+    constructor_types: List[str] = []
+    for entry in contract["abi"]:
+        if entry["type"] == "function":
+            functions[function_abi_to_4byte_selector(entry)] = entry
+        elif entry["type"] == "event":
+            signature = f"{entry['name']}({','.join(arg['type'] for arg in entry['inputs'])})"
+            events[entry["name"]] = dict(entry, topic=keccak(text=signature))
+        elif entry["type"] == "constructor":
+            constructor_types = [arg["type"] for arg in entry["inputs"]]
+
+    return _ContractABI(
+        bytecode=decode_hex(contract["bin"]),
+        runtime_bytecode=decode_hex(contract.get("bin-runtime") or "0x00"),
+        constructor_types=constructor_types,
+        functions=functions,
+        events=events,
+    )
+
+
+def _intrinsic_gas(data: bytes, is_creation: bool) -> int:
+    zero_bytes = data.count(0)
+    gas = TX_BASE_GAS + zero_bytes * TX_DATA_ZERO_GAS
+    gas += (len(data) - zero_bytes) * TX_DATA_NONZERO_GAS
+    if is_creation:
+        gas += TX_CREATE_GAS
+    return gas
+
+
+def _quantity(value: Optional[str], default: int = 0) -> int:
+    if value is None:
+        return default
+    return int(value, 16)
+
+
+def _decode_raw_transaction(raw: bytes) -> dict:
+    """Decode a signed legacy, EIP-2930 or EIP-1559 transaction."""
+    if raw[0] >= 0xC0:
+        nonce, gas_price, gas, to, value, data, _, _, _ = rlp.decode(raw)
+        tx_type = 0
+    elif raw[0] == 1:
+        _, nonce, gas_price, gas, to, value, data, _, _, _, _ = rlp.decode(raw[1:])
+        tx_type = 1
+    elif raw[0] == 2:
+        _, nonce, _, gas_price, gas, to, value, data, _, _, _, _ = rlp.decode(raw[1:])
+        tx_type = 2
+    else:
+        raise RPCError("transaction type not supported")
+
+    return {
+        "type": tx_type,
+        "from": to_checksum_address(Account.recover_transaction(raw)),
+        "nonce": big_endian_to_int(nonce),
+        "gasPrice": big_endian_to_int(gas_price),
+        "gas": big_endian_to_int(gas),
+        "to": to_checksum_address(to) if to else None,
+        "value": big_endian_to_int(value),
+        "input": data,
+    }
+
+
+class FakeChain:
+    """Deterministic, in-memory Ethereum chain answering JSON-RPC requests.
+
+    :param contract_manager: Source of the ABIs and bytecodes of the Raiden
+        contracts. Contract creation transactions are matched against the
+        bytecode of the known contracts.
+    :param chain_id: Chain id reported by ``eth_chainId`` and ``net_version``.
+    :param confirmation_blocks: Number of blocks mined after every
+        transaction.
+    :param history_blocks: Number of blocks mined at genesis. Gas price
+        strategies sample recent blocks and need some history to work with.
+
+    The history and confirmation blocks each contain one transaction of another
+    sender, paying `gas_price`. Like on a real chain, these keep the gas price
+    strategies from only sampling, and raising, the prices of our own
+    transactions.
+    """
+
+    def __init__(
+        self,
+        contract_manager: ContractManager,
+        chain_id: int,
+        confirmation_blocks: int = 5,
+        history_blocks: int = 150,
+        gas_price: int = DEFAULT_GAS_PRICE,
+    ) -> None:
+        self.contract_manager = contract_manager
+        self.chain_id = chain_id
+        self.confirmation_blocks = confirmation_blocks
+        self.gas_price = gas_price
+
+        self.balances: Dict[str, int] = {}
+        self.nonces: Dict[str, int] = {}
+        self.contracts: Dict[str, FakeContract] = {}
+
+        self.blocks: List[_Block] = []
+        self.blocks_by_hash: Dict[bytes, _Block] = {}
+        self.transactions: Dict[bytes, dict] = {}
+        self.receipts: Dict[bytes, dict] = {}
+        self.logs_by_block: Dict[int, List[dict]] = defaultdict(list)
+
+        self.rpc_calls: Counter = Counter()
+        self.token_network_registry_address: Optional[str] = None
+        self._market_sender = to_checksum_address(keccak(text="fake-chain-history")[12:])
+        self._market_nonce = 0
+
+        self._abis: Dict[str, _ContractABI] = {}
+        self._journal: Optional[_Journal] = None
+        self._lock = threading.RLock()
+        self._methods: Dict[str, Callable[..., Any]] = {
+            "web3_clientVersion": self._web3_client_version,
+            "net_version": self._net_version,
+            "eth_chainId": self._eth_chain_id,
+            "eth_syncing": self._eth_syncing,
+            "eth_blockNumber": self._eth_block_number,
+            "eth_gasPrice": self._eth_gas_price,
+            "eth_getBalance": self._eth_get_balance,
+            "eth_getTransactionCount": self._eth_get_transaction_count,
+            "eth_getCode": self._eth_get_code,
+            "eth_getBlockByNumber": self._eth_get_block_by_number,
+            "eth_getBlockByHash": self._eth_get_block_by_hash,
+            "eth_call": self._eth_call,
+            "eth_estimateGas": self._eth_estimate_gas,
+            "eth_sendRawTransaction": self._eth_send_raw_transaction,
+            "eth_getTransactionByHash": self._eth_get_transaction_by_hash,
+            "eth_getTransactionReceipt": self._eth_get_transaction_receipt,
+            "eth_getLogs": self._eth_get_logs,
+        }
+
+        self._mine_block([])
+        for _ in range(history_blocks):
+            self._mine_market_block()
+
+    # Genesis setup
+
+    def contract_abi(self, contract_name: str) -> _ContractABI:
+        if contract_name not in self._abis:
+            self._abis[contract_name] = _index_abi(
+                self.contract_manager.get_contract(contract_name)
+            )
+        return self._abis[contract_name]
+
+    def fund(self, address: str, amount: int) -> None:
+        """Credit ``amount`` wei to ``address`` without a transaction."""
+        address = to_checksum_address(address)
+        self.balances[address] = self.balances.get(address, 0) + amount
+
+    def deploy(self, deployer: str, contract_class: Type[FakeContract], *args: Any) -> str:
+        """Deploy a contract at genesis and return its address."""
+        ctx = _Context(sender=to_checksum_address(deployer), value=0, block_number=0)
+        contract = self.create_contract(ctx, contract_class, *args)
+        self._add_genesis_logs(ctx)
+        return contract.address
+
+    def _add_genesis_logs(self, ctx: _Context) -> None:
+        genesis_logs = self.logs_by_block[0]
+        logs = self._finalize_logs(ctx.logs, self.blocks[0], EMPTY_HASH)
+        for log_index, log in enumerate(logs, start=len(genesis_logs)):
+            log["logIndex"] = log_index
+        genesis_logs.extend(logs)
+
+    def deploy_raiden_contracts(self, deployer: str) -> Dict[str, Any]:
+        """Deploy the Raiden contracts used by the scenario player at genesis.
+
+        Returns deployment data in the format of
+        :func:`raiden_contracts.contract_manager.get_contracts_deployment_info`,
+        which can be used as ``smoketest_deployment_data``.
+        """
+        udc_token = self.deploy(deployer, FakeCustomToken, 0, 18, "Utility Token", "UTT")
+        user_deposit = self.deploy(
+            deployer, FakeUserDeposit, udc_token, UINT256_MAX, WITHDRAW_TIMEOUT
+        )
+        secret_registry = self.deploy(deployer, FakeSecretRegistry)
+        token_network_registry = self.deploy(
+            deployer, FakeTokenNetworkRegistry, secret_registry, SETTLE_TIMEOUT, MAX_TOKEN_NETWORKS
+        )
+        self.token_network_registry_address = token_network_registry
+
+        contracts = {
+            CONTRACT_CUSTOM_TOKEN: udc_token,
+            CONTRACT_USER_DEPOSIT: user_deposit,
+            CONTRACT_SECRET_REGISTRY: secret_registry,
+            CONTRACT_TOKEN_NETWORK_REGISTRY: token_network_registry,
+        }
+        return {
+            "contracts_version": self.contract_manager.contracts_version,
+            "chain_id": self.chain_id,
+            "contracts": {
+                name: {
+                    "address": address,
+                    "transaction_hash": encode_hex(EMPTY_HASH),
+                    "block_number": 0,
+                    "gas_cost": 0,
+                    "constructor_arguments": [],
+                }
+                for name, address in contracts.items()
+            },
+        }
+
+    def register_token_network(self, token_address: str) -> str:
+        """Create the token network for ``token_address`` at genesis."""
+        assert self.token_network_registry_address, "Raiden contracts not deployed"
+        registry = self.contract_at(self.token_network_registry_address, FakeTokenNetworkRegistry)
+        ctx = _Context(sender=registry.state["controller"], value=0, block_number=0)
+        token_network = registry.fn_createERC20TokenNetwork(
+            ctx, token_address, UINT256_MAX, UINT256_MAX
+        )
+        self._add_genesis_logs(ctx)
+        return token_network
+
+    def token_network_for(self, token_address: str) -> Optional[str]:
+        """Return the token network of ``token_address``, if it is registered."""
+        if self.token_network_registry_address is None or not is_checksum_address(token_address):
+            return None
+        registry = self.contract_at(self.token_network_registry_address, FakeTokenNetworkRegistry)
+        return registry.token_to_token_networks.get(token_address)
+
+    # State access
+
+    @property
+    def block_number(self) -> int:
+        return self.blocks[-1].number
+
+    def contract_at(self, address: str, contract_class: Type[FakeContract]) -> Any:
+        contract = self.contracts.get(address)
+        if not isinstance(contract, contract_class):
+            raise Revert(f"no {contract_class.contract_name} at {address}")
+        return contract
+
+    def write(self, mapping: dict, key: Any, value: Any) -> None:
+        if self._journal is None:
+            mapping[key] = value
+        else:
+            self._journal.set(mapping, key, value)
+
+    def delete(self, mapping: dict, key: Any) -> None:
+        if self._journal is not None:
+            self._journal.set(mapping, key, mapping.get(key))
+        mapping.pop(key, None)
+
+    def create_contract(
+        self, ctx: _Context, contract_class: Type[FakeContract], *args: Any
+    ) -> FakeContract:
+        nonce = self.nonces.get(ctx.sender, 0)
+        address = to_checksum_address(
+            keccak(rlp.encode([to_canonical_address(ctx.sender), nonce]))[12:]
+        )
+        self.write(self.nonces, ctx.sender, nonce + 1)
+
+        contract = contract_class(self, address)
+        self.write(self.contracts, address, contract)
+        contract.constructor(ctx, *args)
+        return contract
+
+    # Execution
+
+    def _execute(
+        self,
+        sender: str,
+        to: Optional[str],
+        value: int,
+        data: bytes,
+        journal: _Journal,
+    ) -> _Execution:
+        """Run a call or contract creation on top of the latest block.
+
+        All state changes are recorded in ``journal``. On failure they are
+        rolled back before returning.
+        """
+        previous_journal, self._journal = self._journal, journal
+        ctx = _Context(sender=sender, value=value, block_number=self.block_number + 1)
+        output = b""
+        contract_address = None
+        gas_used = _intrinsic_gas(data, is_creation=to is None)
+        try:
+            if self.balances.get(sender, 0) < value:
+                raise Revert("insufficient funds for transfer")
+
+            if to is None:
+                contract_class, args = self._match_creation(data)
+                self.write(self.balances, sender, self.balances.get(sender, 0) - value)
+                contract = self.create_contract(ctx, contract_class, *args)
+                self.write(self.balances, contract.address, value)
+                contract_address = contract.address
+            else:
+                self.write(self.balances, sender, self.balances.get(sender, 0) - value)
+                self.write(self.balances, to, self.balances.get(to, 0) + value)
+                contract = self.contracts.get(to)
+                if contract is not None:
+                    gas_used += CONTRACT_CALL_GAS
+                    output = contract.dispatch(ctx, data)
+            gas_used += LOG_GAS * len(ctx.logs)
+        except Revert:
+            journal.rollback()
+            return _Execution(success=False, output=b"", gas_used=gas_used, logs=[])
+        finally:
+            self._journal = previous_journal
+
+        return _Execution(
+            success=True,
+            output=output,
+            gas_used=gas_used,
+            logs=ctx.logs,
+            contract_address=contract_address,
+        )
+
+    def _match_creation(self, data: bytes) -> Tuple[Type[FakeContract], tuple]:
+        for contract_class in FAKE_CONTRACTS:
+            abi = self.contract_abi(contract_class.contract_name)
+            if data.startswith(abi.bytecode):
+                types = abi.constructor_types
+                args = _checksum_addresses(types, decode_abi(types, data[len(abi.bytecode) :]))
+                return contract_class, args
+        raise Revert("unknown contract bytecode")
+
+    def _simulate(self, transaction: dict) -> _Execution:
+        sender = to_checksum_address(transaction.get("from") or NULL_ADDRESS)
+        to = transaction.get("to")
+        journal = _Journal()
+        execution = self._execute(
+            sender=sender,
+            to=to_checksum_address(to) if to else None,
+            value=_quantity(transaction.get("value")),
+            data=decode_hex(transaction.get("data") or transaction.get("input") or "0x"),
+            journal=journal,
+        )
+        journal.rollback()
+        return execution
+
+    def _mine_block(self, transactions: List[bytes], gas_used: int = 0) -> _Block:
+        number = len(self.blocks)
+        parent_hash = self.blocks[-1].hash if self.blocks else EMPTY_HASH
+        block = _Block(
+            number=number,
+            hash=keccak(number.to_bytes(32, "big")),
+            parent_hash=parent_hash,
+            timestamp=GENESIS_TIMESTAMP + number * BLOCK_TIME,
+            transactions=transactions,
+            gas_used=gas_used,
+        )
+        self.blocks.append(block)
+        self.blocks_by_hash[block.hash] = block
+        return block
+
+    def _mine_market_block(self) -> _Block:
+        """Mine a block with a transaction of another sender, paying the market gas price."""
+        tx_hash = keccak(text=f"fake-chain-history-{self._market_nonce}")
+        self.transactions[tx_hash] = {
+            "hash": tx_hash,
+            "type": 0,
+            "from": self._market_sender,
+            "to": self._market_sender,
+            "nonce": self._market_nonce,
+            "gas": TX_BASE_GAS,
+            "gasPrice": self.gas_price,
+            "value": 0,
+            "input": b"",
+        }
+        self._market_nonce += 1
+        return self._mine_block([tx_hash], gas_used=TX_BASE_GAS)
+
+    def _finalize_logs(self, logs: List[dict], block: _Block, tx_hash: bytes) -> List[dict]:
+        return [
+            dict(
+                log,
+                blockNumber=block.number,
+                blockHash=block.hash,
+                transactionHash=tx_hash,
+                transactionIndex=0,
+                logIndex=index,
+                removed=False,
+            )
+            for index, log in enumerate(logs)
+        ]
+
+    # JSON-RPC
+
+    def handle_request(self, request: dict) -> dict:
+        """Answer a single JSON-RPC request object."""
+        method = request.get("method", "")
+        response: Dict[str, Any] = {"jsonrpc": "2.0", "id": request.get("id")}
+        with self._lock:
+            self.rpc_calls[method] += 1
+            handler = self._methods.get(method)
+            try:
+                if handler is None:
+                    raise RPCError(f"the method {method} does not exist/is not available", -32601)
+                response["result"] = _to_json(handler(*request.get("params", [])))
+            except RPCError as e:
+                response["error"] = {"code": e.code, "message": e.message}
+        return response
+
+    def _resolve_block(self, block_identifier: Any = "latest") -> _Block:
+        if block_identifier in ("latest", "pending", "safe", "finalized", None):
+            return self.blocks[-1]
+        if block_identifier == "earliest":
+            return self.blocks[0]
+        if isinstance(block_identifier, dict):
+            block_identifier = block_identifier.get("blockHash") or block_identifier["blockNumber"]
+        if len(block_identifier) == 66:
+            block = self.blocks_by_hash.get(decode_hex(block_identifier))
+            if block is None:
+                raise RPCError("header not found")
+            return block
+        number = int(block_identifier, 16)
+        if number >= len(self.blocks):
+            raise RPCError("header not found")
+        return self.blocks[number]
+
+    def _web3_client_version(self) -> str:
+        return CLIENT_VERSION
+
+    def _net_version(self) -> str:
+        return str(self.chain_id)
+
+    def _eth_chain_id(self) -> int:
+        return self.chain_id
+
+    def _eth_syncing(self) -> bool:
+        return False
+
+    def _eth_block_number(self) -> int:
+        return self.block_number
+
+    def _eth_gas_price(self) -> int:
+        return self.gas_price
+
+    def _eth_get_balance(self, address: str, block_identifier: Any = "latest") -> int:
+        self._resolve_block(block_identifier)
+        return self.balances.get(to_checksum_address(address), 0)
+
+    def _eth_get_transaction_count(self, address: str, block_identifier: Any = "latest") -> int:
+        self._resolve_block(block_identifier)
+        return self.nonces.get(to_checksum_address(address), 0)
+
+    def _eth_get_code(self, address: str, block_identifier: Any = "latest") -> bytes:
+        self._resolve_block(block_identifier)
+        contract = self.contracts.get(to_checksum_address(address))
+        if contract is None:
+            return b""
+        return self.contract_abi(contract.contract_name).runtime_bytecode
+
+    def _render_block(self, block: _Block, full_transactions: bool) -> dict:
+        transactions: List[Any] = list(block.transactions)
+        if full_transactions:
+            transactions = [
+                self._eth_get_transaction_by_hash(encode_hex(tx_hash))
+                for tx_hash in block.transactions
+            ]
+        return {
+            "number": block.number,
+            "hash": block.hash,
+            "parentHash": block.parent_hash,
+            "nonce": b"\x00" * 8,
+            "sha3Uncles": EMPTY_HASH,
+            "logsBloom": b"\x00" * 256,
+            "transactionsRoot": EMPTY_HASH,
+            "stateRoot": EMPTY_HASH,
+            "receiptsRoot": EMPTY_HASH,
+            "miner": NULL_ADDRESS,
+            "difficulty": 1,
+            "totalDifficulty": block.number + 1,
+            "extraData": b"\x00" * 32,
+            "size": 1000,
+            "gasLimit": BLOCK_GAS_LIMIT,
+            "gasUsed": block.gas_used,
+            "timestamp": block.timestamp,
+            "transactions": transactions,
+            "uncles": [],
+        }
+
+    def _eth_get_block_by_number(self, block_identifier: Any, full_transactions: bool) -> Any:
+        try:
+            block = self._resolve_block(block_identifier)
+        except RPCError:
+            return None
+        return self._render_block(block, full_transactions)
+
+    def _eth_get_block_by_hash(self, block_hash: str, full_transactions: bool) -> Any:
+        block = self.blocks_by_hash.get(decode_hex(block_hash))
+        if block is None:
+            return None
+        return self._render_block(block, full_transactions)
+
+    def _eth_call(self, transaction: dict, block_identifier: Any = "latest") -> bytes:
+        self._resolve_block(block_identifier)
+        execution = self._simulate(transaction)
+        if not execution.success:
+            raise RPCError("execution reverted")
+        return execution.output
+
+    def _eth_estimate_gas(self, transaction: dict, block_identifier: Any = "latest") -> int:
+        self._resolve_block(block_identifier)
+        sender = to_checksum_address(transaction.get("from") or NULL_ADDRESS)
+        if self.balances.get(sender, 0) < _quantity(transaction.get("value")):
+            raise RPCError("insufficient funds for transfer")
+        execution = self._simulate(transaction)
+        if not execution.success:
+            raise RPCError("execution reverted")
+        return execution.gas_used
+
+    def _eth_send_raw_transaction(self, raw_transaction: str) -> bytes:
+        raw = decode_hex(raw_transaction)
+        tx = _decode_raw_transaction(raw)
+        tx_hash = keccak(raw)
+        sender = tx["from"]
+
+        if tx_hash in self.transactions:
+            raise RPCError(f"already known: {encode_hex(tx_hash)}")
+        expected_nonce = self.nonces.get(sender, 0)
+        if tx["nonce"] < expected_nonce:
+            raise RPCError("nonce too low")
+        if tx["nonce"] > expected_nonce:
+            raise RPCError("nonce too high")
+        if self.balances.get(sender, 0) < tx["gas"] * tx["gasPrice"] + tx["value"]:
+            raise RPCError("insufficient funds for gas * price + value")
+        if tx["gas"] < _intrinsic_gas(tx["input"], is_creation=tx["to"] is None):
+            raise RPCError("intrinsic gas too low")
+
+        # The contract address depends on the nonce before the transaction
+        journal = _Journal()
+        execution = self._execute(sender, tx["to"], tx["value"], tx["input"], journal)
+        gas_used = min(execution.gas_used, tx["gas"])
+        self.nonces[sender] = expected_nonce + 1
+        self.balances[sender] = self.balances.get(sender, 0) - gas_used * tx["gasPrice"]
+
+        block = self._mine_block([tx_hash], gas_used=gas_used)
+        logs = self._finalize_logs(execution.logs, block, tx_hash)
+        self.logs_by_block[block.number].extend(logs)
+        self.transactions[tx_hash] = dict(tx, hash=tx_hash)
+        self.receipts[tx_hash] = {
+            "transactionHash": tx_hash,
+            "transactionIndex": 0,
+            "blockHash": block.hash,
+            "blockNumber": block.number,
+            "from": sender,
+            "to": tx["to"],
+            "cumulativeGasUsed": gas_used,
+            "gasUsed": gas_used,
+            "effectiveGasPrice": tx["gasPrice"],
+            "contractAddress": execution.contract_address,
+            "logs": logs,
+            "logsBloom": b"\x00" * 256,
+            "status": int(execution.success),
+            "type": tx["type"],
+        }
+        for _ in range(self.confirmation_blocks):
+            self._mine_market_block()
+        return tx_hash
+
+    def _eth_get_transaction_by_hash(self, tx_hash: str) -> Optional[dict]:
+        tx_hash_bytes = decode_hex(tx_hash)
+        tx = self.transactions.get(tx_hash_bytes)
+        if tx is None:
+            return None
+        receipt = self.receipts.get(tx_hash_bytes)
+        block_number = receipt["blockNumber"] if receipt else self._history_block(tx_hash_bytes)
+        return dict(
+            tx,
+            blockNumber=block_number,
+            blockHash=self.blocks[block_number].hash,
+            transactionIndex=0,
+            v=0,
+            r=EMPTY_HASH,
+            s=EMPTY_HASH,
+        )
+
+    def _history_block(self, tx_hash: bytes) -> int:
+        return self.transactions[tx_hash]["nonce"] + 1
+
+    def _eth_get_transaction_receipt(self, tx_hash: str) -> Optional[dict]:
+        return self.receipts.get(decode_hex(tx_hash))
+
+    def _eth_get_logs(self, log_filter: dict) -> List[dict]:
+        if "blockHash" in log_filter:
+            block = self._resolve_block(log_filter["blockHash"])
+            from_block = to_block = block.number
+        else:
+            from_block = self._resolve_block(log_filter.get("fromBlock", "latest")).number
+            to_block = self._resolve_block(log_filter.get("toBlock", "latest")).number
+
+        addresses = log_filter.get("address")
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        if addresses is not None:
+            addresses = {to_checksum_address(address) for address in addresses}
+
+        topic_filters = [
+            None if topics is None else {decode_hex(t) for t in _as_list(topics)}
+            for topics in log_filter.get("topics") or []
+        ]
+
+        matches = []
+        for number in sorted(self.logs_by_block):
+            if not from_block <= number <= to_block:
+                continue
+            for log in self.logs_by_block[number]:
+                if addresses is not None and log["address"] not in addresses:
+                    continue
+                if len(topic_filters) > len(log["topics"]):
+                    continue
+                if all(
+                    allowed is None or topic in allowed
+                    for allowed, topic in zip(topic_filters, log["topics"])
+                ):
+                    matches.append(log)
+        return matches
+
+
+def _as_list(value: Any) -> List[Any]:
+    return value if isinstance(value, list) else [value]
+
+
+def _to_json(value: Any) -> Any:
+    """Encode a result the way Geth does: quantities and bytes as hex strings."""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, int):
+        return hex(value)
+    if isinstance(value, (bytes, bytearray)):
+        return encode_hex(value)
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    return value
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "_FakeChainHTTPServer"
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            request = json.loads(body)
+        except ValueError:
+            self._send_json(400, {"error": "invalid json"})
+            return
+
+        chain = self.server.chain
+        if isinstance(request, list):
+            self._send_json(200, [chain.handle_request(item) for item in request])
+        else:
+            self._send_json(200, chain.handle_request(request))
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        path = urlparse(self.path).path.rstrip("/")
+        chain = self.server.chain
+        with chain._lock:  # pylint: disable=protected-access
+            chain.rpc_calls[f"GET {path.rsplit('/', 1)[0]}"] += 1
+            if path == "/api/v1/status":
+                self._send_json(200, {"status": "ready"})
+            elif path == "/known_servers.json":
+                servers = [MATRIX_SERVER]
+                self._send_json(200, {"active_servers": servers, "all_servers": servers})
+            elif path.startswith("/api/v1/tokens/"):
+                token_network = chain.token_network_for(path.rsplit("/", 1)[1])
+                if token_network is None:
+                    self._send_json(404, {"errors": "Token not registered"})
+                else:
+                    self._send_json(200, token_network)
+            else:
+                self._send_json(404, {"errors": "Not found"})
+
+    def _send_json(self, status: int, content: Any) -> None:
+        body = json.dumps(content).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class _FakeChainHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], chain: FakeChain) -> None:
+        super().__init__(address, _RequestHandler)
+        self.chain = chain
+
+
+class FakeChainServer:
+    """Serve a :class:`FakeChain` over HTTP from a background thread.
+
+    Usable as a context manager; the server listens on a free port of
+    ``host`` and ``url`` is the JSON-RPC endpoint.
+    """
+
+    def __init__(self, chain: FakeChain, host: str = "127.0.0.1") -> None:
+        self.chain = chain
+        self._httpd = _FakeChainHTTPServer((host, 0), chain)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"{host}:{port}"
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.address}"
+
+    def start(self) -> "FakeChainServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="fake-chain", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeChainServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,195 @@
+"""Benchmarks of the scenario engine for synthetic scenarios of growing size.
+
+They cover loading a scenario definition, building the task tree, importing
+the task modules and rendering the task tree in the console UI. The results
+are compared against the runs saved in ``tests/benchmarks/baselines``.
+"""
+import subprocess
+import sys
+import tracemalloc
+from typing import Dict
+
+import pytest
+import urwid as uwd
+import yaml
+
+from scenario_player.definition import ScenarioDefinition
+from scenario_player.tasks.base import Task, TaskState
+from scenario_player.ui import TaskTreeListBox, TaskTreeNode
+from scenario_player.utils.configuration.scenario import ScenarioConfig
+from scenario_player.utils.configuration.settings import EnvironmentConfig
+from tests.benchmarks.fake_chain import MATRIX_SERVER
+
+TASK_COUNTS = [10, 1_000, 10_000, 100_000]
+ROUNDS = {10: 20, 1_000: 5, 10_000: 2, 100_000: 1}
+
+# Every block is a parallel task with this many leaf tasks
+BLOCK_WIDTH = 9
+
+SCREEN_SIZE = (120, 40)
+
+IMPORT_SNIPPET = """
+import time
+
+start = time.perf_counter()
+from scenario_player import tasks
+from scenario_player.tasks.base import NAME_TO_TASK, collect_tasks
+
+collect_tasks(tasks)
+print(time.perf_counter() - start, len(NAME_TO_TASK))
+"""
+
+
+class TaskTreeRunner:
+    """Just enough of a ``ScenarioRunner`` to build and render task trees."""
+
+    def __init__(self) -> None:
+        self.task_count = 0
+        self.running_task_count = 0
+        self.task_cache: Dict[str, Task] = {}
+
+    def task_state_changed(self, task: Task, state: TaskState) -> None:
+        pass
+
+
+def synthetic_scenario(task_count: int) -> str:
+    """Return a scenario with about ``task_count`` tasks.
+
+    The root task is a serial task of parallel blocks with ``wait`` tasks,
+    the name of the root task uses the environment to have jinja do some work.
+    """
+    lines = [
+        "version: 2",
+        "settings:",
+        "  gas_price: fast",
+        "token: {}",
+        "nodes:",
+        "  count: 2",
+        "scenario:",
+        "  serial:",
+        '    name: "{{ environment_type }} benchmark"',
+        "    tasks:",
+    ]
+    for block in range(max(1, (task_count - 1) // (BLOCK_WIDTH + 1))):
+        lines.extend(
+            [
+                "      - parallel:",
+                f'          name: "block {block}"',
+                "          tasks:",
+            ]
+        )
+        lines.extend(["            - wait: 0"] * BLOCK_WIDTH)
+    return "\n".join(lines) + "\n"
+
+
+def build_task_tree(scenario: ScenarioConfig) -> TaskTreeRunner:
+    runner = TaskTreeRunner()
+    scenario.root_class(runner=runner, config=scenario.root_config)
+    return runner
+
+
+def render_task_tree(runner: TaskTreeRunner) -> int:
+    """Render the first screen of the task tree, then every row of it.
+
+    Returns the number of rendered rows.
+    """
+    root = runner.task_cache[min(runner.task_cache, key=int)]
+    walker = uwd.TreeWalker(TaskTreeNode(root, key=root.id))
+    TaskTreeListBox(walker).render(SCREEN_SIZE, focus=True)
+
+    rows = 0
+    widget, node = walker.get_focus()
+    while widget is not None:
+        widget.render((SCREEN_SIZE[0],))
+        rows += 1
+        widget, node = walker.get_next(node)
+    return rows
+
+
+@pytest.fixture
+def environment() -> EnvironmentConfig:
+    return EnvironmentConfig(
+        environment_file_name="benchmark.json",
+        environment_type="development",
+        matrix_servers=[MATRIX_SERVER],
+        pfs_with_fee="http://pfs.invalid",
+        eth_rpc_endpoints=["http://eth.invalid"],
+        transfer_token=None,
+        pfs_fee=100,
+        ms_reward_with_margin=100,
+        settlement_timeout_min=40,
+        raiden_client="raiden",
+        wait_short=1,
+        wait_long=1,
+    )
+
+
+@pytest.fixture
+def scenario_config(task_count) -> ScenarioConfig:
+    return ScenarioConfig(yaml.safe_load(synthetic_scenario(task_count)))
+
+
+@pytest.mark.parametrize("task_count", TASK_COUNTS)
+def test_load_definition(benchmark, environment, tmp_path, task_count):
+    """Render and parse the scenario file of ``task_count`` tasks."""
+    scenario_file = tmp_path.joinpath("benchmark_core.yaml")
+    scenario_file.write_text(synthetic_scenario(task_count))
+
+    definition = benchmark.pedantic(
+        ScenarioDefinition,
+        args=(scenario_file, tmp_path, environment),
+        rounds=ROUNDS[task_count],
+    )
+
+    assert definition.settings.gas_price == "FAST"
+    assert definition.scenario.root_config["name"] == "development benchmark"
+
+
+@pytest.mark.parametrize("task_count", TASK_COUNTS)
+def test_build_task_tree(benchmark, scenario_config, task_count):
+    """Instantiate the serial and parallel tasks of ``task_count`` tasks."""
+    benchmark.pedantic(build_task_tree, args=(scenario_config,), rounds=ROUNDS[task_count])
+
+    tracemalloc.start()
+    try:
+        runner = build_task_tree(scenario_config)
+        memory, memory_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    benchmark.extra_info["task_count"] = runner.task_count
+    benchmark.extra_info["memory_bytes"] = memory
+    benchmark.extra_info["memory_peak_bytes"] = memory_peak
+    benchmark.extra_info["memory_bytes_per_task"] = memory // runner.task_count
+
+
+def test_collect_tasks(benchmark):
+    """Import the task modules and register the tasks in a new interpreter."""
+    outputs = []
+
+    def collect():
+        outputs.append(
+            subprocess.run(
+                [sys.executable, "-c", IMPORT_SNIPPET], check=True, capture_output=True, text=True
+            ).stdout
+        )
+
+    benchmark.pedantic(collect, rounds=5)
+
+    import_seconds, task_types = outputs[-1].split()
+    benchmark.extra_info["import_seconds"] = float(import_seconds)
+    benchmark.extra_info["task_types"] = int(task_types)
+
+
+@pytest.mark.parametrize("task_count", TASK_COUNTS)
+def test_render_task_tree(benchmark, scenario_config, task_count):
+    """Render every row of the UI task tree of ``task_count`` tasks."""
+    runners = []
+
+    def setup():
+        runners.append(build_task_tree(scenario_config))
+        return (runners[-1],), {}
+
+    rows = benchmark.pedantic(render_task_tree, setup=setup, rounds=ROUNDS[task_count])
+
+    assert rows == runners[-1].task_count
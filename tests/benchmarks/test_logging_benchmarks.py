@@ -0,0 +1,75 @@
+"""Benchmarks of the logging overhead of a scenario with many transfers.
+
+Every simulated transfer logs the events of a task and its REST API request,
+like ``TransferTask`` does, to a debug log file configured by the ``run``
+subcommand in the given log mode.
+"""
+import json
+import logging
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+import structlog
+
+from scenario_player.main import configure_logging_for_subcommand
+from scenario_player.utils.log_config import LOG_MODES
+
+TRANSFER_COUNT = 5_000
+ROUNDS = 3
+
+TRANSFER_CONFIG = {
+    "from": 0,
+    "to": 3,
+    "amount": 1_000,
+    "lock_timeout": 30,
+    "expected_http_status": 200,
+}
+REQUEST_BODY = json.dumps(
+    {"amount": "1000", "identifier": "1312300001000042", "lock_timeout": "30"}
+).encode()
+RESPONSE = {
+    "initiator_address": "0x" + "1" * 40,
+    "target_address": "0x" + "2" * 40,
+    "token_address": "0x" + "3" * 40,
+    "token_network_address": "0x" + "4" * 40,
+    "amount": "1000",
+    "identifier": "1312300001000042",
+    "secret": "0x" + "5" * 64,
+    "secret_hash": "0x" + "6" * 64,
+    "route": ["0x" + "1" * 40, "0x" + "7" * 40, "0x" + "2" * 40],
+}
+
+
+@pytest.fixture
+def log_file(tmp_path, log_mode) -> Iterator[Path]:
+    log_file = tmp_path.joinpath("scenario-player-run_benchmark.log")
+    configure_logging_for_subcommand(str(log_file), log_mode)
+    root = logging.getLogger()
+    # The console is replaced by the UI in a real run
+    for handler in list(root.handlers):
+        if type(handler) is logging.StreamHandler:  # pylint: disable=unidiomatic-typecheck
+            root.removeHandler(handler)
+    yield log_file
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    structlog.reset_defaults()
+
+
+def log_transfers(transfer_count: int) -> None:
+    log = structlog.get_logger("scenario_player.tasks.api_base")
+    for transfer in range(transfer_count):
+        log.info("Starting task", task=TRANSFER_CONFIG, id=str(transfer))
+        log.debug("Requesting", url="http://127.0.0.1:5000", method="POST", body=REQUEST_BODY)
+        log.debug("Received response", json=RESPONSE)
+        log.info("Task successful", id=str(transfer), task=TRANSFER_CONFIG, runtime=0.1)
+
+
+@pytest.mark.parametrize("log_mode", LOG_MODES)
+def test_log_transfers(benchmark, log_file, log_mode):
+    """Log the events of ``TRANSFER_COUNT`` transfers."""
+    benchmark.pedantic(log_transfers, args=(TRANSFER_COUNT,), rounds=ROUNDS)
+
+    benchmark.extra_info["log_mode"] = log_mode
+    benchmark.extra_info["events"] = 4 * TRANSFER_COUNT * ROUNDS
@@ -0,0 +1,189 @@
+"""Benchmarks of the on-chain parts of the scenario player against a fake chain.
+
+Run them with ``make benchmarks``. Besides the timings, every benchmark
+stores the number of JSON-RPC requests of its last round in ``extra_info``
+and fails if it grew compared to the most recently saved run.
+"""
+import json
+from typing import Set
+
+import pytest
+from click.testing import CliRunner
+from eth_account import Account as EthAccount
+from eth_typing import ChecksumAddress
+from eth_utils import to_checksum_address
+from gevent.event import Event
+
+from scenario_player.constants import NODE_ACCOUNT_BALANCE_FUND
+from scenario_player.main import main
+from scenario_player.runner import ScenarioRunner
+from scenario_player.utils.configuration.settings import EnvironmentConfig
+from scenario_player.utils.reclaim import VALUE_TX_GAS_LIMIT, ReclamationCandidate
+from tests.benchmarks.fake_chain import MATRIX_SERVER, TX_BASE_GAS
+from tests.benchmarks.utils import (
+    ORCHESTRATION_PASSWORD,
+    FakeEnvironment,
+    make_keyfile,
+    node_privkey,
+)
+
+NODE_COUNTS = [10, 100, 1000]
+ROUNDS = {10: 5, 100: 2, 1000: 1}
+
+SCENARIO_TEMPLATE = """
+version: 2
+
+settings:
+  timeout: 30
+  services:
+    udc:
+      enable: true
+      address: "{udc_address}"
+      token:
+        deposit: true
+        balance_per_node: 1000
+        max_funding: 5000
+
+token:
+  address: "{{{{ transfer_token }}}}"
+  balance_min: 1000
+  balance_fund: 10000
+
+nodes:
+  count: {node_count}
+  default_options:
+    api-address: "{api_address}"
+
+scenario:
+  serial:
+    tasks:
+      - wait: 0
+"""
+
+
+def node_addresses(node_count: int) -> Set[ChecksumAddress]:
+    return {
+        to_checksum_address(EthAccount.from_key(node_privkey(index)).address)
+        for index in range(node_count)
+    }
+
+
+def make_scenario_runner(
+    fake_environment: FakeEnvironment, account, tmp_path, node_count: int
+) -> ScenarioRunner:
+    scenario_file = tmp_path.joinpath("benchmark_setup.yaml")
+    scenario_file.write_text(
+        SCENARIO_TEMPLATE.format(
+            udc_address=fake_environment.user_deposit_address,
+            node_count=node_count,
+            api_address=fake_environment.server.address,
+        )
+    )
+    environment_dict = fake_environment.environment_dict()
+    environment_dict.pop("matrix_server_list")
+    environment = EnvironmentConfig(
+        environment_file_name="benchmark.json",
+        matrix_servers=[MATRIX_SERVER],
+        **environment_dict,
+    )
+    return ScenarioRunner(
+        account=account,
+        auth="",
+        data_path=tmp_path,
+        scenario_file=scenario_file,
+        environment=environment,
+        success=Event(),
+        raiden_client=None,
+        smoketest_deployment_data=fake_environment.deployment_data,
+    )
+
+
+@pytest.mark.parametrize("node_count", NODE_COUNTS)
+def test_setup_environment(
+    benchmark,
+    fake_environment_factory,
+    orchestration_account,
+    record_rpc_calls,
+    tmp_path_factory,
+    node_count,
+):
+    """Fund ``node_count`` nodes with ether, UDC deposits and tokens."""
+    addresses = node_addresses(node_count)
+    fake_environments = []
+
+    def setup():
+        fake_environment = fake_environment_factory()
+        runner = make_scenario_runner(
+            fake_environment, orchestration_account, tmp_path_factory.mktemp("setup"), node_count
+        )
+        fake_environment.chain.rpc_calls.clear()
+        fake_environments.append(fake_environment)
+        return (runner,), {}
+
+    benchmark.pedantic(
+        lambda runner: runner.setup_environment_and_run_main_task(addresses),
+        setup=setup,
+        rounds=ROUNDS[node_count],
+    )
+
+    fake_environment = fake_environments[-1]
+    user_deposit = fake_environment.chain.contracts[fake_environment.user_deposit_address]
+    assert set(user_deposit.total_deposits) == addresses
+    record_rpc_calls(fake_environment.chain)
+
+
+@pytest.mark.parametrize("node_count", NODE_COUNTS)
+def test_reclaim_eth(
+    benchmark,
+    fake_environment_factory,
+    orchestration_account,
+    record_rpc_calls,
+    tmp_path_factory,
+    node_count,
+):
+    """Reclaim the ether of ``node_count`` node accounts with ``reclaim-eth``."""
+    privkeys = [node_privkey(index) for index in range(node_count)]
+    addresses = [to_checksum_address(EthAccount.from_key(key).address) for key in privkeys]
+    chains = []
+
+    def setup():
+        fake_environment = fake_environment_factory(
+            {address: NODE_ACCOUNT_BALANCE_FUND for address in addresses}
+        )
+        data_path = tmp_path_factory.mktemp("reclaim")
+        scenario_dir = data_path.joinpath("scenarios", "benchmark_reclaim")
+        for index, privkey in enumerate(privkeys):
+            keys_dir = scenario_dir.joinpath(f"node_{index:03d}", "keys")
+            keys_dir.mkdir(parents=True)
+            keys_dir.joinpath(f"UTC--{index}").write_text(json.dumps(make_keyfile(privkey, "")))
+
+        environment_file = data_path.joinpath("environment.json")
+        environment_file.write_text(json.dumps(fake_environment.environment_dict()))
+
+        # The clients are cached per address, but every round uses a new chain
+        ReclamationCandidate._client_cache.clear()
+        ReclamationCandidate._proxy_manager_cache.clear()
+        fake_environment.chain.rpc_calls.clear()
+        chains.append(fake_environment.chain)
+
+        args = [
+            "reclaim-eth",
+            "--min-age=0",
+            f"--keystore-file={orchestration_account.path}",
+            f"--password={ORCHESTRATION_PASSWORD}",
+            f"--environment={environment_file}",
+            f"--data-path={data_path}",
+        ]
+        return (args,), {}
+
+    def reclaim(args):
+        result = CliRunner().invoke(main, args, catch_exceptions=False)
+        assert result.exit_code == 0, result.output
+
+    benchmark.pedantic(reclaim, setup=setup, rounds=ROUNDS[node_count])
+
+    # Only the unused part of the gas limit of the transfers stays with the nodes
+    chain = chains[-1]
+    unused_gas = VALUE_TX_GAS_LIMIT - TX_BASE_GAS
+    assert all(chain.balances[address] == unused_gas * chain.gas_price for address in addresses)
+    record_rpc_calls(chain)
@@ -0,0 +1,59 @@
+from dataclasses import dataclass
+
+from eth_keyfile import create_keyfile_json
+from eth_utils import keccak
+from raiden_contracts.constants import CONTRACT_USER_DEPOSIT
+
+from tests.benchmarks.fake_chain import FakeChain, FakeChainServer
+
+ORCHESTRATION_PRIVKEY = keccak(text="scenario-player-benchmarks")
+ORCHESTRATION_PASSWORD = "benchmarks"
+ORCHESTRATION_BALANCE = 10**24
+
+# Keyfiles are written for every node of every round, the default KDF
+# parameters would dominate the measurements.
+KEYFILE_KDF_ITERATIONS = 2
+
+
+def make_keyfile(privkey: bytes, password: str) -> dict:
+    return create_keyfile_json(
+        privkey, password.encode(), kdf="pbkdf2", iterations=KEYFILE_KDF_ITERATIONS
+    )
+
+
+def node_privkey(index: int) -> bytes:
+    return keccak(text=f"scenario-player-benchmarks-node-{index}")
+
+
+@dataclass
+class FakeEnvironment:
+    """A running fake chain with the Raiden contracts and a registered token."""
+
+    server: FakeChainServer
+    deployment_data: dict
+    transfer_token: str
+
+    @property
+    def chain(self) -> FakeChain:
+        return self.server.chain
+
+    @property
+    def user_deposit_address(self) -> str:
+        return self.deployment_data["contracts"][CONTRACT_USER_DEPOSIT]["address"]
+
+    def environment_dict(self) -> dict:
+        """Content of an environment file pointing at the fake chain."""
+        return {
+            "environment_type": "development",
+            "development_environment": "demo",
+            "matrix_server_list": f"{self.server.url}/known_servers.json",
+            "pfs_with_fee": f"{self.server.url}/pfs",
+            "eth_rpc_endpoints": [self.server.url],
+            "transfer_token": self.transfer_token,
+            "pfs_fee": 100,
+            "ms_reward_with_margin": 100,
+            "settlement_timeout_min": 40,
+            "raiden_client": "raiden",
+            "wait_short": 1,
+            "wait_long": 1,
+        }
@@ -34,7 +34,7 @@ class TestPasswordHandling:
     # to avoid having to pass an extra argument to all methods.
     @pytest.fixture(autouse=True)
     def patch_collect_tasks_on_setup(self):
-        with patch("scenario_player.main.collect_tasks", side_effect=Sentinel):
+        with patch("scenario_player.tasks.base.collect_tasks", side_effect=Sentinel):
             # Yield instead of return,
             # as that allows the patching to be undone after the test is complete.
             yield
@@ -114,7 +114,7 @@ class TestVersionInformation:
 
 
 class TestDataPathBehavior:
-    @patch("scenario_player.main.Web3")
+    @patch("web3.Web3")
     def test_reclaim_eth_data_path(self, web3_mock, runner, tmpdir):
         """Regression test, to make sure '--data-path' is respected for
         'reclaim-eth' subcommand."""
@@ -137,3 +137,26 @@ class TestDataPathBehavior:
                 assert logfile_path.startswith(path_arg)
                 return
         assert False
+
+
+class TestProfile:
+    def test_profile_written_on_startup_failure(self, runner, tmpdir):
+        """The profile of a startup that fails, e.g. on a wrong password, is written."""
+        data_path = Path(str(tmpdir))
+        result = runner.invoke(
+            main.run,
+            f"--data-path {data_path} --profile "
+            f"{CLI_ARGS.format(pw_option='--password wrong_password')}".split(" "),
+        )
+        assert result.exc_info[0] == WrongPassword
+        profile_dir = data_path.joinpath("scenarios", "join-network-scenario-J1", "profile")
+        assert profile_dir.joinpath("startup.samples.folded").exists()
+        assert profile_dir.joinpath("startup.stalls.jsonl").exists()
+
+
+def test_smoketest_eth_client_choices():
+    from raiden_common.constants import EthClient
+
+    eth_client = next(param for param in main.smoketest.params if param.name == "eth_client")
+
+    assert eth_client.type.choices == [client.value for client in EthClient]
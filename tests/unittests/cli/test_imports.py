@@ -0,0 +1,58 @@
+import subprocess
+import sys
+
+# Modules that take hundreds of milliseconds to import and are only needed by
+# some of the subcommands.
+HEAVY_MODULES = [
+    "web3",
+    "raiden_common",
+    "raiden_contracts",
+    "urwid",
+    "jinja2",
+    "yaml",
+    "scenario_player.runner",
+]
+
+# Generous upper bound for the cumulative import time of the CLI module
+IMPORT_TIME_BUDGET_US = 500_000
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], check=True, capture_output=True, text=True, timeout=60
+    )
+
+
+def test_cli_import_does_not_load_heavy_modules():
+    result = run_python(
+        "-c",
+        "import sys, scenario_player.main; "
+        f"print(' '.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))",
+    )
+    assert result.stdout.split() == []
+
+
+def test_cli_import_time():
+    result = run_python("-X", "importtime", "-c", "import scenario_player.main")
+    cumulative_times = {}
+    # Lines look like "import time:  self [us] | cumulative | imported package"
+    for line in result.stderr.splitlines()[1:]:
+        _, cumulative, name = line.split("|")
+        cumulative_times[name.strip()] = int(cumulative)
+
+    assert cumulative_times["scenario_player.main"] < IMPORT_TIME_BUDGET_US
+
+
+def test_version_short_is_lightweight():
+    result = run_python(
+        "-c",
+        "import sys\n"
+        "from click.testing import CliRunner\n"
+        "from scenario_player.main import main\n"
+        "result = CliRunner().invoke(main, ['version', '--short'])\n"
+        "print(result.output.strip())\n"
+        f"print(' '.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))\n",
+    )
+    version, *loaded = result.stdout.splitlines()
+    assert version
+    assert not "".join(loaded).split()
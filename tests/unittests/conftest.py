@@ -128,11 +128,13 @@ def mocked_scenario_runner(dummy_scenario_definition):
             self.task_storage: Dict[str, dict] = defaultdict(dict)
             self.task_count = 0
             self.running_task_count = 0
+            self.transfer_count = 0
             self.run_number = 0
             self.protocol = "http"
             self.token = DummyTokenContract(token_address)
             self.token_network_address = token_network_address
             self.node_controller = DummyNodeController(node_count)
+            self.payment_tracer = None
 
         def task_state_changed(self, task, new_state):
             pass
@@ -2,7 +2,6 @@ import pytest
 
 from scenario_player import tasks
 from scenario_player.tasks.base import collect_tasks, get_task_class_for_type, Task, NAME_TO_TASK
-from scenario_player.tasks.channels import TransferTask
 
 pytest.register_assert_rewrite("tests.unittests.tasks.utils")
 
@@ -25,8 +24,6 @@ def _reset_sync_waits():
 def api_task_by_name(dummy_scenario_runner):
     def get_task(task_type, config):
         task_class = get_task_class_for_type(task_type)
-        if issubclass(task_class, TransferTask):
-            task_class._transfer_count = 0
         return task_class(runner=dummy_scenario_runner, config=config)
 
     return get_task
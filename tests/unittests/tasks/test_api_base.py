@@ -0,0 +1,38 @@
+import dataclasses
+import json
+from unittest.mock import Mock
+
+import pytest
+from tests.unittests.constants import NODE_ADDRESS_1, TEST_TOKEN_ADDRESS
+
+
+def test_request_plan_is_resolved_once(mocked_responses, dummy_scenario_runner, api_task_by_name):
+    task = api_task_by_name("transfer", {"from": 0, "to": 1, "amount": 1})
+    task.compile()
+    plan = task.plan
+
+    assert plan.method == "POST"
+    assert plan.url == f"http://0/api/v1/payments/{TEST_TOKEN_ADDRESS}/{NODE_ADDRESS_1}"
+    assert plan.params == {"amount": 1, "identifier": 135127100001000001}
+    assert plan.body == json.dumps(plan.params).encode()
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        plan.url = "http://1"  # type: ignore
+
+    # Running the task doesn't resolve the nodes again
+    dummy_scenario_runner.get_node_address = Mock(side_effect=AssertionError)
+    dummy_scenario_runner.get_node_baseurl = Mock(side_effect=AssertionError)
+    mocked_responses.add("POST", plan.url, json={"identifier": 1})
+
+    assert task() == {"identifier": 1}
+    assert task.plan is plan
+    assert mocked_responses.calls[0].request.headers["Content-Type"] == "application/json"
+
+
+def test_request_plan_matches_expected_status(api_task_by_name):
+    task = api_task_by_name(
+        "open_channel", {"from": 0, "to": 1, "expected_http_status": "(2..|409)"}
+    )
+
+    assert task.plan.status_matches(201)
+    assert task.plan.status_matches(409)
+    assert not task.plan.status_matches(500)
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+from tests.unittests.constants import (
+    NODE_ADDRESS_0,
+    NODE_ADDRESS_1,
+    NODE_ADDRESS_2,
+    TEST_TOKEN_ADDRESS,
+    TEST_TOKEN_NETWORK_ADDRESS,
+)
+
+from scenario_player.exceptions import ScenarioError, SynchronizationTimeout
+
+SYNCING = {"status": "syncing", "blocks_to_sync": "3"}
+READY = {"status": "ready"}
+
+
+def channel(total_deposit, state="opened", channel_identifier=1):
+    return {
+        "channel_identifier": channel_identifier,
+        "state": state,
+        "total_deposit": str(total_deposit),
+    }
+
+
+def test_wait_for_nodes_to_sync(mocked_responses, api_task_by_name):
+    mocked_responses.add("GET", "http://0/api/v1/status", json=READY)
+    mocked_responses.add("GET", "http://1/api/v1/status", json=SYNCING)
+    mocked_responses.add("GET", "http://1/api/v1/status", json=READY)
+
+    task = api_task_by_name("wait_for_sync", {"nodes": [0, 1]})
+
+    assert task()
+    assert [str(condition) for condition in task.conditions] == ["node 0 synced", "node 1 synced"]
+
+
+def test_wait_for_channel_partners(mocked_responses, api_task_by_name):
+    url_0 = f"http://0/api/v1/channels/{TEST_TOKEN_ADDRESS}/{NODE_ADDRESS_1}"
+    url_1 = f"http://1/api/v1/channels/{TEST_TOKEN_ADDRESS}/{NODE_ADDRESS_0}"
+    mocked_responses.add("GET", url_0, json=channel(10))
+    mocked_responses.add("GET", url_1, status=404, json={})
+    mocked_responses.add("GET", url_1, json=channel(0))
+    mocked_responses.add("GET", url_1, json=channel(5))
+
+    task = api_task_by_name(
+        "wait_for_sync",
+        {
+            "nodes": [],
+            "channels": [{"from": 0, "to": 1, "total_deposit": 10, "partner_total_deposit": 5}],
+        },
+    )
+
+    assert task()
+    assert len(mocked_responses.calls) == 6
+
+
+def test_wait_for_pfs_capacity(mocked_responses, api_task_by_name):
+    url = f"http://pfs/api/v1/{TEST_TOKEN_NETWORK_ADDRESS}/paths"
+    mocked_responses.add("POST", url, status=404, json={"error_code": 2201})
+    mocked_responses.add(
+        "POST", url, json={"result": [{"path": [NODE_ADDRESS_0, NODE_ADDRESS_2]}]}
+    )
+
+    task = api_task_by_name(
+        "wait_for_sync", {"nodes": [], "pfs_capacity": [{"from": 0, "to": 2, "amount": 100}]}
+    )
+
+    assert task()
+    assert json.loads(mocked_responses.calls[-1].request.body) == {
+        "from": NODE_ADDRESS_0,
+        "to": NODE_ADDRESS_2,
+        "value": 100,
+        "max_paths": 1,
+    }
+
+
+def test_wait_for_block(dummy_scenario_runner, api_task_by_name):
+    dummy_scenario_runner.client.block_number.side_effect = [8, 9, 10]
+
+    assert api_task_by_name("wait_for_sync", {"nodes": [], "block": 10})()
+    assert dummy_scenario_runner.client.block_number.call_count == 3
+
+
+def test_timeout_reports_missing_conditions(mocked_responses, api_task_by_name):
+    mocked_responses.add("GET", "http://0/api/v1/status", json=READY)
+    mocked_responses.add("GET", "http://1/api/v1/status", json=SYNCING)
+
+    task = api_task_by_name("wait_for_sync", {"nodes": [0, 1], "timeout": 0.3})
+
+    with pytest.raises(SynchronizationTimeout) as ex:
+        task()
+    assert str(ex.value) == (
+        "Not in sync after 0.3s: node 1 synced: "
+        "status is {'status': 'syncing', 'blocks_to_sync': '3'}"
+    )
+
+
+def test_invalid_config(api_task_by_name):
+    with pytest.raises(ScenarioError, match="Missing key 'amount'"):
+        api_task_by_name("wait_for_sync", {"pfs_capacity": [{"from": 0, "to": 1}]})
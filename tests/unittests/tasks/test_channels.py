@@ -5,6 +5,7 @@ from scenario_player.exceptions import (
     ScenarioAssertionError,
     ScenarioError,
 )
+from scenario_player.tasks.base import get_task_class_for_type
 from scenario_player.tasks.channels import STORAGE_KEY_CHANNEL_INFO
 from tests.unittests.constants import NODE_ADDRESS_0, NODE_ADDRESS_1, TEST_TOKEN_ADDRESS
 
@@ -322,6 +323,18 @@ from tests.unittests.tasks.utils import assert_task_test, generic_task_test
             [{"balance": "100"}, {"balance": "50"}],
             id="assert_all-balance-not-found",
         ),
+        pytest.param(
+            "assert_all",
+            {"from": 0, "balances": [100, 90, 90]},
+            ScenarioAssertionError,
+            "Value mismatch, missing: 90 (2x); unexpected: 100, 50",
+            "GET",
+            f"http://0/api/v1/channels/{TEST_TOKEN_ADDRESS}",
+            {},
+            200,
+            [{"balance": "100"}, {"balance": "50"}, {"balance": "100"}],
+            id="assert_all-balance-multiplicities",
+        ),
         pytest.param(
             "assert_sum",
             {"from": 0, "balance_sum": 100},
@@ -642,3 +655,16 @@ def test_timeout_sends_debugging_signal(
         resp_json=resp_json,
     )
     assert capsys.readouterr().err == "Debugging signal sent\n"
+
+
+def test_transfer_identifiers_are_counted_per_runner(mocked_scenario_runner):
+    runners = [mocked_scenario_runner("dummy_scenario", TEST_TOKEN_ADDRESS) for _ in range(2)]
+    transfer = get_task_class_for_type("transfer")
+
+    identifiers = [
+        transfer(runner, {"from": 0, "to": 1, "amount": 1})._config["identifier"]
+        for runner in runners + runners
+    ]
+
+    # Every runner numbers its own transfers, as the runs of a suite share the process
+    assert identifiers == [135127100001000001] * 2 + [135127100001000002] * 2
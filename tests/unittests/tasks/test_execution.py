@@ -0,0 +1,108 @@
+from collections import Counter
+from itertools import islice
+
+import gevent
+import pytest
+
+from scenario_player.exceptions import ScenarioError
+from scenario_player.tasks.base import Task, register_task
+from scenario_player.tasks.execution import ParallelTask, smooth_weighted_round_robin
+
+
+class RecordingTask(Task):
+    _name = "record"
+
+    started = []
+    running = Counter()
+    max_running = Counter()
+
+    def _run(self, *args, **kwargs):  # pylint: disable=unused-argument
+        node = self._config["from"]
+        self.started.append(node)
+        self.running[node] += 1
+        self.max_running[node] = max(self.max_running[node], self.running[node])
+        gevent.sleep(0.02)
+        self.running[node] -= 1
+
+
+@pytest.fixture
+def recording_task():
+    register_task(RecordingTask._name, RecordingTask)
+    RecordingTask.started = []
+    RecordingTask.running = Counter()
+    RecordingTask.max_running = Counter()
+    return RecordingTask
+
+
+def parallel_config(nodes, **options):
+    return {"tasks": [{"record": {"from": node}} for node in nodes], **options}
+
+
+def test_smooth_weighted_round_robin():
+    schedule = smooth_weighted_round_robin({"a": 3, "b": 1})
+
+    assert list(islice(schedule, 8)) == ["a", "a", "b", "a", "a", "a", "b", "a"]
+
+
+def test_parallel_task_without_limits_starts_in_order(dummy_scenario_runner, recording_task):
+    task = ParallelTask(dummy_scenario_runner, parallel_config([0, 0, 1, 0]))
+
+    task()
+
+    assert recording_task.started == [0, 0, 1, 0]
+    assert recording_task.max_running[0] == 3
+
+
+def test_parallel_task_limits_in_flight_per_node(dummy_scenario_runner, recording_task):
+    config = parallel_config([0] * 10 + [1] * 3, max_in_flight_per_node=2)
+    task = ParallelTask(dummy_scenario_runner, config)
+
+    task()
+
+    assert recording_task.max_running == {0: 2, 1: 2}
+    # Node 1 is not starved by the queued tasks of node 0
+    assert recording_task.started[:4] == [0, 1, 0, 1]
+    assert task.queue_depth == {0: 0, 1: 0}
+    assert task.in_flight == {0: 0, 1: 0}
+
+
+def test_parallel_task_weighted_round_robin(dummy_scenario_runner, recording_task):
+    config = parallel_config([0] * 6 + [1] * 6, concurrency=1, node_weights={0: 3, 1: 1})
+    task = ParallelTask(dummy_scenario_runner, config)
+
+    task()
+
+    assert recording_task.started[:8] == [0, 0, 1, 0, 0, 0, 1, 0]
+
+
+def test_parallel_task_exposes_queue_depth(dummy_scenario_runner, recording_task):
+    config = parallel_config([0] * 5 + [1] * 2, max_in_flight_per_node=1)
+    task = ParallelTask(dummy_scenario_runner, config)
+
+    greenlet = gevent.spawn(task)
+    gevent.sleep(0.005)
+    assert task.queue_depth == {0: 4, 1: 1}
+    assert task.in_flight == {0: 1, 1: 1}
+
+    greenlet.get()
+    assert task.queue_depth == {0: 0, 1: 0}
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"max_in_flight_per_node": 0},
+        {"max_in_flight_per_node": "2"},
+        {"max_in_flight_per_node": True},
+        {"node_weights": {0: 0}},
+        {"node_weights": {0: 1.5}},
+        {"node_weights": {0: True}},
+        {"node_weights": [0, 1]},
+        # The keys must match the `from` nodes, here integers
+        {"node_weights": {"0": 2}},
+        {"node_weights": {0: 2, 5: 1}},
+    ],
+)
+def test_parallel_task_rejects_invalid_scheduling(dummy_scenario_runner, recording_task, options):
+    with pytest.raises(ScenarioError):
+        ParallelTask(dummy_scenario_runner, parallel_config([0, 1], **options))
@@ -0,0 +1,103 @@
+import json
+import re
+
+import gevent
+import pytest
+
+from scenario_player.exceptions import ScenarioError
+from scenario_player.tasks import generators
+from scenario_player.tasks.base import get_task_class_for_type
+from scenario_player.utils.configuration.generators import (
+    DEFAULT_CONCURRENCY,
+    TopologyConfig,
+    TrafficConfig,
+)
+from tests.unittests.constants import NODE_ADDRESS_0, TEST_TOKEN_ADDRESS
+
+
+@pytest.fixture(autouse=True)
+def _run_tasks_once(monkeypatch):
+    # Tasks with a timeout are repeated until they return a result, in scenarios
+    # these tasks have none and run once
+    for task_type in ("open_topology", "run_traffic", "open_channel", "transfer"):
+        monkeypatch.setattr(get_task_class_for_type(task_type), "DEFAULT_TIMEOUT", 0)
+
+
+@pytest.fixture
+def generator_definition(dummy_scenario_runner):
+    definition = dummy_scenario_runner.definition
+    definition.topology = TopologyConfig({}, len(dummy_scenario_runner.node_controller))
+    definition.traffic = TrafficConfig({}, len(dummy_scenario_runner.node_controller))
+    return definition
+
+
+def test_open_topology(mocked_responses, generator_definition, api_task_by_name):
+    generator_definition.topology = TopologyConfig(
+        {"topology": {"type": "hub", "deposit": 100}}, 4
+    )
+    for node in range(1, 4):
+        mocked_responses.add("PUT", f"http://{node}/api/v1/channels", json={}, status=201)
+
+    task = api_task_by_name("open_topology", {"concurrency": 2})
+    task()
+
+    requests = [json.loads(call.request.body) for call in mocked_responses.calls]
+    assert requests == 3 * [
+        {
+            "token_address": TEST_TOKEN_ADDRESS,
+            "partner_address": NODE_ADDRESS_0,
+            "total_deposit": 100,
+        }
+    ]
+    assert "3/3 open_channel" in str(task)
+
+
+def test_run_traffic_overrides_definition(
+    mocked_responses, generator_definition, api_task_by_name
+):
+    generator_definition.traffic = TrafficConfig({"traffic": {"count": 100, "amount": 1}}, 4)
+    mocked_responses.add(
+        "POST", re.compile(r"http://\d/api/v1/payments/.*"), json={}, status=200
+    )
+
+    task = api_task_by_name("run_traffic", {"count": 5, "amount": 3})
+    task()
+
+    assert len(mocked_responses.calls) == 5
+    assert all(json.loads(call.request.body)["amount"] == 3 for call in mocked_responses.calls)
+
+
+@pytest.mark.parametrize("task_name", ["open_topology", "run_traffic"])
+def test_generator_without_configuration(generator_definition, api_task_by_name, task_name):
+    with pytest.raises(ScenarioError):
+        api_task_by_name(task_name, {})
+
+
+@pytest.mark.parametrize(
+    "config, concurrency",
+    [({"count": 30, "amount": 1}, DEFAULT_CONCURRENCY), ({"count": 5, "amount": 1}, 2)],
+    ids=["default", "configured"],
+)
+def test_generator_bounds_sub_tasks(
+    monkeypatch, generator_definition, api_task_by_name, config, concurrency
+):
+    if concurrency != DEFAULT_CONCURRENCY:
+        config["concurrency"] = concurrency
+    created = []
+    created_before_first_finished = []
+
+    class SubTask:
+        def __init__(self, runner, config, parent):  # pylint: disable=unused-argument
+            created.append(config)
+
+        def __call__(self):
+            gevent.sleep(0.01)
+            if not created_before_first_finished:
+                created_before_first_finished.append(len(created))
+
+    monkeypatch.setattr(generators, "get_task_class_for_type", lambda _: SubTask)
+    task = api_task_by_name("run_traffic", config)
+    task()
+
+    assert created_before_first_finished == [concurrency]
+    assert len(created) == config["count"]
@@ -0,0 +1,91 @@
+import pytest
+from tests.unittests.constants import (
+    NODE_ADDRESS_0,
+    NODE_ADDRESS_1,
+    NODE_ADDRESS_2,
+    TEST_TOKEN_ADDRESS,
+)
+
+from scenario_player.exceptions import ScenarioAssertionError, ScenarioError
+from scenario_player.tasks.network import derive_channels
+
+MODEL = {
+    "deposits": [
+        {"from": 0, "to": 1, "total_deposit": 10},
+        {"from": 1, "to": 2, "total_deposit": 10},
+    ],
+    "withdraws": [{"from": 1, "to": 2, "total_withdraw": 3}],
+    "transfers": [{"from": 0, "to": 1, "amount": 1}, {"path": [0, 1, 2], "amount": 2}],
+}
+
+
+def channel(partner_address, total_deposit, balance, total_withdraw=0, state="opened"):
+    return {
+        "partner_address": partner_address,
+        "state": state,
+        "total_deposit": str(total_deposit),
+        "total_withdraw": str(total_withdraw),
+        "balance": str(balance),
+    }
+
+
+def channels_url(node):
+    return f"http://{node}/api/v1/channels/{TEST_TOKEN_ADDRESS}"
+
+
+def test_derive_channels():
+    balances = {key: fields["balance"] for key, fields in derive_channels(MODEL).items()}
+
+    assert balances == {(0, 1): 7, (1, 0): 3, (1, 2): 5, (2, 1): 2}
+
+
+def test_derive_channels_transfer_without_channel():
+    with pytest.raises(ScenarioError, match="channel 2-0"):
+        derive_channels({"transfers": [{"from": 2, "to": 0, "amount": 1}]})
+
+
+def test_assert_network_state(mocked_responses, api_task_by_name):
+    mocked_responses.add("GET", channels_url(0), json=[channel(NODE_ADDRESS_1, 10, 7)])
+    # The second sweep sees the completed mediated transfer
+    mocked_responses.add("GET", channels_url(1), json=[channel(NODE_ADDRESS_0, 0, 1)])
+    mocked_responses.add(
+        "GET",
+        channels_url(1),
+        json=[channel(NODE_ADDRESS_0, 0, 3), channel(NODE_ADDRESS_2, 10, 5, total_withdraw=3)],
+    )
+    mocked_responses.add("GET", channels_url(2), json=[channel(NODE_ADDRESS_1, 0, 2)])
+
+    task = api_task_by_name("assert_network_state", {"model": MODEL})
+
+    assert task()
+    assert len(mocked_responses.calls) == 6
+
+
+def test_assert_network_state_reports_mismatches(mocked_responses, api_task_by_name):
+    mocked_responses.add("GET", channels_url(0), json=[channel(NODE_ADDRESS_1, 10, 8)])
+    mocked_responses.add("GET", channels_url(1), status=500, json={})
+
+    task = api_task_by_name(
+        "assert_network_state",
+        {
+            "timeout": 0.1,
+            "channels": [
+                {"from": 0, "to": 1, "balance": 9},
+                {"from": 0, "to": 2, "state": "opened"},
+                {"from": 1, "to": 0, "balance": 1},
+            ],
+        },
+    )
+
+    with pytest.raises(ScenarioAssertionError) as ex:
+        task()
+    message = str(ex.value)
+    assert "3 mismatches" in message
+    assert "0->1: balance is 8, expected 9" in message
+    assert "node 0 has no channel with 2" in message
+    assert "node 1: request failed" in message
+
+
+def test_assert_network_state_requires_expectation(api_task_by_name):
+    with pytest.raises(ScenarioError):
+        api_task_by_name("assert_network_state", {"timeout": 1})
@@ -1,3 +1,5 @@
+from unittest.mock import Mock
+
 import pytest
 from tests.unittests.constants import (
     NODE_ADDRESS_0,
@@ -128,3 +130,12 @@ def test_service_task(
         resp_code=resp_code,
         resp_json=resp_json,
     )
+
+
+def test_pfs_history_without_expected_routes_compiles_once(api_task_by_name):
+    task = api_task_by_name("assert_pfs_history", {"source": 0, "request_count": 1})
+    task.compile()
+    task.compile = Mock(side_effect=AssertionError)
+
+    assert task.expected_routes == []
+    assert task.expected_routes == []
@@ -0,0 +1,155 @@
+import gzip
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from scenario_player.analysis import (
+    build_index,
+    find_run_logs,
+    index_dir_for,
+    open_run_index,
+    parse_node_log,
+)
+from scenario_player.main import main
+from scenario_player.utils.identifiers import generate_payment_identifier
+
+PAYMENT = generate_payment_identifier("scenario", 3, 1)
+
+
+def log_line(second, event, level="debug", **fields):
+    return json.dumps(
+        {"timestamp": f"2021-03-01 12:00:{second:06.3f}", "event": event, "level": level, **fields}
+    )
+
+
+NODE_LOGS = {
+    0: [
+        log_line(1, "Payment initiated", payment_identifier=PAYMENT, channel_identifier=7),
+        log_line(2, "Unrelated"),
+        log_line(
+            14,
+            "State changes",
+            state_changes=[f"ReceiveSecretReveal(payment_identifier={PAYMENT}, ...)"],
+        ),
+    ],
+    1: [
+        log_line(3, "Mediating", payment_identifier=str(PAYMENT), channel_identifier="8"),
+        "Traceback (most recent call last):",
+        log_line(4, "Failed", level="error"),
+        log_line(25, "Failed", level="critical"),
+    ],
+}
+
+
+def write_log(path, lines):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    content = "".join(f"{line}\n" for line in lines).encode()
+    if path.name.endswith(".gz"):
+        path.write_bytes(gzip.compress(content))
+    else:
+        path.write_bytes(content)
+    return path
+
+
+@pytest.fixture
+def scenario_dir(tmp_path):
+    scenario_dir = tmp_path.joinpath("scenarios", "scenario")
+    write_log(scenario_dir.joinpath("node_0003_000", "run-003.log.gz"), NODE_LOGS[0])
+    write_log(scenario_dir.joinpath("node_0003_001", "run-003.log"), NODE_LOGS[1])
+    write_log(scenario_dir.joinpath("node_0002_000", "run-002.log"), NODE_LOGS[1])
+    return scenario_dir
+
+
+def test_find_run_logs(scenario_dir):
+    assert find_run_logs(scenario_dir, 3) == {
+        0: scenario_dir.joinpath("node_0003_000", "run-003.log.gz"),
+        1: scenario_dir.joinpath("node_0003_001", "run-003.log"),
+    }
+    with pytest.raises(FileNotFoundError):
+        find_run_logs(scenario_dir, 4)
+
+
+def test_find_run_logs_of_reused_accounts(tmp_path):
+    node_log = write_log(tmp_path.joinpath("node_001", "run-005.log"), NODE_LOGS[0])
+    write_log(tmp_path.joinpath("node_001", "run-004.log"), NODE_LOGS[0])
+
+    assert find_run_logs(tmp_path, 5) == {1: node_log}
+
+
+def test_parse_node_log(scenario_dir, tmp_path):
+    node_meta = parse_node_log(scenario_dir.joinpath("node_0003_001", "run-003.log"), 1, tmp_path)
+
+    assert node_meta["row_count"] == 3
+    assert node_meta["invalid_lines"] == 1
+    assert node_meta["events"] == ["Mediating", "Failed"]
+    assert node_meta["error_counts"] == {"1614600000": [2, 1], "1614600020": [1, 1]}
+
+
+@pytest.mark.parametrize("parallel", [1, 2])
+def test_trace_payment(scenario_dir, parallel):
+    index = build_index(
+        find_run_logs(scenario_dir, 3), index_dir_for(scenario_dir, 3), parallel=parallel
+    )
+
+    assert len(index) == 6
+    trace = index.trace_payment(PAYMENT)
+    assert [(entry.node, entry.event) for entry in trace] == [
+        (0, "Payment initiated"),
+        (1, "Mediating"),
+        (0, "State changes"),
+    ]
+    assert [entry.channel_identifier for entry in trace] == [7, 8, None]
+    assert trace[1].timestamp - trace[0].timestamp == pytest.approx(2)
+    assert index.trace_payment(PAYMENT + 1) == []
+
+    raw_entries = index.raw_entries(entry.row for entry in trace)
+    assert raw_entries[trace[2].row]["event"] == "State changes"
+    assert raw_entries[trace[1].row]["payment_identifier"] == str(PAYMENT)
+
+
+def test_error_rates(scenario_dir):
+    index = build_index(find_run_logs(scenario_dir, 3), index_dir_for(scenario_dir, 3))
+
+    assert index.error_rates() == {
+        0: [[1614600000, 2, 0], [1614600010, 1, 0]],
+        1: [[1614600000, 2, 1], [1614600020, 1, 1]],
+    }
+    # Rounded up to a multiple of the interval of the index
+    assert index.error_rates(25)[1] == [[1614600000, 3, 2]]
+
+
+def test_index_is_rebuilt_when_logs_change(scenario_dir):
+    index_dir = index_dir_for(scenario_dir, 3)
+    assert len(open_run_index(scenario_dir, 3)) == 6
+    index_mtime = index_dir.joinpath("index.json").stat().st_mtime_ns
+
+    assert len(open_run_index(scenario_dir, 3)) == 6
+    assert index_dir.joinpath("index.json").stat().st_mtime_ns == index_mtime
+
+    node_log = scenario_dir.joinpath("node_0003_001", "run-003.log")
+    write_log(node_log, NODE_LOGS[1][:1])
+    os.utime(node_log, (1, 1))
+
+    index = open_run_index(scenario_dir, 3)
+    assert len(index) == 4
+    assert not index_dir.joinpath("parts").exists()
+
+
+def test_analyze_command(scenario_dir, tmp_path):
+    scenario_dir.joinpath("run_number.txt").write_text("3")
+
+    result = CliRunner().invoke(
+        main,
+        ["analyze", "--data-path", str(tmp_path), "--trace-transfer", "1", "scenario.yaml"],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert f"Payment {PAYMENT} (run 3, transfer 1): 3 entries on nodes [0, 1]" in result.output
+
+    result = CliRunner().invoke(
+        main, ["analyze", "--data-path", str(tmp_path), "--run-number", "9", "scenario.yaml"]
+    )
+    assert result.exit_code == 1
+    assert "No node logs of run 9" in result.output
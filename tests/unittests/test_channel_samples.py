@@ -0,0 +1,118 @@
+import gevent
+import pytest
+from tests.unittests.constants import NODE_ADDRESS_0, NODE_ADDRESS_1, TEST_TOKEN_ADDRESS
+
+from scenario_player.channel_samples import (
+    EXTERNAL_PARTNER,
+    STATES,
+    ChannelSampler,
+    ChannelSamples,
+    sparkline,
+)
+
+
+def channel(partner_address, balance, channel_identifier=1, state="opened"):
+    return {
+        "channel_identifier": str(channel_identifier),
+        "partner_address": partner_address,
+        "state": state,
+        "balance": str(balance),
+        "total_deposit": "100",
+        "total_withdraw": "0",
+    }
+
+
+def add_node_responses(mocked_responses, node, channels, pending_transfers=()):
+    base_url = f"http://{node}/api/v1"
+    mocked_responses.add("GET", f"{base_url}/channels/{TEST_TOKEN_ADDRESS}", json=channels)
+    mocked_responses.add(
+        "GET", f"{base_url}/pending_transfers/{TEST_TOKEN_ADDRESS}", json=list(pending_transfers)
+    )
+
+
+@pytest.fixture
+def sampler(dummy_scenario_runner, tmp_path):
+    dummy_scenario_runner.node_controller.node_count = 2
+    sampler = ChannelSampler(dummy_scenario_runner, 60, tmp_path.joinpath("run-000"))
+    yield sampler
+    sampler.stop()
+
+
+def test_sample_channels(mocked_responses, sampler):
+    pending = {"channel_identifier": "1", "locked_amount": "5"}
+    add_node_responses(mocked_responses, 0, [channel(NODE_ADDRESS_1, 100)], [pending, pending])
+    add_node_responses(mocked_responses, 1, [channel("0x" + "e" * 40, 7, channel_identifier=2)])
+
+    sampler.start()
+    # The first sample is taken in the background, the next one in 60 seconds
+    gevent.sleep(0.1)
+    sampler.sample()
+
+    samples = ChannelSamples(sampler.directory)
+    assert len(samples) == 4
+    assert samples.meta["addresses"] == [NODE_ADDRESS_0, NODE_ADDRESS_1]
+    assert samples.series(0, 1, "balance")[0][1] == 100
+    assert [value for _, value in samples.series(0, 1, "locked_amount")] == [10, 10]
+    assert list(samples.column("partner")) == [1, EXTERNAL_PARTNER] * 2
+    assert [total for _, total in samples.totals("balance")] == [107, 107]
+
+
+def test_sample_amounts_are_exact(mocked_responses, sampler):
+    balance = 10**18 + 1
+    pending = {"channel_identifier": "1", "locked_amount": str(2**64 + 3)}
+    add_node_responses(mocked_responses, 0, [channel(NODE_ADDRESS_1, balance)], [pending])
+    add_node_responses(mocked_responses, 1, [channel(NODE_ADDRESS_0, balance)])
+
+    sampler.start()
+    gevent.sleep(0.1)
+
+    samples = ChannelSamples(sampler.directory)
+    assert samples.column("balance") == [balance, balance]
+    assert samples.column("locked_amount") == [2**64 + 3, 0]
+    assert [total for _, total in samples.totals("balance")] == [2 * balance]
+
+
+def test_sample_skips_failed_nodes(mocked_responses, sampler):
+    add_node_responses(mocked_responses, 0, [channel(NODE_ADDRESS_1, 100)])
+    mocked_responses.add("GET", f"http://1/api/v1/channels/{TEST_TOKEN_ADDRESS}", status=500)
+    mocked_responses.add("GET", f"http://1/api/v1/pending_transfers/{TEST_TOKEN_ADDRESS}", json=[])
+
+    sampler.start()
+    gevent.sleep(0.1)
+
+    assert list(ChannelSamples(sampler.directory).column("node")) == [0]
+
+
+def test_samples_skip_incomplete_sample(mocked_responses, sampler):
+    add_node_responses(mocked_responses, 0, [channel(NODE_ADDRESS_1, 100)])
+    add_node_responses(mocked_responses, 1, [])
+    sampler.start()
+    gevent.sleep(0.1)
+    with sampler.directory.joinpath("timestamp.bin").open("ab") as timestamps:
+        timestamps.write(b"\0" * 12)
+
+    assert len(ChannelSamples(sampler.directory)) == 1
+
+
+def test_sample_transitional_states(mocked_responses, sampler):
+    states = ["closing", "settling", "unusable"]
+    add_node_responses(
+        mocked_responses,
+        0,
+        [
+            channel(NODE_ADDRESS_1, 0, channel_identifier=i, state=state)
+            for i, state in enumerate(states)
+        ],
+    )
+    add_node_responses(mocked_responses, 1, [])
+    sampler.start()
+    gevent.sleep(0.1)
+
+    codes = ChannelSamples(sampler.directory).column("state")
+    assert [STATES[code] for code in codes] == states
+
+
+def test_sparkline():
+    assert sparkline([0, 7, 14, 7]) == "▁▅█▅"
+    assert sparkline([3, 3]) == "▁▁"
+    assert sparkline([]) == ""
@@ -0,0 +1,130 @@
+import datetime
+from dataclasses import replace
+from unittest import mock
+
+import jinja2
+import pytest
+from raiden_common.utils.typing import BlockTimeout, FeeAmount, TokenAddress, TokenAmount
+
+from scenario_player.definition import DEFINITION_CACHE_FILE_NAME, load_scenario_yaml
+from scenario_player.utils.configuration.settings import EnvironmentConfig
+
+SCENARIO_TEMPLATE = """
+version: 2
+settings:
+  gas_price: "{{ gas_price }}"
+scenario:
+  serial:
+    tasks:
+      - wait: {{ wait_short }}
+"""
+
+
+@pytest.fixture
+def environment():
+    return EnvironmentConfig(
+        pfs_fee=FeeAmount(100),
+        environment_file_name="tests",
+        environment_type="development",
+        matrix_servers=[],
+        transfer_token=TokenAddress(bytes([1] * 20)),
+        pfs_with_fee="http://www.example.com",
+        eth_rpc_endpoints=["http://www.example.com"],
+        ms_reward_with_margin=TokenAmount(1),
+        settlement_timeout_min=BlockTimeout(100),
+        raiden_client="raiden",
+        wait_short=5,
+        wait_long=10,
+    )
+
+
+@pytest.fixture
+def scenario_file(tmp_path):
+    scenario_file = tmp_path.joinpath("scenario.yaml")
+    scenario_file.write_text(SCENARIO_TEMPLATE)
+    return scenario_file
+
+
+@pytest.fixture
+def cache_file(tmp_path):
+    return tmp_path.joinpath("scenarios", "scenario", DEFINITION_CACHE_FILE_NAME)
+
+
+def test_load_scenario_yaml_renders_template(scenario_file, environment, cache_file):
+    loaded = load_scenario_yaml(scenario_file, environment, cache_file)
+
+    assert loaded["settings"]["gas_price"] == "fast"
+    assert loaded["scenario"]["serial"]["tasks"] == [{"wait": 5}]
+    assert cache_file.exists()
+
+
+def test_load_scenario_yaml_uses_cache(scenario_file, environment, cache_file):
+    expected = load_scenario_yaml(scenario_file, environment, cache_file)
+
+    with mock.patch("scenario_player.definition.jinja2.Template") as template:
+        assert load_scenario_yaml(scenario_file, environment, cache_file) == expected
+    template.assert_not_called()
+
+
+def test_load_scenario_yaml_invalidates_cache_on_template_change(
+    scenario_file, environment, cache_file
+):
+    load_scenario_yaml(scenario_file, environment, cache_file)
+    scenario_file.write_text(SCENARIO_TEMPLATE.replace("wait_short", "wait_long"))
+
+    loaded = load_scenario_yaml(scenario_file, environment, cache_file)
+
+    assert loaded["scenario"]["serial"]["tasks"] == [{"wait": 10}]
+
+
+def test_load_scenario_yaml_invalidates_cache_on_environment_change(
+    scenario_file, environment, cache_file
+):
+    load_scenario_yaml(scenario_file, environment, cache_file)
+
+    loaded = load_scenario_yaml(scenario_file, replace(environment, wait_short=7), cache_file)
+
+    assert loaded["scenario"]["serial"]["tasks"] == [{"wait": 7}]
+
+
+def test_load_scenario_yaml_ignores_corrupt_cache(scenario_file, environment, cache_file):
+    cache_file.parent.mkdir(parents=True)
+    cache_file.write_bytes(b"not json")
+
+    loaded = load_scenario_yaml(scenario_file, environment, cache_file)
+
+    assert loaded["scenario"]["serial"]["tasks"] == [{"wait": 5}]
+
+
+def test_load_scenario_yaml_caches_integer_keys(scenario_file, environment, cache_file):
+    scenario_file.write_text(SCENARIO_TEMPLATE + "nodes:\n  node_options:\n    0: {a: 1}\n")
+    expected = load_scenario_yaml(scenario_file, environment, cache_file)
+
+    with mock.patch("scenario_player.definition.jinja2.Template") as template:
+        loaded = load_scenario_yaml(scenario_file, environment, cache_file)
+    template.assert_not_called()
+
+    assert loaded == expected
+    assert loaded["nodes"]["node_options"] == {0: {"a": 1}}
+
+
+def test_load_scenario_yaml_invalidates_cache_on_version_change(
+    scenario_file, environment, cache_file
+):
+    load_scenario_yaml(scenario_file, environment, cache_file)
+
+    with mock.patch("scenario_player.definition.__version__", "0.0.0"):
+        with mock.patch(
+            "scenario_player.definition.jinja2.Template", wraps=jinja2.Template
+        ) as template:
+            load_scenario_yaml(scenario_file, environment, cache_file)
+    template.assert_called_once()
+
+
+def test_load_scenario_yaml_skips_cache_for_other_values(scenario_file, environment, cache_file):
+    scenario_file.write_text(SCENARIO_TEMPLATE + "date: 2021-01-01\n")
+
+    loaded = load_scenario_yaml(scenario_file, environment, cache_file)
+
+    assert loaded["date"] == datetime.date(2021, 1, 1)
+    assert not cache_file.exists()
@@ -0,0 +1,182 @@
+import itertools
+import threading
+from collections import defaultdict
+from pathlib import Path
+
+import gevent
+import pytest
+import requests
+
+from scenario_player.distributed import SuiteCoordinator, SuiteWorker
+from scenario_player.exceptions import AccountInUse, ScenarioAssertionError
+from scenario_player.suite import SuiteEntry
+
+
+def entry(name, node_count=2, expected_duration=None):
+    return SuiteEntry(Path(f"/scenarios/{name}.yaml"), node_count, expected_duration)
+
+
+def run_number_allocator():
+    counters = defaultdict(itertools.count)
+    return lambda scenario_name: next(counters[scenario_name])
+
+
+@pytest.fixture
+def serve_coordinator():
+    """Serve the coordinator from its own thread, as the tests don't monkey patch."""
+    coordinators = []
+    started = threading.Event()
+    stop = threading.Event()
+
+    def serve():
+        server = coordinators[0].serve(("127.0.0.1", 0))
+        coordinators.append(f"http://127.0.0.1:{server.server_port}")
+        started.set()
+        while not stop.is_set():
+            gevent.sleep(0.01)
+        server.stop()
+
+    def start(coordinator):
+        coordinators.append(coordinator)
+        thread = threading.Thread(target=serve, daemon=True)
+        thread.start()
+        started.wait(5)
+        return coordinators[1]
+
+    yield start
+    stop.set()
+
+
+def test_claim_longest_first():
+    coordinator = SuiteCoordinator(
+        [entry("short", 2, 10), entry("long", 2, 100), entry("new")], run_number_allocator()
+    )
+
+    claimed = [coordinator.claim("worker")["assignment"] for _ in range(3)]
+
+    assert [Path(assignment["scenario_file"]).stem for assignment in claimed] == [
+        "new",
+        "long",
+        "short",
+    ]
+    assert coordinator.claim("worker") == {"assignment": None, "pending": 0}
+    assert not coordinator.finished.is_set()
+
+
+def test_claim_respects_worker_node_budget():
+    coordinator = SuiteCoordinator([entry("big", 10, 100), entry("small", 2, 10)], lambda _: 0)
+
+    assignment = coordinator.claim("worker", max_nodes=4, running=1)["assignment"]
+    assert Path(assignment["scenario_file"]).stem == "small"
+
+    assert coordinator.claim("worker", max_nodes=0, running=2) == {
+        "assignment": None,
+        "pending": 1,
+    }
+    # A worker without running scenarios gets the next one anyway
+    assignment = coordinator.claim("worker", max_nodes=4, running=0)["assignment"]
+    assert Path(assignment["scenario_file"]).stem == "big"
+
+
+def test_run_numbers_are_allocated_per_claim():
+    coordinator = SuiteCoordinator([entry("a"), entry("a"), entry("b")], run_number_allocator())
+
+    run_numbers = [coordinator.claim(f"worker_{index}")["assignment"] for index in range(3)]
+
+    assert sorted(
+        (Path(assignment["scenario_file"]).stem, assignment["run_number"])
+        for assignment in run_numbers
+    ) == [("a", 0), ("a", 1), ("b", 0)]
+
+
+def test_claim_rejects_account_of_other_worker():
+    coordinator = SuiteCoordinator([entry("a"), entry("b"), entry("c")], lambda _: 0)
+    assert coordinator.claim("worker_0", account="0xAbC")["assignment"] is not None
+
+    with pytest.raises(AccountInUse):
+        coordinator.claim("worker_1", account="0xabc")
+
+    assert coordinator.claim("worker_0", account="0xabc")["assignment"] is not None
+    assert coordinator.claim("worker_1", account="0xdef")["assignment"] is not None
+
+
+def test_report_finishes_suite():
+    coordinator = SuiteCoordinator([entry("a")], lambda _: 0)
+    assignment = coordinator.claim("worker")["assignment"]
+    assert coordinator.status()["running"] == {
+        assignment["id"]: {"worker": "worker", "scenario": "a"}
+    }
+
+    coordinator.report(
+        assignment["id"],
+        {"name": "a", "scenario_file": "a.yaml", "exit_code": 0, "duration": 1.0, "message": ""},
+    )
+
+    assert coordinator.finished.is_set()
+    assert coordinator.status() == {"pending": 0, "running": {}, "finished": 1}
+
+
+def test_abandon_fails_missing_scenarios():
+    coordinator = SuiteCoordinator([entry("a"), entry("b")], lambda _: 0)
+    coordinator.claim("worker")
+
+    coordinator.abandon()
+
+    assert coordinator.finished.is_set()
+    assert sorted(result.name for result in coordinator.results) == ["a", "b"]
+    assert all(result.exit_code == 10 for result in coordinator.results)
+
+
+def test_workers_on_loopback(serve_coordinator):
+    entries = [entry(f"scenario_{index}", 2, index) for index in range(6)]
+    coordinator = SuiteCoordinator(entries, run_number_allocator())
+    url = serve_coordinator(coordinator)
+    ran = []
+
+    def run_scenario(suite_entry):
+        ran.append((suite_entry.name, suite_entry.run_number))
+        if suite_entry.name == "scenario_3":
+            raise ScenarioAssertionError("Mismatch")
+
+    workers = [
+        SuiteWorker(url, run_scenario, parallel=2, name=f"worker_{index}") for index in range(2)
+    ]
+    for worker in workers:
+        worker.run()
+
+    assert coordinator.finished.wait(5)
+    assert sorted(ran) == [(f"scenario_{index}", 0) for index in range(6)]
+    assert {result.name: result.exit_code for result in coordinator.results} == {
+        f"scenario_{index}": 30 if index == 3 else 0 for index in range(6)
+    }
+    assert requests.get(f"{url}/status").json() == {"pending": 0, "running": {}, "finished": 6}
+
+
+def test_invalid_requests(serve_coordinator):
+    url = serve_coordinator(SuiteCoordinator([entry("a")], lambda _: 0))
+
+    assert requests.post(f"{url}/claim", json={}).status_code == 400
+    assert requests.post(f"{url}/result", json={"id": "unknown", "result": {}}).status_code == 400
+    assert requests.get(f"{url}/unknown").status_code == 404
+
+
+def test_workers_sharing_an_account_on_loopback(serve_coordinator):
+    coordinator = SuiteCoordinator([entry("a"), entry("b")], run_number_allocator())
+    url = serve_coordinator(coordinator)
+    second_worker = SuiteWorker(url, lambda _: None, name="worker_1", account="0x1")
+    rejections = []
+
+    def run_scenario(suite_entry):  # pylint: disable=unused-argument
+        # The second worker starts while the first one runs a scenario
+        with pytest.raises(AccountInUse) as ex:
+            second_worker.run()
+        rejections.append(str(ex.value))
+
+    first_worker = SuiteWorker(url, run_scenario, name="worker_0", account="0x1")
+    results = first_worker.run()
+
+    assert [result.exit_code for result in results] == [0, 0]
+    assert len(rejections) == 2
+    assert "used by the worker worker_0" in rejections[0]
+    assert second_worker.results == []
+    assert coordinator.finished.wait(5)
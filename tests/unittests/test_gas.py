@@ -0,0 +1,137 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from eth_utils import encode_hex, function_abi_to_4byte_selector
+from web3.exceptions import TransactionNotFound
+from tests.unittests.constants import NODE_ADDRESS_0, NODE_ADDRESS_1, TEST_TOKEN_ADDRESS
+
+from scenario_player.gas import GasProfiler, function_selectors
+
+ORCHESTRATION_ADDRESS = "0x" + "A" * 40
+OPEN_CHANNEL_ABI = {
+    "type": "function",
+    "name": "openChannel",
+    "stateMutability": "nonpayable",
+    "inputs": [{"name": "participant", "type": "address"}],
+}
+GETTER_ABI = {"type": "function", "name": "token", "stateMutability": "view", "inputs": []}
+OPEN_CHANNEL = encode_hex(function_abi_to_4byte_selector(OPEN_CHANNEL_ABI))
+
+
+def transaction(tx_hash, sender, to=TEST_TOKEN_ADDRESS, data="0x", gas_price=10**9):
+    return {"hash": tx_hash, "from": sender, "to": to, "input": data, "gasPrice": gas_price}
+
+
+class FakeEth:
+    def __init__(self, blocks, receipts):
+        self.blocks = blocks
+        self.receipts = receipts
+        self.block_number = len(blocks) - 1
+
+    def get_block(self, number, full_transactions):
+        assert full_transactions
+        return {
+            "number": number,
+            "timestamp": 100 + number * 15,
+            "transactions": self.blocks[number],
+        }
+
+    def get_transaction(self, tx_hash):
+        for block in self.blocks:
+            for transaction in block:
+                if transaction["hash"] == tx_hash:
+                    return transaction
+        raise TransactionNotFound(tx_hash)
+
+    def get_transaction_receipt(self, tx_hash):
+        return self.receipts[tx_hash]
+
+    def filter(self, filter_params):
+        raise ValueError("The method eth_newPendingTransactionFilter does not exist")
+
+
+@pytest.fixture
+def web3():
+    blocks = [
+        [],
+        [
+            transaction("0x01", ORCHESTRATION_ADDRESS, to=None, data="0x6080"),
+            transaction("0x02", ORCHESTRATION_ADDRESS, to=NODE_ADDRESS_0),
+            transaction("0x03", "0x" + "B" * 40),
+        ],
+        [
+            transaction("0x04", NODE_ADDRESS_0, data=OPEN_CHANNEL + "00" * 32),
+            transaction(
+                "0x05", NODE_ADDRESS_1, data=OPEN_CHANNEL + "00" * 32, gas_price=3 * 10**9
+            ),
+        ],
+    ]
+    receipts = {
+        "0x01": {"gasUsed": 1_000_000, "status": 1},
+        "0x02": {"gasUsed": 21_000, "status": 1},
+        "0x04": {"gasUsed": 100_000, "effectiveGasPrice": 2 * 10**9, "status": 1},
+        "0x05": {"gasUsed": 120_000, "status": 0},
+    }
+    return SimpleNamespace(eth=FakeEth(blocks, receipts), middleware_onion=MagicMock())
+
+
+@pytest.fixture
+def contract_manager():
+    return SimpleNamespace(contracts={"TokenNetwork": {"abi": [OPEN_CHANNEL_ABI, GETTER_ABI]}})
+
+
+def test_function_selectors(contract_manager):
+    assert function_selectors(contract_manager) == {
+        function_abi_to_4byte_selector(OPEN_CHANNEL_ABI): "openChannel"
+    }
+
+
+def test_gas_report(web3, contract_manager):
+    profiler = GasProfiler(web3)
+    profiler.start(1, contract_manager)
+    send = profiler.middleware(lambda method, params: {"result": "0x04"}, web3)
+    send("eth_sendRawTransaction", ["0x"])
+    assert "0x04" in profiler.submitted
+    # Submitted 2.5 seconds before the timestamp of its block
+    profiler.submitted["0x04"] = 127.5
+    profiler.stop()
+
+    report = profiler.report(
+        {
+            ORCHESTRATION_ADDRESS: "orchestration",
+            NODE_ADDRESS_0: "node-0",
+            NODE_ADDRESS_1: "node-1",
+        }
+    )
+
+    assert report["blocks"] == [1, 2]
+    assert report["total"]["count"] == 4
+    assert set(report["actions"]) == {"deploy", "eth_transfer", "openChannel"}
+    open_channel = report["actions"]["openChannel"]
+    assert open_channel["gas_used"] == {"total": 220_000, "mean": 110_000, "max": 120_000}
+    assert open_channel["gas_price_gwei"] == 2.5
+    assert open_channel["failed"] == 1
+    assert open_channel["latency"] == {"timed": 1, "p50": 2.5, "p90": 2.5, "max": 2.5}
+    assert report["accounts"]["orchestration"]["cost_eth"] == 0.001021
+    assert report["accounts"]["node-1"]["cost_eth"] == 0.00036
+    web3.middleware_onion.remove.assert_called_once_with("gas_profiler")
+
+
+def test_pending_transactions_of_other_accounts_are_not_recorded(web3, contract_manager):
+    profiler = GasProfiler(web3)
+    profiler.start(1, contract_manager, [ORCHESTRATION_ADDRESS, NODE_ADDRESS_1])
+
+    profiler._record_pending(["0x03", "0x05", "0x99"])
+    profiler.stop()
+
+    assert list(profiler.submitted) == ["0x05"]
+
+
+def test_write_gas_report(tmp_path, web3, contract_manager):
+    profiler = GasProfiler(web3)
+    profiler.start(0, contract_manager)
+
+    path = profiler.write(tmp_path, "run-002", {NODE_ADDRESS_0: "node-0"})
+
+    assert path.name == "run-002.gas.json"
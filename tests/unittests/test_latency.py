@@ -0,0 +1,147 @@
+import json
+from datetime import datetime
+
+import gevent
+import pytest
+from tests.unittests.constants import (
+    NODE_ADDRESS_0,
+    NODE_ADDRESS_1,
+    NODE_ADDRESS_2,
+    TEST_TOKEN_ADDRESS,
+)
+
+from scenario_player.latency import Histogram, PaymentTracer
+
+
+def payment_event(event, identifier, log_time, **fields):
+    # Raiden logs the events with a resolution of whole seconds
+    log_time = datetime.utcfromtimestamp(int(log_time)).isoformat()
+    return {"event": event, "identifier": str(identifier), "log_time": log_time, **fields}
+
+
+def payments_url(node):
+    return f"http://{node}/api/v1/payments/{TEST_TOKEN_ADDRESS}"
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock(100.0)
+
+
+@pytest.fixture
+def tracer(dummy_scenario_runner, clock):
+    tracer = PaymentTracer(dummy_scenario_runner, clock=clock)
+    yield tracer
+    tracer.stop()
+
+
+def test_histogram():
+    histogram = Histogram(buckets_ms=[10, 100])
+    for latency in [0.001, 0.002, 0.05, 0.2, -0.001]:
+        histogram.record(latency)
+
+    assert histogram.percentile(50) == 0.002
+    assert histogram.percentile(99) == 0.2
+    assert histogram.to_dict()["buckets"] == {"<=10ms": 3, "<=100ms": 1, "+inf": 1}
+
+
+def test_histogram_buckets_start_at_poll_interval(dummy_scenario_runner):
+    tracer = PaymentTracer(dummy_scenario_runner, poll_interval=0.5)
+
+    assert tracer.histograms["target"].buckets_ms[0] == 500
+
+
+def test_trace_payment(mocked_responses, tracer, clock):
+    tracer.expect(42, initiator=0, target=2)
+    tracer.expect(43, initiator=0, target=1)
+    tracer.expect(43, initiator=0, target=1)
+    route = [NODE_ADDRESS_0, NODE_ADDRESS_1, NODE_ADDRESS_2]
+
+    # The first poll only sees the target of the mediated payment
+    mocked_responses.add(
+        "GET", payments_url(0), json=[payment_event("EventPaymentSentSuccess", 7, 99.0)]
+    )
+    mocked_responses.add(
+        "GET",
+        payments_url(0),
+        json=[
+            payment_event("EventPaymentSentSuccess", 42, 100.4, route=route),
+            payment_event("EventPaymentSentFailed", 43, 100.1),
+        ],
+    )
+    mocked_responses.add("GET", payments_url(1), json=[])
+    mocked_responses.add(
+        "GET", payments_url(2), json=[payment_event("EventPaymentReceivedSuccess", 42, 100.2)]
+    )
+    clock.now = 100.2
+    tracer.poll()
+    clock.now = 100.4
+    tracer.poll()
+
+    assert not tracer.pending
+    report = tracer.report()
+    assert report["traced"] == 2 and report["failed"] == 1 and report["untraced"] == 1
+    assert report["histograms"]["target"]["p50_ms"] == 200
+    assert report["histograms"]["initiator"]["p50_ms"] == 400
+    assert report["histograms"]["mean_hop_estimate"]["p50_ms"] == 100
+    # The second poll fetched the events after the one seen by the first
+    offsets = [
+        call.request.params["offset"]
+        for call in mocked_responses.calls
+        if call.request.url.startswith(payments_url(0))
+    ]
+    assert offsets == ["0", "1"]
+    # Both events happened after the previous poll of their node
+    assert report["max_error_ms"] == 200
+
+
+def test_trace_payment_with_second_resolution_log_time(mocked_responses, tracer, clock):
+    tracer.expect(42, initiator=0, target=1)
+    mocked_responses.add(
+        "GET",
+        payments_url(0),
+        json=[payment_event("EventPaymentSentSuccess", 42, 100.3, route=[0, 1])],
+    )
+    mocked_responses.add(
+        "GET", payments_url(1), json=[payment_event("EventPaymentReceivedSuccess", 42, 100.3)]
+    )
+
+    # The events are logged at 100s, but seen by the poll at 100.5s
+    clock.now = 100.5
+    tracer.poll()
+
+    histograms = tracer.report()["histograms"]
+    assert histograms["target"]["p50_ms"] == histograms["initiator"]["p50_ms"] == 500
+    assert tracer.report()["max_error_ms"] == 500
+
+
+def test_failed_poll_does_not_stop_tracing(dummy_scenario_runner):
+    tracer = PaymentTracer(dummy_scenario_runner, poll_interval=0.01)
+    polls = []
+
+    def poll():
+        polls.append(len(polls))
+        if len(polls) == 1:
+            raise KeyError("status")
+
+    tracer.poll = poll
+    tracer.expect(42, initiator=0, target=1)
+    gevent.sleep(0.1)
+    tracer.stop()
+
+    assert len(polls) > 1
+
+
+def test_write_report(tmp_path, tracer):
+    path = tracer.write(tmp_path, "run-001")
+
+    assert path.name == "run-001.latency.json"
+    assert json.loads(path.read_text())["histograms"]["target"] == {"count": 0}
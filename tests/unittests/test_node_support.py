@@ -0,0 +1,52 @@
+from itertools import repeat
+from types import SimpleNamespace
+
+from scenario_player.node_support import NodeController
+from scenario_player.utils.configuration.nodes import NodesConfig
+from scenario_player.utils.flamegraph import read_folded
+
+
+def make_node_controller(tmp_path, nodes):
+    config = NodesConfig({"nodes": nodes})
+    runner = SimpleNamespace(
+        run_number=3,
+        definition=SimpleNamespace(
+            nodes=config,
+            scenario_dir=tmp_path,
+            settings=SimpleNamespace(eth_rpc_endpoint_iterator=repeat("http://eth.invalid")),
+        ),
+    )
+    return NodeController(runner, config, raiden_client="raiden")
+
+
+def test_profiled_nodes_get_a_flamegraph_dir(tmp_path):
+    node_controller = make_node_controller(
+        tmp_path,
+        {"count": 3, "node_options": {2: {"flamegraph": "/tmp/fg"}}, "profiling": {"hub": [0]}},
+    )
+
+    assert node_controller[0].flamegraph_dir == tmp_path.joinpath(
+        "node_0003_000", "flamegraph-run-003"
+    )
+    assert node_controller[1].flamegraph_dir is None
+    assert str(node_controller[2].flamegraph_dir) == "/tmp/fg"
+
+
+def test_collect_flamegraphs_merges_per_role(tmp_path):
+    node_controller = make_node_controller(
+        tmp_path, {"count": 4, "profiling": {"hub": [0], "initiator": [1, 2]}}
+    )
+    for index, data in enumerate(["main;mediate 5", "main;send 2\nmain 1", "main;send 3", ""]):
+        flamegraph_dir = node_controller[index].flamegraph_dir
+        if flamegraph_dir is not None:
+            flamegraph_dir.mkdir()
+            flamegraph_dir.joinpath("1612345678_stack.data").write_text(data)
+
+    flamegraphs = node_controller.collect_flamegraphs(tmp_path.joinpath("profile"))
+
+    assert flamegraphs == {
+        "hub": tmp_path.joinpath("profile", "run-003.nodes-hub.folded"),
+        "initiator": tmp_path.joinpath("profile", "run-003.nodes-initiator.folded"),
+    }
+    assert read_folded(flamegraphs["hub"]) == {"main;mediate": 5}
+    assert read_folded(flamegraphs["initiator"]) == {"main;send": 5, "main": 1}
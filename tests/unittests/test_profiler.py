@@ -0,0 +1,32 @@
+import json
+import time
+
+import gevent
+
+from scenario_player.profiler import Profiler
+from scenario_player.utils.flamegraph import read_folded
+
+
+def block_event_loop(seconds):
+    time.sleep(seconds)
+
+
+def test_profiler_records_stalls_and_samples(tmp_path):
+    profiler = Profiler(sample_interval=0.005, blocking_threshold=0.05)
+    profiler.start()
+    gevent.sleep(0.05)
+    block_event_loop(0.3)
+    gevent.sleep(0.1)
+    profiler.stop()
+
+    assert len(profiler.stalls) == 1
+    stall = profiler.stalls[0]
+    assert 0.2 < stall.duration < 0.4
+    assert stall.stack.split(";")[-1].startswith("block_event_loop (")
+    assert sum(profiler.samples.values()) > 10
+
+    samples_path, blocking_path, stalls_path = profiler.write(tmp_path, "run-000")
+
+    assert read_folded(samples_path) == profiler.samples
+    assert read_folded(blocking_path) == {stall.stack: round(stall.duration * 1000)}
+    assert json.loads(stalls_path.read_text())["stack"] == stall.stack
@@ -0,0 +1,88 @@
+import io
+import json
+
+import gevent
+import pytest
+
+from scenario_player.exceptions import ScenarioAssertionError
+from scenario_player.progress import ProgressStream
+from scenario_player.tasks.base import Task
+
+
+class SucceedingTask(Task):
+    _name = "succeeding"
+
+    def _run(self, *args, **kwargs):  # pylint: disable=unused-argument
+        return True
+
+
+class FlakyTask(Task):
+    _name = "flaky"
+    DEFAULT_TIMEOUT = 5
+
+    def _run(self, *args, **kwargs):  # pylint: disable=unused-argument
+        if self.attempts < 2:
+            raise ScenarioAssertionError("not yet")
+        return True
+
+
+class FailingTask(Task):
+    _name = "failing"
+
+    def _run(self, *args, **kwargs):  # pylint: disable=unused-argument
+        raise ValueError("broken")
+
+
+@pytest.fixture
+def progress(dummy_scenario_runner):
+    stream = io.StringIO()
+    progress = ProgressStream(stream, flush_interval=0.01)
+    dummy_scenario_runner.task_state_changed = lambda task, state: progress.task_state_changed(
+        dummy_scenario_runner, task, state
+    )
+    progress.stream = stream
+    return progress
+
+
+def events(progress):
+    return [json.loads(line) for line in progress.stream.getvalue().splitlines()]
+
+
+def test_progress_stream_is_buffered(dummy_scenario_runner, progress):
+    parent = SucceedingTask(dummy_scenario_runner, {"name": "parent"})
+    task = SucceedingTask(dummy_scenario_runner, {}, parent=parent)
+
+    task()
+    assert progress.stream.getvalue() == ""
+
+    gevent.sleep(0.05)
+    running, finished = events(progress)
+    assert running["id"] == finished["id"] == task.id
+    assert running["parent"] == parent.id
+    assert (running["state"], finished["state"]) == ("running", "finished")
+    assert finished["attempts"] == 1
+    assert "runtime" in finished
+
+
+def test_progress_stream_reports_attempts(dummy_scenario_runner, progress, monkeypatch):
+    monkeypatch.setattr("scenario_player.tasks.base.sleep", lambda seconds: None)
+    task = FlakyTask(dummy_scenario_runner, {"name": "flaky"})
+
+    task()
+    progress.flush()
+
+    finished = events(progress)[-1]
+    assert finished["attempts"] == 2
+    assert finished["name"] == "flaky"
+
+
+def test_progress_stream_reports_errors(dummy_scenario_runner, progress):
+    task = FailingTask(dummy_scenario_runner, {})
+
+    with pytest.raises(ValueError):
+        task()
+    progress.flush()
+
+    errored = events(progress)[-1]
+    assert errored["state"] == "errored"
+    assert errored["error"] == "ValueError('broken')"
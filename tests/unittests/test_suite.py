@@ -0,0 +1,162 @@
+import json
+from pathlib import Path
+
+import gevent
+import pytest
+
+from scenario_player.exceptions import ScenarioAssertionError, ScenarioError
+from scenario_player.suite import (
+    SuiteEntry,
+    SuiteResult,
+    SuiteScheduler,
+    collect_scenario_files,
+    format_suite_report,
+    load_durations,
+    run_suite,
+    save_durations,
+    suite_exit_code,
+    write_suite_report,
+)
+
+
+def entry(name, node_count=2, expected_duration=None):
+    return SuiteEntry(Path(f"/scenarios/{name}.yaml"), node_count, expected_duration)
+
+
+def test_collect_scenario_files(tmp_path, monkeypatch):
+    for directory in ("sp1", "sp2"):
+        tmp_path.joinpath(directory).mkdir()
+        for name in ("a", "b"):
+            tmp_path.joinpath(directory, f"{directory}_{name}.yaml").touch()
+    tmp_path.joinpath("sp1", "README.md").touch()
+    monkeypatch.chdir(tmp_path)
+
+    assert [path.name for path in collect_scenario_files(["sp1"])] == ["sp1_a.yaml", "sp1_b.yaml"]
+    assert [path.name for path in collect_scenario_files(["sp*/*_a.yaml", "sp1/sp1_a.yaml"])] == [
+        "sp1_a.yaml",
+        "sp2_a.yaml",
+    ]
+    assert all(path.is_absolute() for path in collect_scenario_files(["sp2"]))
+
+    with pytest.raises(FileNotFoundError):
+        collect_scenario_files(["sp3"])
+
+
+def test_scheduler_longest_first():
+    entries = [entry("short", expected_duration=10), entry("new"), entry("long", 2, 100)]
+    scheduler = SuiteScheduler(entries, parallel=1)
+
+    order = []
+    while not scheduler.done:
+        (started,) = scheduler.start_next()
+        order.append(started.name)
+        assert scheduler.start_next() == []
+        scheduler.finished(started)
+
+    assert order == ["new", "long", "short"]
+
+
+def test_scheduler_respects_node_budget():
+    big, medium, small = entry("big", 8, 30), entry("medium", 4, 20), entry("small", 2, 10)
+    scheduler = SuiteScheduler([small, medium, big], parallel=3, max_nodes=10)
+
+    assert scheduler.start_next() == [big, small]
+    scheduler.finished(small)
+    assert scheduler.start_next() == []
+    scheduler.finished(big)
+    assert scheduler.start_next() == [medium]
+
+
+def test_scheduler_runs_oversized_scenario_alone():
+    huge, small = entry("huge", 20, 30), entry("small", 2, 10)
+    scheduler = SuiteScheduler([small, huge], parallel=2, max_nodes=10)
+
+    assert scheduler.start_next() == [huge]
+    scheduler.finished(huge)
+    assert scheduler.start_next() == [small]
+
+
+def test_run_suite_runs_scenarios_concurrently():
+    entries = [entry(f"scenario_{index}", expected_duration=index) for index in range(4)]
+    running = []
+    max_running = 0
+
+    def run_scenario(suite_entry):
+        nonlocal max_running
+        running.append(suite_entry)
+        max_running = max(max_running, len(running))
+        gevent.sleep(0.01)
+        running.remove(suite_entry)
+        if suite_entry.name == "scenario_1":
+            raise ScenarioAssertionError("Mismatch")
+        if suite_entry.name == "scenario_2":
+            raise ScenarioError("Invalid")
+
+    results = run_suite(entries, run_scenario, parallel=2)
+
+    assert max_running == 2
+    assert {result.name: result.exit_code for result in results} == {
+        "scenario_0": 0,
+        "scenario_1": 30,
+        "scenario_2": 20,
+        "scenario_3": 0,
+    }
+    assert results[0].name in {"scenario_3", "scenario_2"}
+    assert "ScenarioAssertionError: Mismatch" in {result.message for result in results}
+
+
+def test_run_suite_unexpected_error():
+    def run_scenario(suite_entry):
+        raise RuntimeError("Crash")
+
+    (result,) = run_suite([entry("crash")], run_scenario)
+
+    assert result.exit_code == 10
+    assert not result.success
+
+
+def test_run_suite_system_exit_fails_only_its_scenario():
+    def run_scenario(suite_entry):
+        if suite_entry.name == "node_died":
+            # Raised by the runner's janitor if a node process died
+            raise SystemExit(13)
+
+    results = run_suite([entry("node_died"), entry("fine")], run_scenario)
+
+    assert {result.name: result.exit_code for result in results} == {"node_died": 13, "fine": 0}
+    assert "SystemExit: 13" in {result.message for result in results}
+
+
+def test_durations_keep_last_successful_run(tmp_path):
+    durations_file = tmp_path.joinpath("durations.json")
+    assert load_durations(durations_file) == {}
+
+    save_durations(durations_file, [SuiteResult("a", "a.yaml", 0, 12.0)])
+    save_durations(
+        durations_file, [SuiteResult("a", "a.yaml", 30, 1.0), SuiteResult("b", "b.yaml", 0, 5.0)]
+    )
+
+    assert load_durations(durations_file) == {"a": 12.0, "b": 5.0}
+
+
+def test_suite_report(tmp_path):
+    results = [SuiteResult("b", "b.yaml", 30, 2.0, "Mismatch"), SuiteResult("a", "a.yaml", 0, 4.0)]
+
+    assert suite_exit_code(results) == 30
+    assert suite_exit_code(results[1:]) == 0
+
+    report = format_suite_report(results, 4.5)
+    assert report.splitlines()[1].startswith("a ")
+    assert report.splitlines()[-1] == "1/2 scenarios successful in 4.5s (serial: 6.0s)"
+
+    report_file = tmp_path.joinpath("report.json")
+    write_suite_report(report_file, results, 4.5)
+    written = json.loads(report_file.read_text())
+    assert written["exit_code"] == 30
+    assert written["results"][0] == {
+        "name": "b",
+        "scenario_file": "b.yaml",
+        "exit_code": 30,
+        "duration": 2.0,
+        "message": "Mismatch",
+    }
@@ -0,0 +1,101 @@
+import pytest
+import urwid as uwd
+
+from scenario_player import tasks
+from scenario_player.tasks.base import TaskState, collect_tasks
+from scenario_player.tasks.execution import SerialTask
+from scenario_player.ui import TaskTreeListBox, TaskTreeNode, UrwidLogWalker
+
+SCREEN_SIZE = (80, 5)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _collect_tasks():
+    collect_tasks(tasks)
+
+
+def make_task_list_box(runner, task_count):
+    root = SerialTask(runner, {"tasks": [{"wait": 0}] * task_count})
+    list_box = TaskTreeListBox(uwd.TreeWalker(TaskTreeNode(root, key=root.id)))
+    list_box.render(SCREEN_SIZE, focus=True)
+    return root, list_box
+
+
+def test_visible_widgets_are_limited_to_the_screen(dummy_scenario_runner):
+    root, list_box = make_task_list_box(dummy_scenario_runner, 20)
+
+    tasks = [widget.get_node().get_value() for widget in list_box.visible_widgets()]
+
+    assert tasks == [root, *root._tasks[:4]]
+
+
+def test_visible_widgets_exclude_collapsed_tasks(dummy_scenario_runner):
+    root, list_box = make_task_list_box(dummy_scenario_runner, 20)
+    root_widget = list_box.visible_widgets()[0]
+    root_widget.expanded = False
+    root_widget.update_expanded_icon()
+    list_box.render(SCREEN_SIZE, focus=True)
+
+    assert [widget.get_node().get_value() for widget in list_box.visible_widgets()] == [root]
+
+
+def test_refresh_only_updates_visible_dirty_tasks(dummy_scenario_runner):
+    root, list_box = make_task_list_box(dummy_scenario_runner, 20)
+    visible_task, hidden_task = root._tasks[0], root._tasks[10]
+    visible_task._state = TaskState.FINISHED
+    hidden_task._state = TaskState.FINISHED
+    dirty_tasks = {visible_task.id, hidden_task.id}
+
+    list_box.refresh(dirty_tasks)
+
+    visible_widget = list_box.visible_widgets()[1]
+    assert TaskState.FINISHED.value in visible_widget.get_inner_widget().text
+    assert dirty_tasks == {hidden_task.id}
+
+
+class LogRecord:
+    def __init__(self, *lines):
+        self.msg = list(lines)
+
+
+def test_log_walker_keeps_last_lines():
+    walker = UrwidLogWalker(capacity=3)
+    assert walker.line_count == 0
+
+    for line in range(5):
+        walker.write(LogRecord(f"line {line}"))
+
+    assert len(walker) == 3
+    assert walker.line_count == 5
+    assert walker.get_prev(2) == (None, None)
+    widget, position = walker.get_next(2)
+    assert position == 3
+    assert widget.original_widget.text == "line 3"
+
+
+def test_log_walker_follows_new_lines():
+    walker = UrwidLogWalker(capacity=3)
+
+    walker.write(LogRecord("line 0", "line 1"))
+    assert walker.at_end
+    walker.write(LogRecord("line 2", "line 3"))
+
+    assert walker.focus == 3
+    assert walker.at_end
+
+
+def test_log_walker_keeps_scrolled_focus():
+    walker = UrwidLogWalker(capacity=3)
+    walker.write(LogRecord("line 0", "line 1", "line 2"))
+    walker.set_focus(1)
+
+    walker.write(LogRecord("line 3"))
+    assert walker.focus == 1
+    assert not walker.at_end
+
+    # The focused line was dropped, focus moves to the oldest line
+    walker.write(LogRecord("line 4"))
+    assert walker.focus == 2
+
+    walker.follow()
+    assert walker.get_focus()[1] == 4
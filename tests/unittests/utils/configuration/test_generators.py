@@ -0,0 +1,112 @@
+from collections import Counter
+
+import pytest
+
+from scenario_player.utils.configuration.generators import TopologyConfig, TrafficConfig
+
+
+def channel_degrees(edges):
+    return Counter(node for edge in edges for node in edge)
+
+
+class TestTopologyConfig:
+    @pytest.mark.parametrize(
+        "topology",
+        [
+            {"type": "hub"},
+            {"type": "hub", "hub": 3},
+            {"type": "ring"},
+            {"type": "random_regular", "degree": 4},
+            {"type": "scale_free", "degree": 3},
+            {"type": "ring", "nodes": 10},
+        ],
+    )
+    def test_edges_are_unique_channels(self, topology):
+        config = TopologyConfig({"topology": {"deposit": 10, **topology}}, 50)
+
+        edges = list(config.edges())
+
+        assert len(edges) == config.channel_count
+        assert all(node != partner for node, partner in edges)
+        assert len({frozenset(edge) for edge in edges}) == len(edges)
+        assert set(channel_degrees(edges)) == set(range(config.nodes))
+
+    def test_hub_topology_connects_every_node_to_the_hub(self):
+        config = TopologyConfig({"topology": {"type": "hub", "hub": 2, "deposit": 10}}, 5)
+
+        assert list(config.edges()) == [(0, 2), (1, 2), (3, 2), (4, 2)]
+
+    def test_random_regular_topology_has_equal_degrees(self):
+        config = TopologyConfig(
+            {"topology": {"type": "random_regular", "degree": 3, "deposit": 10}}, 100
+        )
+
+        assert set(channel_degrees(config.edges()).values()) == {3}
+
+    def test_edges_are_reproducible(self):
+        definition = {"topology": {"type": "scale_free", "deposit": 10, "seed": 7}}
+
+        assert list(TopologyConfig(definition, 30).edges()) == list(
+            TopologyConfig(definition, 30).edges()
+        )
+
+    def test_missing_section_is_allowed(self):
+        assert TopologyConfig({}, 5).dict == {}
+
+    @pytest.mark.parametrize(
+        "topology",
+        [
+            {"type": "star", "deposit": 10},
+            {"type": "hub"},
+            {"type": "hub", "deposit": -1},
+            {"type": "hub", "deposit": 10, "nodes": 6},
+            {"type": "hub", "deposit": 10, "hub": 5},
+            {"type": "ring", "deposit": 10, "nodes": 2},
+            {"type": "random_regular", "deposit": 10, "degree": 5},
+            {"type": "scale_free", "deposit": 10, "degree": 0},
+            {"type": "hub", "deposit": 10, "concurrency": 0},
+            {"type": "hub", "deposit": 10, "concurrency": "10"},
+        ],
+    )
+    def test_invalid_settings_raise(self, topology):
+        with pytest.raises(AssertionError):
+            TopologyConfig({"topology": topology}, 5)
+
+
+class TestTrafficConfig:
+    def test_payments_have_distinct_initiator_and_target(self):
+        config = TrafficConfig({"traffic": {"count": 500, "amount": 1}}, 5)
+
+        payments = list(config.payments())
+
+        assert len(payments) == 500
+        assert all(initiator != target for initiator, target in payments)
+        assert {target for _, target in payments} == set(range(5))
+
+    def test_zipf_pattern_prefers_first_nodes(self):
+        config = TrafficConfig({"traffic": {"pattern": "zipf", "count": 2000, "amount": 1}}, 20)
+
+        targets = Counter(target for _, target in config.payments())
+
+        assert targets[0] > targets[1] > targets[10]
+
+    def test_payments_are_lazy(self):
+        config = TrafficConfig({"traffic": {"count": 10**9, "amount": 1}}, 5)
+
+        initiator, target = next(config.payments())
+
+        assert initiator != target
+
+    @pytest.mark.parametrize(
+        "traffic",
+        [
+            {"pattern": "poisson", "count": 1, "amount": 1},
+            {"amount": 1},
+            {"count": 1, "amount": 0},
+            {"count": 1, "amount": 1, "nodes": 1},
+            {"count": 1, "amount": 1, "concurrency": -1},
+        ],
+    )
+    def test_invalid_settings_raise(self, traffic):
+        with pytest.raises(AssertionError):
+            TrafficConfig({"traffic": traffic}, 5)
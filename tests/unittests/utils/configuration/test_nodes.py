@@ -46,3 +46,19 @@ class TestNodesConfig:
         """Passing the NodeConfig class an empty dict is not allowed."""
         with pytest.raises(Exception):
             NodesConfig({})
+
+    def test_profiled_nodes(self, minimal_definition_dict):
+        minimal_definition_dict["nodes"].update(
+            count=3, profiling={"hub": [1], "initiator": [0, 2]}
+        )
+        config = NodesConfig(minimal_definition_dict)
+
+        assert config.profiled_nodes == {0: "initiator", 1: "hub", 2: "initiator"}
+
+    @pytest.mark.parametrize(
+        "profiling", [{"hub": 0}, {"hub": [3]}, {"hub": [0], "target": [0]}, ["hub"]]
+    )
+    def test_invalid_profiling_raises(self, profiling, minimal_definition_dict):
+        minimal_definition_dict["nodes"].update(count=3, profiling=profiling)
+        with pytest.raises(AssertionError):
+            NodesConfig(minimal_definition_dict)
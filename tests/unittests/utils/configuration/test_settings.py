@@ -63,6 +63,16 @@ class TestSettingsConfig:
             if not raises:
                 pytest.fail("Raised ScenarioConfigurationError unexpectedly!")
 
+    @pytest.mark.parametrize("value, raises", [(None, False), (0.5, False), (0, True), (-1, True)])
+    def test_validate_channel_sampling_interval(self, value, raises, minimal_definition_dict):
+        minimal_definition_dict["settings"]["channel_sampling_interval"] = value
+        if raises:
+            with pytest.raises(AssertionError):
+                SettingsConfig(minimal_definition_dict, dummy_env)
+        else:
+            config = SettingsConfig(minimal_definition_dict, dummy_env)
+            assert config.channel_sampling_interval == value
+
     def test_gas_price_strategy_returns_a_callable(self, minimal_definition_dict):
         """The :attr:`SettingsConfig.gas_price_strategy` returns a callable."""
         config = SettingsConfig(minimal_definition_dict, dummy_env)
@@ -0,0 +1,145 @@
+import json
+import multiprocessing
+import socket
+from contextlib import closing
+
+import gevent
+import pytest
+
+from scenario_player.constants import RUN_NUMBER_FILENAME
+from scenario_player.exceptions import ScenarioError
+from scenario_player.utils.allocation import (
+    PORT_RANGE_START,
+    PortAllocator,
+    allocate_run_number,
+    file_lock,
+    load_or_create_seed,
+    record_run_number,
+)
+
+
+def allocate_run_numbers(scenario_dir, count, queue):
+    queue.put([allocate_run_number(scenario_dir) for _ in range(count)])
+
+
+def test_allocate_run_number(tmp_path):
+    assert [allocate_run_number(tmp_path) for _ in range(3)] == [0, 1, 2]
+    assert tmp_path.joinpath(RUN_NUMBER_FILENAME).read_text() == "2"
+
+
+def test_allocate_run_number_continues_after_invalid_file(tmp_path):
+    tmp_path.joinpath(RUN_NUMBER_FILENAME).write_text("")
+    tmp_path.joinpath("node_0007_001").mkdir()
+    tmp_path.joinpath("node_0012_000").mkdir()
+    tmp_path.joinpath("snapshot").mkdir()
+
+    assert allocate_run_number(tmp_path) == 13
+    assert allocate_run_number(tmp_path) == 14
+
+
+def test_recorded_run_number_is_not_allocated_again(tmp_path):
+    assert allocate_run_number(tmp_path) == 0
+    record_run_number(tmp_path, 5)
+    assert tmp_path.joinpath(RUN_NUMBER_FILENAME).read_text() == "5"
+
+    # A lower run number assigned by a coordinator doesn't lower the stored one
+    record_run_number(tmp_path, 3)
+    assert allocate_run_number(tmp_path) == 6
+
+
+def test_concurrent_run_numbers_do_not_collide(tmp_path):
+    queue = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=allocate_run_numbers, args=(tmp_path, 20, queue))
+        for _ in range(4)
+    ]
+    for process in processes:
+        process.start()
+    run_numbers = [number for _ in processes for number in queue.get(timeout=30)]
+    for process in processes:
+        process.join()
+
+    assert sorted(run_numbers) == list(range(80))
+
+
+def test_load_or_create_seed(tmp_path):
+    seed_file = tmp_path.joinpath("seed.txt")
+    seeds = iter(["0x01", "0x02"])
+
+    assert load_or_create_seed(seed_file, lambda: next(seeds)) == "0x01"
+    assert load_or_create_seed(seed_file, lambda: next(seeds)) == "0x01"
+    assert seed_file.read_text() == "0x01"
+
+
+def test_file_lock_is_exclusive(tmp_path):
+    lock_file = tmp_path.joinpath(".lock")
+    acquired = multiprocessing.Event()
+    release = multiprocessing.Event()
+
+    def hold_lock():
+        with file_lock(lock_file):
+            acquired.set()
+            release.wait(10)
+
+    process = multiprocessing.Process(target=hold_lock)
+    process.start()
+    assert acquired.wait(10)
+
+    with pytest.raises(gevent.Timeout), gevent.Timeout(0.1):
+        with file_lock(lock_file):
+            pass
+
+    release.set()
+    with gevent.Timeout(10), file_lock(lock_file):
+        pass
+    process.join()
+
+
+@pytest.fixture
+def port_allocator(tmp_path):
+    return PortAllocator(tmp_path, start=PORT_RANGE_START, end=PORT_RANGE_START + 100)
+
+
+def test_reserve_contiguous_port_ranges(port_allocator):
+    first = port_allocator.reserve(10)
+    second = port_allocator.reserve(5)
+
+    assert [first.next_port() for _ in range(10)] == list(range(first.start, first.start + 10))
+    assert second.start >= first.start + 10
+    with pytest.raises(ScenarioError):
+        first.next_port()
+
+
+def test_released_ports_are_reused(port_allocator):
+    first = port_allocator.reserve(10)
+    port_allocator.reserve(10)
+    first.release()
+
+    assert port_allocator.reserve(10).start == first.start
+
+
+def test_ports_of_dead_processes_are_reused(port_allocator):
+    port_allocator.leases_file.write_text(
+        json.dumps({"dead": {"pid": 2**22 + 1, "start": PORT_RANGE_START, "count": 50}})
+    )
+
+    assert port_allocator.reserve(10).start == PORT_RANGE_START
+    assert "dead" not in json.loads(port_allocator.leases_file.read_text())
+
+
+def test_busy_ports_are_skipped(port_allocator):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    with closing(sock):
+        sock.bind(("127.0.0.1", PORT_RANGE_START + 3))
+        sock.listen(1)
+
+        port_range = port_allocator.reserve(10)
+
+    assert port_range.start == PORT_RANGE_START + 4
+
+
+def test_port_ranges_are_exhausted(port_allocator):
+    port_allocator.reserve(60)
+
+    with pytest.raises(ScenarioError):
+        port_allocator.reserve(60)
@@ -0,0 +1,31 @@
+import sys
+
+from scenario_player.utils.flamegraph import fold_stack, read_folded, write_folded
+
+
+def leaf():
+    return fold_stack(sys._getframe())
+
+
+def caller():
+    return leaf()
+
+
+def test_fold_stack():
+    stack = caller().split(";")
+
+    # The leaf is labeled with its current line, the callers with their first line
+    assert stack[-1] == f"leaf (utils/test_flamegraph.py:{leaf.__code__.co_firstlineno + 1})"
+    assert stack[-2] == f"caller (utils/test_flamegraph.py:{caller.__code__.co_firstlineno})"
+    assert stack[-3].startswith("test_fold_stack (utils/test_flamegraph.py:")
+    assert fold_stack(None) == ""
+    assert ";" not in fold_stack(sys._getframe(), max_depth=1)
+
+
+def test_write_and_read_folded(tmp_path):
+    stacks = {"main (a.py:1);run (b.py:2)": 3, "main (a.py:1)": 5}
+
+    path = write_folded(tmp_path.joinpath("profile", "run-000.samples.folded"), stacks)
+
+    assert path.read_text().splitlines() == ["main (a.py:1) 5", "main (a.py:1);run (b.py:2) 3"]
+    assert read_folded(path) == stacks
@@ -0,0 +1,20 @@
+from scenario_player.utils.identifiers import (
+    GeneratedIdentifier,
+    generate_payment_identifier,
+    parse_payment_identifier,
+    scenario_hash,
+)
+
+
+def test_generated_identifiers_are_parsed():
+    identifier = generate_payment_identifier("test_scenario", 12, 345)
+
+    assert identifier == int(f"1{scenario_hash('test_scenario')}100121000345")
+    assert parse_payment_identifier(identifier) == GeneratedIdentifier(
+        scenario_hash("test_scenario"), 12, 345
+    )
+
+
+def test_other_identifiers_are_not_parsed():
+    assert parse_payment_identifier(1) is None
+    assert parse_payment_identifier(2 * 10**17) is None
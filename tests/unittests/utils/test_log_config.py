@@ -0,0 +1,134 @@
+import logging
+import re
+from unittest import mock
+
+import pytest
+import structlog
+
+from scenario_player.utils.log_config import (
+    BackgroundFileHandler,
+    EventSampler,
+    PayloadLimiter,
+    truncate_payload,
+)
+
+
+def test_event_sampler_samples_repetitive_events():
+    sampler = EventSampler(events=frozenset({"Requesting"}), burst=2, interval=10, rate=3)
+
+    logged = []
+    with mock.patch("scenario_player.utils.log_config.time.monotonic", return_value=100):
+        for _ in range(8):
+            try:
+                logged.append(sampler(None, "debug", {"event": "Requesting"}))
+            except structlog.DropEvent:
+                pass
+
+    assert logged == [
+        {"event": "Requesting"},
+        {"event": "Requesting"},
+        {"event": "Requesting", "sampled": 3},
+        {"event": "Requesting", "sampled": 3},
+    ]
+    assert sampler.dropped == 4
+
+
+def test_event_sampler_keeps_other_events_and_levels():
+    sampler = EventSampler(events=frozenset({"Requesting"}), burst=0, rate=1_000)
+
+    assert sampler(None, "debug", {"event": "Other"}) == {"event": "Other"}
+    assert sampler(None, "warning", {"event": "Requesting"}) == {"event": "Requesting"}
+    with pytest.raises(structlog.DropEvent):
+        sampler(None, "debug", {"event": "Requesting"})
+
+
+def test_event_sampler_starts_new_interval():
+    sampler = EventSampler(events=frozenset({"Requesting"}), burst=1, interval=1, rate=1_000)
+
+    with mock.patch("scenario_player.utils.log_config.time.monotonic", side_effect=[0, 0.5, 1]):
+        sampler(None, "info", {"event": "Requesting"})
+        with pytest.raises(structlog.DropEvent):
+            sampler(None, "info", {"event": "Requesting"})
+        assert sampler(None, "info", {"event": "Requesting"}) == {"event": "Requesting"}
+
+
+def test_truncate_payload():
+    truncated = truncate_payload(b'{"amount": 1}' * 10, max_length=12)
+
+    assert re.match(r'^\{"amount": 1\.\.\.<130 bytes, blake2b [0-9a-f]{16}>$', truncated)
+    assert truncate_payload("a" * 20, 5) == truncate_payload(b"a" * 20, 5)
+
+
+def test_payload_limiter():
+    limiter = PayloadLimiter(max_length=8, max_items=2)
+
+    event_dict = limiter(
+        None,
+        "debug",
+        {
+            "event": "Received response with a long event name",
+            "body": b"0123456789",
+            "url": "http://x",
+            "json": {"a": 1, "b": 2, "c": 3},
+            "amount": 10**30,
+            "ok": True,
+        },
+    )
+
+    assert event_dict["event"] == "Received response with a long event name"
+    assert event_dict["body"].startswith("01234567...<10 bytes")
+    assert event_dict["url"] == "http://x"
+    assert event_dict["json"] == "{'a': 1, 'b': 2, ...}"
+    assert event_dict["amount"] == 10**30
+    assert event_dict["ok"] is True
+
+
+def test_payload_limiter_summarizes_objects():
+    class Task:
+        def __init__(self, id):
+            self.id = id
+
+        def __repr__(self):
+            raise AssertionError("repr of a task must not be computed")
+
+    class Node:
+        pass
+
+    limiter = PayloadLimiter(max_length=20, max_items=2)
+    node = Node()
+
+    event_dict = limiter(
+        None,
+        "debug",
+        {
+            "event": "Starting task",
+            "task": Task("7"),
+            "node": node,
+            "tasks": [Task("1"), Task("2"), Task("3")],
+            "ex": ValueError("x" * 30),
+        },
+    )
+
+    assert event_dict["task"] == "<Task id='7'>"
+    assert event_dict["node"] == f"<Node at {id(node):#x}>"
+    assert event_dict["tasks"] == "[<Task id='1'>, <Task id='2'>, ...]"
+    assert event_dict["ex"] == "ValueErr...xxxxxxx')"
+
+
+def test_background_file_handler_writes_all_records(tmp_path):
+    log_file = tmp_path.joinpath("run.log")
+    handler = BackgroundFileHandler(str(log_file), batch_size=3)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger = logging.getLogger("test_background_file_handler")
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        for line in range(10):
+            logger.warning("line %d", line)
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+    assert log_file.read_text().splitlines() == [f"line {line}" for line in range(10)]
+    # Closing twice is a no-op
+    handler.close()
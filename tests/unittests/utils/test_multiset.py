@@ -0,0 +1,23 @@
+from scenario_player.utils.multiset import multiset_diff
+
+
+def test_multiset_diff_ignores_order():
+    diff = multiset_diff(["50", "100", "50"], ["50", "50", "100"])
+
+    assert not diff
+    assert diff.format() == ""
+
+
+def test_multiset_diff_counts_differences():
+    diff = multiset_diff(["90", "90", "100", "80"], ["100", "50", "50", "50"])
+
+    assert diff
+    assert list(diff.missing.items()) == [("90", 2), ("80", 1)]
+    assert list(diff.unexpected.items()) == [("50", 3)]
+    assert diff.format() == "missing: 90 (2x), 80; unexpected: 50 (3x)"
+
+
+def test_multiset_diff_format_limits_values():
+    diff = multiset_diff(range(25), [])
+
+    assert diff.format(lambda value: f"<{value}>").endswith("<18>, <19>, ... 5 more")
@@ -0,0 +1,117 @@
+import gzip
+import io
+import json
+import time
+from unittest import mock
+
+from scenario_player.utils.node_logs import (
+    RotatingLogWriter,
+    compress_file,
+    find_log_position,
+    index_path_for,
+    open_log_segment,
+    pump_output,
+    rotated_segments,
+)
+
+
+def read_segment(path):
+    with open_log_segment(path) as segment:
+        return segment.read()
+
+
+def test_writer_buffers_output(tmp_path):
+    path = tmp_path.joinpath("run-000.stdout")
+    writer = RotatingLogWriter(path, buffer_size=1024, compress=False)
+
+    writer.write("line\n")
+    assert path.read_bytes() == b""
+
+    writer.close()
+    assert path.read_bytes() == b"line\n"
+
+
+def test_writer_rotates_and_compresses_segments(tmp_path):
+    path = tmp_path.joinpath("run-000.stdout")
+    # Every line fills a segment
+    writer = RotatingLogWriter(path, segment_size=7, index_interval=5)
+    for line in range(5):
+        writer.write(f"line {line}\n")
+    writer.close()
+
+    assert rotated_segments(path) == [0, 1, 2, 3, 4]
+    assert not tmp_path.joinpath("run-000.stdout.0").exists()
+    assert read_segment(tmp_path.joinpath("run-000.stdout.2.gz")) == b"line 2\n"
+    assert path.read_bytes() == b""
+
+    index = [json.loads(line) for line in index_path_for(path).read_text().splitlines()]
+    assert [(entry["segment"], entry["offset"]) for entry in index] == [
+        (segment, 0) for segment in range(5)
+    ]
+
+
+def test_writer_compresses_last_segment_on_close(tmp_path):
+    path = tmp_path.joinpath("run-000.stdout")
+    writer = RotatingLogWriter(path, segment_size=10)
+    for line in range(3):
+        writer.write(f"line {line}\n")
+    writer.close()
+
+    assert not path.exists()
+    assert rotated_segments(path) == [0, 1]
+    assert read_segment(tmp_path.joinpath("run-000.stdout.1.gz")) == b"line 2\n"
+    assert find_log_position(path, time.time()) == (tmp_path.joinpath("run-000.stdout.1.gz"), 0)
+
+
+def test_writer_continues_after_existing_segments(tmp_path):
+    path = tmp_path.joinpath("run-000.stdout")
+    path.write_bytes(b"first run\n")
+    tmp_path.joinpath("run-000.stdout.0.gz").touch()
+    tmp_path.joinpath("run-000.stdout.1").touch()
+
+    writer = RotatingLogWriter(path, segment_size=15, compress=False)
+    writer.write("second run\n")
+    writer.close()
+
+    assert writer.segment == 3
+    assert tmp_path.joinpath("run-000.stdout.2").read_bytes() == b"first run\nsecond run\n"
+
+
+def test_compress_file_keeps_mtime(tmp_path):
+    path = tmp_path.joinpath("run-000.log")
+    path.write_text('{"event": "started"}\n')
+    mtime = path.stat().st_mtime
+
+    compressed = compress_file(path)
+
+    assert not path.exists()
+    assert compressed.name == "run-000.log.gz"
+    assert compressed.stat().st_mtime == mtime
+    assert gzip.decompress(compressed.read_bytes()) == b'{"event": "started"}\n'
+
+
+def test_pump_output_closes_writer():
+    writer = mock.Mock(spec=RotatingLogWriter)
+
+    pump_output(io.BufferedReader(io.BytesIO(b"out\n" * 3)), writer)
+
+    assert b"".join(call.args[0] for call in writer.write.call_args_list) == b"out\n" * 3
+    writer.close.assert_called_once()
+
+
+def test_find_log_position(tmp_path):
+    path = tmp_path.joinpath("run-000.stdout")
+    assert find_log_position(path, 100) == (path, 0)
+
+    with mock.patch("scenario_player.utils.node_logs.time.time", side_effect=[10, 20, 30]):
+        writer = RotatingLogWriter(path, segment_size=12, index_interval=6, compress=False)
+        for line in ("line 0\n", "line 1\n", "line 2\n"):
+            writer.write(line)
+        writer.close()
+
+    first_segment = tmp_path.joinpath("run-000.stdout.0")
+    assert find_log_position(path, 5) == (first_segment, 0)
+    assert find_log_position(path, 15) == (first_segment, 0)
+    assert find_log_position(path, 25) == (first_segment, 7)
+    assert read_segment(first_segment)[7:] == b"line 1\n"
+    assert find_log_position(path, 35) == (path, 0)
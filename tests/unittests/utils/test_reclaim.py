@@ -0,0 +1,28 @@
+import json
+import os
+import time
+
+from scenario_player.utils.reclaim import get_reclamation_candidates
+
+
+def make_node_dir(data_path, name, log_ages_hours):
+    node_dir = data_path.joinpath("scenarios", "scenario", name)
+    node_dir.joinpath("keys").mkdir(parents=True)
+    node_dir.joinpath("keys", "UTC--0").write_text(json.dumps({"address": "1" * 40}))
+    for log_name, age_hours in log_ages_hours.items():
+        log_path = node_dir.joinpath(log_name)
+        log_path.touch()
+        mtime = time.time() - age_hours * 3600
+        os.utime(log_path, (mtime, mtime))
+    return node_dir
+
+
+def test_reclamation_candidates_use_log_of_last_run(tmp_path):
+    # The age of the node is the age of the log of the run with the highest number
+    make_node_dir(tmp_path, "node_000", {"run-999.log.gz": 1, "run-1000.log": 5})
+    make_node_dir(tmp_path, "node_001", {"run-000.log.gz": 5, "run-001.log": 1})
+    make_node_dir(tmp_path, "node_002", {})
+
+    candidates = get_reclamation_candidates(tmp_path, min_age_hours=2)
+
+    assert sorted(candidate.node_dir.name for candidate in candidates) == ["node_000", "node_002"]